@@ -0,0 +1,424 @@
+"""
+Правила Тетриса без pygame: битборд, фигуры (таблицы поворотов, кики SRS, 7-bag),
+перебор конечных постановок фигуры,
+пакетная оценка позиций (NumPy, если есть) и self-play в пуле процессов.
+Используется игрой (tetris_game.py), ботом/подсказками и для подбора fall_speed.
+
+    python tetris_engine.py --games 200 --max-pieces 500
+"""
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# Рамки фигур в положении появления (SRS): поворот рамки целиком даёт остальные состояния
+TETROMINOS = [
+    [[0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0], [0, 0, 0, 0]],   # I
+    [[0, 1, 0], [1, 1, 1], [0, 0, 0]],                           # T
+    [[1, 1, 0], [0, 1, 1], [0, 0, 0]],                           # Z
+    [[0, 1, 1], [1, 1, 0], [0, 0, 0]],                           # S
+    [[1, 1], [1, 1]],                                            # O
+    [[1, 0, 0], [1, 1, 1], [0, 0, 0]],                           # J
+    [[0, 0, 1], [1, 1, 1], [0, 0, 0]],                           # L
+]
+I_KIND, O_KIND = 0, 4
+
+PAD = 4  # бит-стенки слева/справа, шире любой фигуры
+WALLS = (1 << PAD) - 1
+EMPTY_ROW = WALLS | (WALLS << (PAD + GRID_WIDTH))
+FULL_ROW = (1 << (2 * PAD + GRID_WIDTH)) - 1
+CELLS = ((1 << GRID_WIDTH) - 1) << PAD
+
+def rotate_shape(shape):
+    return [list(row) for row in zip(*shape[::-1])]
+
+# --- ПОЛЕ (битборд) ---
+_PROFILES = {}
+
+def shape_profile(shape):
+    """Маски строк фигуры и нижняя клетка каждого столбца (кэшируется по форме)"""
+    key = tuple(map(tuple, shape))
+    prof = _PROFILES.get(key)
+    if prof is None:
+        masks = tuple(sum(1 << j for j, c in enumerate(row) if c) for row in key)
+        bottoms = tuple(max((i for i, row in enumerate(key) if row[j]), default=-1) for j in range(len(key[0])))
+        prof = _PROFILES[key] = (masks, bottoms)
+    return prof
+
+def collides(rows, masks, x, y):
+    sx = x + PAD
+    if sx < 0: return True
+    height = len(rows)
+    for i, m in enumerate(masks):
+        if not m: continue
+        ny = y + i
+        if ny >= height: return True
+        row = rows[ny] if ny >= 0 else EMPTY_ROW
+        if row & (m << sx): return True
+    return False
+
+# --- ФИГУРЫ (повороты, кики SRS, 7-bag) ---
+# Кики SRS как в описании стандарта (y вверх): (из, в) -> сдвиги в порядке проверки
+KICKS_JLSTZ = {
+    (0, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (1, 0): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (1, 2): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (2, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (2, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (3, 2): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (3, 0): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (0, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+}
+KICKS_I = {
+    (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (1, 0): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+    (2, 1): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (2, 3): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (3, 0): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+}
+
+def build_states(shape):
+    """4 поворота рамки: (клетки (dx, dy), маски строк, нижние клетки столбцов)"""
+    out = []
+    for _ in range(4):
+        masks, bottoms = shape_profile(shape)
+        cells = tuple((j, i) for i, row in enumerate(shape) for j, c in enumerate(row) if c)
+        out.append((cells, masks, bottoms))
+        shape = rotate_shape(shape)
+    return tuple(out)
+
+def build_kicks(kind):
+    """[поворот][0 — по часовой, 1 — против] -> сдвиги в координатах поля (y вниз)"""
+    if kind == O_KIND: return ((((0, 0),), ((0, 0),)),) * 4
+    table = KICKS_I if kind == I_KIND else KICKS_JLSTZ
+    return tuple(tuple(tuple((dx, -dy) for dx, dy in table[r, (r + turn) % 4]) for turn in (1, 3))
+                 for r in range(4))
+
+STATES = tuple(build_states(shape) for shape in TETROMINOS)   # [вид][поворот]
+KICKS = tuple(build_kicks(kind) for kind in range(len(TETROMINOS)))
+# Рамка по центру, верхняя занятая строка — строка 0 поля
+SPAWN = tuple(((GRID_WIDTH - len(shape[0])) // 2, -min(dy for _, dy in STATES[kind][0][0]))
+              for kind, shape in enumerate(TETROMINOS))
+
+class Piece:
+    """Падающая фигура: вид (индекс в TETROMINOS), поворот 0..3 и угол рамки на поле.
+    Клетки и маски берутся из общих таблиц — сдвиг и поворот ничего не выделяют"""
+    __slots__ = ("kind", "rot", "x", "y")
+
+    def __init__(self, kind=0, rot=0, x=0, y=0):
+        self.kind, self.rot, self.x, self.y = kind, rot, x, y
+
+    def spawn(self, kind):
+        self.kind, self.rot = kind, 0
+        self.x, self.y = SPAWN[kind]
+        return self
+
+    @property
+    def color(self): return self.kind + 1
+    @property
+    def cells(self): return STATES[self.kind][self.rot][0]
+    @property
+    def masks(self): return STATES[self.kind][self.rot][1]
+    @property
+    def bottoms(self): return STATES[self.kind][self.rot][2]
+
+class Bag:
+    """7-bag: виды выдаются перестановками всех семи — без долгих засух и серий"""
+    def __init__(self, rng):
+        self.rng = rng
+        self.left = []  # остаток текущего мешка, берётся с конца
+
+    def next(self):
+        if not self.left:
+            self.left = list(range(len(TETROMINOS)))
+            self.rng.shuffle(self.left)
+        return self.left.pop()
+
+class Board:
+    """Строки поля как битовые маски (со стенками) + отдельная плоскость цветов.
+    colors — тот же список списков, что и раньше Tetris.grid"""
+    PAD = PAD
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width, self.height = width, height
+        walls = (1 << self.PAD) - 1
+        self.empty_row = walls | (walls << (self.PAD + width))
+        self.full_row = (1 << (2 * self.PAD + width)) - 1
+        self.floor = 1 << height  # дно в масках столбцов
+        self.rows = [self.empty_row] * height
+        self.cols = [self.floor] * width
+        self.colors = [[0 for _ in range(width)] for _ in range(height)]
+
+    def collides(self, masks, x, y):
+        return collides(self.rows, masks, x, y)
+
+    def place(self, cells, x, y, color):
+        for dx, dy in cells:
+            py = y + dy
+            if py < 0: continue
+            self.rows[py] |= 1 << (x + dx + self.PAD)
+            self.cols[x + dx] |= 1 << py
+            self.colors[py][x + dx] = color
+
+    def try_rotate(self, piece, turn):
+        """Поворот с киками SRS (turn: 1 — по часовой, -1 — против); True, если фигура встала"""
+        rot = (piece.rot + turn) & 3
+        masks = STATES[piece.kind][rot][1]
+        for dx, dy in KICKS[piece.kind][piece.rot][turn < 0]:
+            if not collides(self.rows, masks, piece.x + dx, piece.y + dy):
+                piece.rot = rot
+                piece.x += dx
+                piece.y += dy
+                return True
+        return False
+
+    def clear_lines(self):
+        """Один проход снизу вверх: полные строки выкидываются, остальные сдвигаются"""
+        rows, colors = self.rows, self.colors
+        freed = []
+        write = self.height - 1
+        for read in range(self.height - 1, -1, -1):
+            if rows[read] == self.full_row:
+                freed.append(colors[read])
+                continue
+            if write != read:
+                rows[write] = rows[read]
+                colors[write] = colors[read]
+            write -= 1
+        for k, row in enumerate(freed):
+            row[:] = [0] * self.width
+            rows[k] = self.empty_row
+            colors[k] = row
+        if freed: self.rebuild_cols()
+        return len(freed)
+
+    def load_colors(self, colors):
+        """Поле из плоскости цветов (восстановление снимка)"""
+        for y, row in enumerate(colors):
+            self.colors[y][:] = row
+            self.rows[y] = self.empty_row | sum(1 << (x + self.PAD) for x, c in enumerate(row) if c)
+        self.rebuild_cols()
+
+    def rebuild_cols(self):
+        cols = [self.floor] * self.width
+        for y, row in enumerate(self.rows):
+            bits = row >> self.PAD
+            for x in range(self.width):
+                if bits >> x & 1: cols[x] |= 1 << y
+        self.cols = cols
+
+    def drop_distance(self, bottoms, x, y):
+        """На сколько клеток фигура упадёт (для призрака) — без перебора позиций"""
+        dist = self.height
+        for j, bottom in enumerate(bottoms):
+            if bottom < 0: continue
+            r0 = y + bottom + 1
+            s = max(r0, 0)
+            v = self.cols[x + j] >> s
+            d = s + (v & -v).bit_length() - 1 - r0
+            if d < dist: dist = d
+        return dist
+
+# --- ДВИЖОК ПОСТАНОВОК ---
+class PieceTable:
+    """Для каждой фигуры: уникальные по форме повороты из STATES (число поворотов по часовой,
+    маски строк, нижние клетки столбцов, ширина рамки), маски цепочки поворотов и точка появления"""
+    def __init__(self):
+        self.kinds = []
+        for kind, shape in enumerate(TETROMINOS):
+            spawn_x, spawn_y = SPAWN[kind]
+            states, seen = [], set()
+            for turns, (cells, masks, bottoms) in enumerate(STATES[kind]):
+                x0, y0 = min(c[0] for c in cells), min(c[1] for c in cells)
+                key = frozenset((x - x0, y - y0) for x, y in cells)
+                if key not in seen:
+                    seen.add(key)
+                    states.append((turns, masks, bottoms, len(shape[0])))
+            chain = tuple(masks for _, masks, _ in STATES[kind])
+            self.kinds.append((spawn_x, spawn_y, states, chain))
+
+PIECES = PieceTable()
+
+def column_tops(rows):
+    """Индекс верхней занятой клетки в каждом столбце (GRID_HEIGHT — пусто)"""
+    tops = [GRID_HEIGHT] * GRID_WIDTH
+    left = CELLS
+    for y, row in enumerate(rows):
+        hit = row & left
+        if hit:
+            left ^= hit
+            while hit:
+                low = hit & -hit
+                tops[low.bit_length() - 1 - PAD] = y
+                hit ^= low
+            if not left: break
+    return tops
+
+def placements(rows, kind):
+    """
+    Все конечные постановки с жёстким сбросом, достижимые из точки появления:
+    повороты на месте (без киков), сдвиг по строке появления, падение. -> [(turns, x, y, masks)]
+    """
+    spawn_x, spawn_y, states, chain = PIECES.kinds[kind]
+    tops = column_tops(rows)
+    out = []
+    max_turns = 0
+    while max_turns < 3 and not collides(rows, chain[max_turns + 1], spawn_x, spawn_y):
+        max_turns += 1
+    for turns, masks, bottoms, width in states:
+        if turns > max_turns: continue
+        xs = []
+        x = spawn_x
+        while not collides(rows, masks, x, spawn_y): xs.append(x); x -= 1
+        x = spawn_x + 1
+        while not collides(rows, masks, x, spawn_y): xs.append(x); x += 1
+        for x in xs:
+            y = GRID_HEIGHT
+            for j in range(width):
+                b = bottoms[j]
+                if b >= 0:
+                    d = tops[x + j] - b - 1
+                    if d < y: y = d
+            out.append((turns, x, y, masks))
+    return out
+
+def apply_placement(rows, masks, x, y):
+    """Новая доска после постановки и число снятых линий (исходная не меняется)"""
+    new = list(rows)
+    sx = x + PAD
+    full = 0
+    for i, m in enumerate(masks):
+        if m and y + i >= 0:
+            new[y + i] |= m << sx
+            if new[y + i] == FULL_ROW: full += 1
+    if full:
+        kept = [r for r in new if r != FULL_ROW]
+        new = [EMPTY_ROW] * full + kept
+    return new, full
+
+# --- ОЦЕНКА ---
+# Веса: совокупная высота, снятые линии, дыры, неровность
+DEFAULT_WEIGHTS = (-0.510066, 0.760666, -0.35663, -0.184483)
+
+if np is not None:
+    _BIT_SHIFTS = np.arange(PAD, PAD + GRID_WIDTH, dtype=np.int64)
+    _ROW_INDEX = np.arange(GRID_HEIGHT)[None, :, None]
+
+def board_features_batch(boards, lines):
+    """Признаки для пачки досок: (N, 4) — высота, линии, дыры, неровность"""
+    if np is not None:
+        arr = np.asarray(boards, dtype=np.int64)                       # (N, H)
+        filled = ((arr[:, :, None] >> _BIT_SHIFTS) & 1).astype(bool)   # (N, H, W)
+        any_col = filled.any(axis=1)
+        first = np.where(any_col, filled.argmax(axis=1), GRID_HEIGHT)  # (N, W)
+        heights = GRID_HEIGHT - first
+        holes = ((_ROW_INDEX > first[:, None, :]) & ~filled).sum(axis=(1, 2))
+        bump = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+        return np.stack([heights.sum(axis=1), np.asarray(lines), holes, bump], axis=1)
+
+    out = []
+    for rows, n in zip(boards, lines):
+        tops = column_tops(rows)
+        heights = [GRID_HEIGHT - t for t in tops]
+        holes = 0
+        for x, top in enumerate(tops):
+            bit = 1 << (x + PAD)
+            for y in range(top + 1, GRID_HEIGHT):
+                if not rows[y] & bit: holes += 1
+        bump = sum(abs(heights[i] - heights[i + 1]) for i in range(GRID_WIDTH - 1))
+        out.append((sum(heights), n, holes, bump))
+    return out
+
+def score_boards(boards, lines, weights=DEFAULT_WEIGHTS):
+    feats = board_features_batch(boards, lines)
+    if np is not None:
+        return feats @ np.asarray(weights, dtype=float)
+    return [sum(w * f for w, f in zip(weights, row)) for row in feats]
+
+def best_placement(rows, kind, weights=DEFAULT_WEIGHTS):
+    """Лучшая постановка для фигуры: (turns, x, y, masks, new_rows, lines) или None"""
+    cands = placements(rows, kind)
+    if not cands: return None
+    results = [apply_placement(rows, masks, x, y) for _, x, y, masks in cands]
+    scores = score_boards([r for r, _ in results], [n for _, n in results], weights)
+    best = max(range(len(cands)), key=scores.__getitem__)
+    turns, x, y, masks = cands[best]
+    return turns, x, y, masks, results[best][0], results[best][1]
+
+# --- SELF-PLAY ---
+def play_game(seed=0, weights=DEFAULT_WEIGHTS, max_pieces=500, fall_speed=500):
+    """
+    Одна партия жадного бота по правилам игры (100 очков за линию, fall_speed
+    уменьшается на 10 мс за линию, пока больше 100). sim_ms — время, за которое
+    фигуры упали бы сами при текущем fall_speed.
+    """
+    bag = Bag(random.Random(seed))
+    rows = [EMPTY_ROW] * GRID_HEIGHT
+    pieces = lines = score = 0
+    sim_ms = 0
+    kind = bag.next()
+    while pieces < max_pieces:
+        spawn_x, spawn_y, _, chain = PIECES.kinds[kind]
+        if collides(rows, chain[0], spawn_x, spawn_y): break  # game over
+        move = best_placement(rows, kind, weights)
+        if move is None: break
+        _, _, y, _, rows, n = move
+        sim_ms += (y - spawn_y + 1) * fall_speed
+        pieces += 1
+        if n:
+            lines += n
+            score += n * 100
+            if fall_speed > 100: fall_speed -= 10 * n
+        kind = bag.next()
+    return {"seed": seed, "pieces": pieces, "lines": lines, "score": score,
+            "sim_ms": sim_ms, "final_fall_speed": fall_speed}
+
+def _play_chunk(args):
+    seeds, weights, max_pieces, fall_speed = args
+    return [play_game(s, weights, max_pieces, fall_speed) for s in seeds]
+
+def selfplay(games=100, workers=None, seed=0, weights=DEFAULT_WEIGHTS, max_pieces=500, fall_speed=500):
+    """Партии в пуле процессов; workers=1 — в текущем процессе"""
+    seeds = list(range(seed, seed + games))
+    if workers == 1:
+        return _play_chunk((seeds, weights, max_pieces, fall_speed))
+    from concurrent.futures import ProcessPoolExecutor
+    import os
+    workers = workers or os.cpu_count() or 1
+    chunks = [(seeds[i::workers], weights, max_pieces, fall_speed) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        return [r for part in pool.map(_play_chunk, chunks) for r in part]
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Headless Tetris self-play")
+    ap.add_argument("--games", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-pieces", type=int, default=500)
+    ap.add_argument("--fall-speed", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    res = selfplay(args.games, args.workers, args.seed, max_pieces=args.max_pieces, fall_speed=args.fall_speed)
+    dt = time.perf_counter() - t0
+    pieces = sum(r["pieces"] for r in res)
+    lines = sum(r["lines"] for r in res)
+    print(f"{len(res)} games, {pieces} pieces, {lines} lines in {dt:.2f} s "
+          f"({len(res) / dt:.1f} games/s, {pieces / dt:.0f} pieces/s, numpy={'yes' if np is not None else 'no'})")
+    print(f"avg lines {lines / len(res):.1f}, avg final fall_speed "
+          f"{sum(r['final_fall_speed'] for r in res) / len(res):.0f} ms, "
+          f"avg game time {sum(r['sim_ms'] for r in res) / len(res) / 1000:.0f} s")
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -5,21 +5,97 @@ import math
 import array
 import os
 import json
+import struct
 import sys
+import hashlib
+from collections import deque
+
+# Правила (битборд, фигуры) живут в tetris_engine.py рядом — без pygame
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path: sys.path.insert(0, _HERE)
+from tetris_engine import GRID_WIDTH, GRID_HEIGHT, TETROMINOS, SPAWN, Board, Piece, Bag
+from tetris_engine import STATES as PIECE_STATES
+
+# Хост ixstore: кэш текста, атлас плиток, DAS/ARR, рекорды, снимки, звук и музыка.
+# Отдельно от витрины Tetris идёт как раньше: font.render, блоки через draw.rect,
+# сырые события, рекорд до выхода, Sound.play() без музыки
+try:
+    from ixstore.textcache import render_text, draw_text
+    from ixstore.tiles import tile_atlas
+    from ixstore.controls import Controls
+    from ixstore.saves import high_scores, pack_rng, unpack_rng
+    from ixstore.audio import AudioManager, chiptune
+except ImportError:
+    tile_atlas = Controls = high_scores = AudioManager = None
+    def render_text(font, text, color, antialias=True):
+        return font.render(text, antialias, color)
+    def draw_text(dest, font, text, color, antialias=True, **anchor):
+        surf = font.render(text, antialias, color)
+        return dest.blit(surf, surf.get_rect(**anchor))
 
 # --- КОНСТАНТЫ ---
 BLOCK_SIZE = 24
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
+IDLE_FPS = 20  # меню и Game Over: кадр не меняется, пока нет ввода
+DAS, ARR = 170, 50  # автоповтор сдвига: задержка и период, мс
+SOFT_DROP_ARR = 50
+PREVIEW = 3        # фигур в очереди «Next»
+MINI = 18          # клетка превью и удержания
+PREVIEW_SLOT = 3 * MINI
+BLOCK_STYLE = "block"  # стиль плиток из ixstore.tiles: block, neon, glow...
 
 # Цвета
 COLOR_BG = (15, 15, 20)
 COLOR_GRID = (30, 30, 40)
+COLOR_FIELD = (20, 20, 25)
 COLOR_TEXT = (240, 240, 240)
 COLOR_ACCENT = (0, 200, 255) 
 COLOR_OVERLAY = (0, 0, 0, 220)
 COLOR_MENU_SEL = (50, 50, 60)
 COLOR_GHOST = (60, 60, 70) 
+COLOR_HOLD_USED = (90, 90, 100)
+
+# --- СНИМОК СОСТОЯНИЯ ---
+SNAP_MAGIC = b"IXT2"
+SNAP_HEAD = struct.Struct("<4sBBBiiI")  # magic, ширина, высота, состояние, очки, fall_speed, fall_time
+SNAP_PIECE = struct.Struct("<BBbb")     # вид, поворот, x, y
+SNAP_QUEUE = struct.Struct(f"<{PREVIEW}sBBB7s")  # очередь, удержание (255 — пусто), удержание занято, остаток мешка
+NO_HOLD = 255
+STATES = ("SPLASH", "MENU", "PLAYING", "GAMEOVER")
+
+# --- ЗВУК ---
+SOUND_GROUPS = {"music": 1, "moves": 2, "sfx": 3}
+# звук -> (группа, приоритет, копий одновременно; 0 — без ограничения)
+SOUND_VOICES = {
+    "move": ("moves", 0, 1),
+    "rotate": ("moves", 0, 1),
+    "drop": ("sfx", 1, 0),
+    "clear": ("sfx", 3, 0),
+    "gameover": ("sfx", 4, 0),
+}
+# Фоновая петля в ля миноре (Am - F - G - E), шаг — 1/16 такта
+TETRIS_SONG = {"bpm": 140, "tracks": [
+    ("pulse", 0.30, 0.6,
+     "A4 . C5 . E5 . A5 . G5 . E5 . C5 . E5 . "
+     "F5 . . . A5 . F5 . C5 . . . A4 . C5 . "
+     "D5 . G5 . B5 . G5 . D5 . B4 . D5 . G5 . "
+     "E5 . G#5 . B5 . . . G#5 . E5 . B4 . . ."),
+    ("triangle", 0.35, 0.3,
+     "A2 . A3 . " * 4 + "F2 . F3 . " * 4 + "G2 . G3 . " * 4 + "E2 . E3 . " * 4),
+    ("noise", 0.08, 4.0, "x . " * 32),
+]}
+
+def draw_block(surf, color, rect):
+    # Блок без атласа: заливка и чёрная рамка
+    pygame.draw.rect(surf, color, rect)
+    pygame.draw.rect(surf, (0, 0, 0), rect, 1)
+
+def pack_piece(p):
+    return SNAP_PIECE.pack(p.kind, p.rot, p.x, p.y)
+
+def unpack_piece(data, pos):
+    kind, rot, x, y = SNAP_PIECE.unpack_from(data, pos)
+    if kind >= len(TETROMINOS) or rot > 3: raise ValueError("bad piece in Tetris snapshot")
+    return Piece(kind, rot, x, y)
 
 SHAPE_COLORS = [
     (0, 0, 0),       
@@ -32,59 +108,298 @@ SHAPE_COLORS = [
     (240, 0, 0)      # Z 
 ]
 
-TETROMINOS = [
-    [[1, 1, 1, 1]],                               
-    [[1, 1, 1], [0, 1, 0]],                       
-    [[1, 1, 0], [0, 1, 1]],                       
-    [[0, 1, 1], [1, 1, 0]],                       
-    [[1, 1], [1, 1]],                             
-    [[1, 0, 0], [1, 1, 1]],                       
-    [[0, 0, 1], [1, 1, 1]],                       
-]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SOUND_CACHE_VERSION = 1
+SOUND_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "ixstore", "tetris_sounds")
 
 class SoundGen:
-    """Генератор 8-битных звуков на лету"""
-    def __init__(self):
+    """Генератор 8-битных звуков: весь буфер сразу + кэш готового PCM на диске"""
+    def __init__(self, cache_dir=SOUND_CACHE_DIR):
         self.sample_rate = 44100
         if not pygame.mixer.get_init():
             pygame.mixer.init(frequency=self.sample_rate, size=-16, channels=1)
+        self.sample_rate = pygame.mixer.get_init()[0]
+        self.cache_dir = cache_dir
 
-    def make_tone(self, freq, duration, vol=0.3, wave_type="square"):
-        n_samples = int(44100 * duration)
-        buf = array.array('h', [0] * n_samples)
+    # --- КЭШ ---
+    def cache_key(self, wave_type, freqs, duration, vol):
+        raw = repr((SOUND_CACHE_VERSION, wave_type, tuple(freqs), duration, vol, self.sample_rate))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def load_pcm(self, key):
+        if not self.cache_dir: return None
+        try:
+            with open(os.path.join(self.cache_dir, key + ".pcm"), "rb") as f:
+                buf = array.array('h')
+                buf.frombytes(f.read())
+            return buf
+        except (OSError, ValueError):
+            return None
+
+    def store_pcm(self, key, buf):
+        if not self.cache_dir: return
+        path = os.path.join(self.cache_dir, key + ".pcm")
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(buf.tobytes())
+            os.replace(tmp, path)  # атомарно: битый файл в кэше не останется
+        except OSError:
+            pass
+
+    def render(self, wave_type, freqs, duration, vol):
+        key = self.cache_key(wave_type, freqs, duration, vol)
+        buf = self.load_pcm(key)
+        if buf is None:
+            if wave_type == "chord":
+                buf = self.synth_chord(freqs, duration, vol)
+            else:
+                buf = self.synth_tone(freqs[0], duration, vol, wave_type, seed=key)
+            self.store_pcm(key, buf)
+        return buf
+
+    # --- СИНТЕЗ ---
+    def synth_tone(self, freq, duration, vol, wave_type, seed=0):
+        n_samples = int(self.sample_rate * duration)
         amplitude = int(32767 * vol)
-        period = 44100 / freq
-        
-        for i in range(n_samples):
+        period = self.sample_rate / freq
+        fade = 500
+        rng = random.Random(seed)  # шум детерминирован ключом кэша
+        if np is not None:
+            i = np.arange(n_samples)
+            phase = (i % period) / period
             if wave_type == "square":
-                val = amplitude if (i % period) < (period / 2) else -amplitude
+                val = np.where(phase < 0.5, amplitude, -amplitude)
             elif wave_type == "saw":
-                val = int(amplitude * 2 * ((i % period) / period) - amplitude)
+                val = (amplitude * 2 * phase - amplitude).astype(np.int32)
             elif wave_type == "noise":
-                val = random.randint(-amplitude, amplitude)
+                val = np.random.default_rng(rng.getrandbits(64)).integers(-amplitude, amplitude + 1, n_samples)
             else:
-                val = 0
-            if i > n_samples - 500: 
-                val = int(val * ((n_samples - i) / 500))
-            buf[i] = val
-        return pygame.mixer.Sound(buffer=buf)
+                val = np.zeros(n_samples, dtype=np.int32)
+            tail = i > n_samples - fade
+            val = np.where(tail, (val * ((n_samples - i) / fade)).astype(np.int32), val)
+            return array.array('h', val.astype(np.int16).tobytes())
+
+        half = period / 2
+        if wave_type == "square":
+            vals = [amplitude if (i % period) < half else -amplitude for i in range(n_samples)]
+        elif wave_type == "saw":
+            vals = [int(amplitude * 2 * ((i % period) / period) - amplitude) for i in range(n_samples)]
+        elif wave_type == "noise":
+            rnd = rng.randint
+            vals = [rnd(-amplitude, amplitude) for _ in range(n_samples)]
+        else:
+            vals = [0] * n_samples
+        for i in range(max(0, n_samples - fade + 1), n_samples):
+            vals[i] = int(vals[i] * ((n_samples - i) / fade))
+        return array.array('h', vals)
 
-    def make_chord(self, freqs, duration, vol=0.3):
-        n_samples = int(44100 * duration)
-        buf = array.array('h', [0] * n_samples)
+    def synth_chord(self, freqs, duration, vol):
+        n_samples = int(self.sample_rate * duration)
         amplitude = int(32767 * vol / len(freqs))
-        for i in range(n_samples):
-            val = 0
+        fade = 1000
+        if np is not None:
+            t = np.arange(n_samples) / self.sample_rate
+            val = np.zeros(n_samples)
             for f in freqs:
-                val += int(amplitude * math.sin(2 * math.pi * f * (i / 44100)))
-            if i > n_samples - 1000: val = int(val * ((n_samples - i) / 1000))
-            buf[i] = val
-        return pygame.mixer.Sound(buffer=buf)
+                val += np.trunc(amplitude * np.sin(2 * np.pi * f * t))
+            i = np.arange(n_samples)
+            val = np.where(i > n_samples - fade, val * ((n_samples - i) / fade), val)
+            return array.array('h', val.astype(np.int16).tobytes())
+
+        step = [2 * math.pi * f / self.sample_rate for f in freqs]
+        sin = math.sin
+        vals = [sum(int(amplitude * sin(w * i)) for w in step) for i in range(n_samples)]
+        for i in range(max(0, n_samples - fade + 1), n_samples):
+            vals[i] = int(vals[i] * ((n_samples - i) / fade))
+        return array.array('h', vals)
+
+    def make_tone(self, freq, duration, vol=0.3, wave_type="square"):
+        return pygame.mixer.Sound(buffer=self.render(wave_type, [freq], duration, vol))
+
+    def make_chord(self, freqs, duration, vol=0.3):
+        return pygame.mixer.Sound(buffer=self.render("chord", freqs, duration, vol))
+
+# --- ОТРИСОВКА (слои) ---
+class FieldRenderer:
+    """Слоистая отрисовка: статичный фон с сеткой, слой упавших блоков
+    (перестраивается только после merge/clear) и движущаяся фигура с призраком.
+    draw() возвращает изменившиеся прямоугольники для display.update(rects)"""
+    def __init__(self, game):
+        self.game = game
+        self.tiles = tile_atlas(BLOCK_SIZE) if tile_atlas else None
+        self.mini = tile_atlas(MINI) if tile_atlas else None
+        self.static = None
+        self.stack = None
+        self.screen_valid = False
+        self.piece_rects = []
+        self.score_rect = None
+        self.hud_key = None
+
+    def invalidate_stack(self): self.stack = None
+    def invalidate_screen(self): self.screen_valid = False
+
+    def field_rect(self):
+        g = self.game
+        return pygame.Rect(g.start_x, g.start_y, g.play_width, g.play_height)
+
+    def build_static(self):
+        g = self.game
+        surf = pygame.Surface((g.sw, g.sh), 0, g.screen)
+        surf.fill(COLOR_BG)
+
+        # Рамка и фон поля
+        pygame.draw.rect(surf, COLOR_FIELD, (g.start_x, g.start_y, g.play_width, g.play_height))
+        pygame.draw.rect(surf, COLOR_GRID, (g.start_x, g.start_y, g.play_width, g.play_height), 1)
+        pygame.draw.rect(surf, COLOR_ACCENT, (g.start_x - 2, g.start_y - 2, g.play_width + 4, g.play_height + 4), 2)
+
+        # Сетка внутри
+        for i in range(GRID_HEIGHT):
+            pygame.draw.line(surf, (25, 25, 35), (g.start_x, g.start_y + i*BLOCK_SIZE), (g.start_x+g.play_width, g.start_y + i*BLOCK_SIZE))
+        for j in range(GRID_WIDTH):
+            pygame.draw.line(surf, (25, 25, 35), (g.start_x + j*BLOCK_SIZE, g.start_y), (g.start_x + j*BLOCK_SIZE, g.start_y + g.play_height))
+
+        next_text = render_text(g.font_small, "Next:", COLOR_TEXT)
+        surf.blit(next_text, (g.start_x + g.play_width + 20, g.start_y + 60))
+        hold_text = render_text(g.font_small, "Hold:", COLOR_TEXT)
+        surf.blit(hold_text, (self.hold_x(), g.start_y + 60))
+        self.static = surf
+
+    def hold_x(self):
+        return self.game.start_x - 20 - 4 * MINI
+
+    def build_stack(self):
+        # Статичные блоки поверх фона поля; поле выше экрана (меньше 480 px) обрезается при выводе
+        g = self.game
+        fr = self.field_rect()
+        surf = pygame.Surface(fr.size, 0, self.static)
+        surf.fill(COLOR_FIELD)
+        surf.blit(self.static, (0, 0), fr)
+        cells = [(val, j * BLOCK_SIZE, i * BLOCK_SIZE) for i, row in enumerate(g.grid) for j, val in enumerate(row) if val > 0]
+        if self.tiles:
+            tiles = [self.tiles.tile(c, BLOCK_STYLE, COLOR_FIELD) for c in SHAPE_COLORS]
+            surf.blits([(tiles[val], (x, y)) for val, x, y in cells], False)
+        else:
+            for val, x, y in cells: draw_block(surf, SHAPE_COLORS[val], (x, y, BLOCK_SIZE, BLOCK_SIZE))
+        self.stack = surf
+
+    def draw(self, show_piece=True):
+        g = self.game
+        screen = g.screen
+        fr = self.field_rect()
+        dirty = []
+        if self.static is None: self.build_static()
+        if not self.screen_valid:
+            if self.stack is None: self.build_stack()
+            screen.blit(self.static, (0, 0))
+            screen.blit(self.stack, fr)
+            self.hud_key = None
+            self.piece_rects = []
+            dirty.append(screen.get_rect())
+        elif self.stack is None:
+            self.build_stack()
+            screen.blit(self.stack, fr)
+            dirty.append(fr.clip(screen.get_rect()))
+            self.piece_rects = []
+        else:
+            # Стираем прошлую фигуру/призрак кусками слоя блоков
+            for r in self.piece_rects:
+                screen.blit(self.stack, r, r.move(-fr.x, -fr.y))
+            dirty.extend(self.piece_rects)
+            self.piece_rects = []
+
+        if show_piece:
+            self.piece_rects = self.draw_piece(fr.clip(screen.get_rect()))
+            dirty.extend(self.piece_rects)
+
+        dirty.extend(self.draw_hud())
+        self.screen_valid = True
+        return dirty
+
+    def draw_piece(self, visible):
+        g = self.game
+        piece = g.current_piece
+        cells = piece.cells
+        rects = []
+        ghost_offset = g.board.drop_distance(piece.bottoms, piece.x, piece.y)
+        color = SHAPE_COLORS[piece.color]
+
+        # Призрак и фигура — одним blits; клетки выше поля не рисуются
+        x0, y0 = g.start_x + piece.x * BLOCK_SIZE, g.start_y + piece.y * BLOCK_SIZE
+        gy0 = y0 + ghost_offset * BLOCK_SIZE
+        ghost_at = [(x0 + dx * BLOCK_SIZE, gy0 + dy * BLOCK_SIZE) for dx, dy in cells if gy0 + dy * BLOCK_SIZE >= g.start_y]
+        block_at = [(x0 + dx * BLOCK_SIZE, y0 + dy * BLOCK_SIZE) for dx, dy in cells if y0 + dy * BLOCK_SIZE >= g.start_y]
+        if self.tiles:
+            ghost = self.tiles.tile(COLOR_GHOST, "outline", COLOR_FIELD)
+            block = self.tiles.tile(color, BLOCK_STYLE, COLOR_FIELD)
+            g.screen.blits([(ghost, p) for p in ghost_at] + [(block, p) for p in block_at], False)
+        else:
+            for x, y in ghost_at: pygame.draw.rect(g.screen, COLOR_GHOST, (x, y, BLOCK_SIZE, BLOCK_SIZE), 1)
+            for x, y in block_at: draw_block(g.screen, color, (x, y, BLOCK_SIZE, BLOCK_SIZE))
+
+        size = len(TETROMINOS[piece.kind]) * BLOCK_SIZE  # рамка квадратная
+        x = g.start_x + piece.x * BLOCK_SIZE
+        for dy in (0, ghost_offset):
+            r = pygame.Rect(x, g.start_y + (piece.y + dy) * BLOCK_SIZE, size, size).clip(visible)
+            if r.width and r.height: rects.append(r)
+        return rects
+
+    def draw_hud(self):
+        # UI перерисовывается только при смене счёта, очереди или удержания
+        g = self.game
+        key = (g.score, g.spawns, g.hold_used)
+        if key == self.hud_key: return []
+        self.hud_key = key
+        dirty = []
+        off_x = g.start_x + g.play_width + 20
+
+        if self.score_rect: g.screen.blit(self.static, self.score_rect, self.score_rect)
+        rect = draw_text(g.screen, g.font, f"Score: {g.score}", COLOR_TEXT, topleft=(off_x, g.start_y))
+        dirty.append(rect.union(self.score_rect) if self.score_rect else rect)
+        self.score_rect = rect
+
+        off_y = g.start_y + 90
+        preview = pygame.Rect(off_x, off_y, 4 * MINI, PREVIEW * PREVIEW_SLOT)
+        g.screen.blit(self.static, preview, preview)
+        for n, kind in enumerate(g.queue):
+            self.draw_mini(kind, off_x, off_y + n * PREVIEW_SLOT, SHAPE_COLORS[kind + 1])
+        dirty.append(preview)
+
+        hold = pygame.Rect(self.hold_x(), off_y, 4 * MINI, PREVIEW_SLOT)
+        g.screen.blit(self.static, hold, hold)
+        if g.hold is not None:
+            color = COLOR_HOLD_USED if g.hold_used else SHAPE_COLORS[g.hold + 1]
+            self.draw_mini(g.hold, hold.x, hold.y, color)
+        dirty.append(hold)
+        return dirty
+
+    def draw_mini(self, kind, x, y, color):
+        # Фигура в положении появления, прижатая к верху слота
+        top = SPAWN[kind][1]
+        at = [(x + dx * MINI, y + (dy + top) * MINI) for dx, dy in PIECE_STATES[kind][0][0]]
+        if self.mini:
+            tile = self.mini.tile(color, BLOCK_STYLE, COLOR_BG)
+            self.game.screen.blits([(tile, p) for p in at], False)
+        else:
+            for px, py in at: draw_block(self.game.screen, color, (px, py, MINI, MINI))
 
 class Tetris:
-    def __init__(self, screen):
+    def __init__(self, screen, seed=None):
         self.screen = screen
         self.sw, self.sh = screen.get_size()
+
+        # Свой генератор на игру: по seed партию можно воспроизвести
+        self.seed = seed if seed is not None else random.randrange(1 << 31)
+        self.rng = random.Random(self.seed)
+        self.render_enabled = True
+        self.profiler = None  # хост может подставить ixstore.profiler.FrameProfiler
         
         # Центрируем поле
         self.play_width = GRID_WIDTH * BLOCK_SIZE
@@ -98,16 +413,30 @@ class Tetris:
         self.font_small = pygame.font.SysFont('Arial', 18)
 
         self.gen_sounds()
-
-        if pygame.joystick.get_count() == 0:
-            pygame.joystick.init()
-        self.joysticks = [pygame.joystick.Joystick(x) for x in range(pygame.joystick.get_count())]
-        
-        self.last_input_time = 0
-        self.input_delay = 150
-        self.last_move_time = 0
-
+        self.audio = AudioManager(SOUND_GROUPS) if AudioManager else None
+
+        if Controls:
+            self.controls = Controls()
+            self.controls.set_repeat("left", DAS, ARR)
+            self.controls.set_repeat("right", DAS, ARR)
+            self.controls.set_repeat("down", SOFT_DROP_ARR, SOFT_DROP_ARR)
+            self.joysticks = self.controls.joysticks
+        else:
+            self.controls = None
+            if pygame.joystick.get_count() == 0:
+                pygame.joystick.init()
+            self.joysticks = [pygame.joystick.Joystick(x) for x in range(pygame.joystick.get_count())]
+        self.hats = {}  # instance_id -> последнее значение JOYHATMOTION
+
+        self.renderer = FieldRenderer(self)
+        self.dirty_rects = []
+        # Неподвижные экраны рисуются один раз, дальше — пониженный FPS до первого ввода
+        self.overlay = pygame.Surface((self.sw, self.sh), pygame.SRCALPHA)
+        self.overlay.fill(COLOR_OVERLAY)
+        self.drawn_key = None
+        self.idle = False
         self.reset_game_vars()
+        self.best = high_scores().best("tetris") if high_scores else 0
         self.state = "SPLASH"
         self.splash_timer = 0
         self.splash_alpha = 0
@@ -128,132 +457,76 @@ class Tetris:
         except: self.sounds = {}
 
     def play_snd(self, name):
-        if name in self.sounds: self.sounds[name].play()
+        if name not in self.sounds: return
+        if self.audio: self.audio.play(self.sounds[name], *SOUND_VOICES[name])
+        else: self.sounds[name].play()
+
+    def update_audio(self):
+        # Музыка играет только в партии; в меню и на Game Over — пауза на месте
+        if not self.audio: return
+        if self.state == "PLAYING":
+            self.audio.play_music(lambda rate, channels: chiptune(TETRIS_SONG, rate, channels))
+        else:
+            self.audio.pause_music()
+        self.audio.update()
+
+    # --- ХУКИ ХОСТА ---
+    def suspend(self):
+        if self.audio: self.audio.pause()
+
+    def resume(self):
+        if self.audio: self.audio.resume()
 
     def reset_game_vars(self):
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = self.get_new_piece()
-        self.next_piece = self.get_new_piece()
+        self.board = Board()
+        self.grid = self.board.colors
+        self.renderer.invalidate_stack()
+        self.bag = Bag(self.rng)
+        self.queue = deque((self.bag.next() for _ in range(PREVIEW)), PREVIEW)
+        self.current_piece = Piece()
+        self.hold = None
+        self.hold_used = False
+        self.spawns = 0
+        self.spawn(self.next_kind())
         self.score = 0
         self.fall_time = 0
         self.fall_speed = 500
 
-    def get_new_piece(self):
-        shape = random.choice(TETROMINOS)
-        return {
-            'shape': shape,
-            'rotation': 0,
-            'x': GRID_WIDTH // 2 - len(shape[0]) // 2,
-            'y': 0,
-            'color': TETROMINOS.index(shape) + 1
-        }
-
-    def rotate_shape(self, shape):
-        return [list(row) for row in zip(*shape[::-1])]
-
-    def check_collision(self, piece, adj_x=0, adj_y=0, adj_rot=None):
-        shape = piece['shape']
-        if adj_rot: shape = adj_rot
-        for i, row in enumerate(shape):
-            for j, cell in enumerate(row):
-                if cell:
-                    new_x = piece['x'] + j + adj_x
-                    new_y = piece['y'] + i + adj_y
-                    if new_x < 0 or new_x >= GRID_WIDTH or new_y >= GRID_HEIGHT: return True
-                    if new_y >= 0 and self.grid[new_y][new_x]: return True
-        return False
+    def next_kind(self):
+        kind = self.queue.popleft()
+        self.queue.append(self.bag.next())
+        return kind
+
+    def spawn(self, kind):
+        """Текущая фигура (один объект на партию) появляется заново; False — места нет"""
+        self.current_piece.spawn(kind)
+        self.spawns += 1
+        return not self.check_collision(self.current_piece)
+
+    def check_collision(self, piece, adj_x=0, adj_y=0):
+        return self.board.collides(piece.masks, piece.x + adj_x, piece.y + adj_y)
 
     def merge_piece(self):
-        for i, row in enumerate(self.current_piece['shape']):
-            for j, cell in enumerate(row):
-                if cell:
-                    py = self.current_piece['y'] + i
-                    px = self.current_piece['x'] + j
-                    if py >= 0: self.grid[py][px] = self.current_piece['color']
+        p = self.current_piece
+        self.board.place(p.cells, p.x, p.y, p.color)
+        self.renderer.invalidate_stack()
         self.play_snd("drop")
 
     def clear_lines(self):
-        lines_cleared = 0
-        for i in range(len(self.grid) - 1, -1, -1):
-            if 0 not in self.grid[i]:
-                lines_cleared += 1
-                del self.grid[i]
-                self.grid.insert(0, [0]*GRID_WIDTH)
+        lines_cleared = self.board.clear_lines()
         if lines_cleared > 0:
+            self.renderer.invalidate_stack()
             self.score += lines_cleared * 100
             if self.fall_speed > 100: self.fall_speed -= 10 * lines_cleared
             self.play_snd("clear")
 
     def draw_game(self):
-        self.screen.fill(COLOR_BG)
-        
-        # Рамка и фон поля
-        pygame.draw.rect(self.screen, (20, 20, 25), (self.start_x, self.start_y, self.play_width, self.play_height))
-        pygame.draw.rect(self.screen, COLOR_GRID, (self.start_x, self.start_y, self.play_width, self.play_height), 1)
-        pygame.draw.rect(self.screen, COLOR_ACCENT, (self.start_x - 2, self.start_y - 2, self.play_width + 4, self.play_height + 4), 2)
-
-        # Сетка внутри
-        for i in range(GRID_HEIGHT):
-            pygame.draw.line(self.screen, (25, 25, 35), (self.start_x, self.start_y + i*BLOCK_SIZE), (self.start_x+self.play_width, self.start_y + i*BLOCK_SIZE))
-        for j in range(GRID_WIDTH):
-            pygame.draw.line(self.screen, (25, 25, 35), (self.start_x + j*BLOCK_SIZE, self.start_y), (self.start_x + j*BLOCK_SIZE, self.start_y + self.play_height))
-
-        # Статичные блоки
-        for i in range(GRID_HEIGHT):
-            for j in range(GRID_WIDTH):
-                val = self.grid[i][j]
-                if val > 0:
-                    rect = (self.start_x + j * BLOCK_SIZE, self.start_y + i * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                    pygame.draw.rect(self.screen, SHAPE_COLORS[val], rect)
-                    pygame.draw.rect(self.screen, (0,0,0), rect, 1)
-
-        if self.state == "PLAYING":
-            shape = self.current_piece['shape']
-            
-            # --- GHOST PIECE ---
-            ghost_offset = 0
-            while not self.check_collision(self.current_piece, adj_y=ghost_offset + 1):
-                ghost_offset += 1
-            
-            for i, row in enumerate(shape):
-                for j, cell in enumerate(row):
-                    if cell:
-                        gy = self.current_piece['y'] + i + ghost_offset
-                        gx = self.current_piece['x'] + j
-                        if gy >= 0:
-                            g_rect = (self.start_x + gx * BLOCK_SIZE, self.start_y + gy * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                            pygame.draw.rect(self.screen, COLOR_GHOST, g_rect, 1) 
-
-            # --- ТЕКУЩАЯ ФИГУРА ---
-            for i, row in enumerate(shape):
-                for j, cell in enumerate(row):
-                    if cell:
-                        x = self.start_x + (self.current_piece['x'] + j) * BLOCK_SIZE
-                        y = self.start_y + (self.current_piece['y'] + i) * BLOCK_SIZE
-                        if y >= self.start_y:
-                            rect = (x, y, BLOCK_SIZE, BLOCK_SIZE)
-                            pygame.draw.rect(self.screen, SHAPE_COLORS[self.current_piece['color']], rect)
-                            pygame.draw.rect(self.screen, (0,0,0), rect, 1)
-
-        # UI
-        score_text = self.font.render(f"Score: {self.score}", True, COLOR_TEXT)
-        self.screen.blit(score_text, (self.start_x + self.play_width + 20, self.start_y))
-        
-        next_text = self.font_small.render("Next:", True, COLOR_TEXT)
-        self.screen.blit(next_text, (self.start_x + self.play_width + 20, self.start_y + 60))
-        
-        off_x = self.start_x + self.play_width + 20
-        off_y = self.start_y + 90
-        for i, row in enumerate(self.next_piece['shape']):
-            for j, cell in enumerate(row):
-                if cell:
-                    rect = (off_x + j * 18, off_y + i * 18, 18, 18)
-                    pygame.draw.rect(self.screen, SHAPE_COLORS[self.next_piece['color']], rect)
-                    pygame.draw.rect(self.screen, (0,0,0), rect, 1)
+        return self.renderer.draw(show_piece=self.state == "PLAYING")
 
     def draw_menu(self):
+        self.renderer.invalidate_screen()
         self.screen.fill(COLOR_BG)
-        title = self.font_big.render("NEON TETRIS", True, COLOR_ACCENT)
+        title = render_text(self.font_big, "NEON TETRIS", COLOR_ACCENT)
         self.screen.blit(title, title.get_rect(center=(self.sw//2, self.sh//3)))
         start_y = self.sh // 2 + 20
         for i, opt in enumerate(self.menu_options):
@@ -262,11 +535,10 @@ class Tetris:
                 bg_rect = (self.sw//2 - 100, start_y + i*50 - 10, 200, 40)
                 pygame.draw.rect(self.screen, (255,255,255, 20), bg_rect, border_radius=10)
                 pygame.draw.rect(self.screen, COLOR_ACCENT, bg_rect, 1, border_radius=10)
-            txt = self.font.render(opt, True, color)
+            txt = render_text(self.font, opt, color)
             self.screen.blit(txt, txt.get_rect(center=(self.sw//2, start_y + i*50 + 10)))
 
-    def draw_splash(self):
-        self.screen.fill((0,0,0))
+    def update_splash(self):
         if self.splash_phase == "IN":
             self.splash_alpha += 5
             if self.splash_alpha >= 255: self.splash_alpha = 255; self.splash_phase = "HOLD"; self.splash_timer = pygame.time.get_ticks()
@@ -275,24 +547,26 @@ class Tetris:
         elif self.splash_phase == "OUT":
             self.splash_alpha -= 5
             if self.splash_alpha <= 0: self.state = "MENU"
-        
-        t1 = self.font.render("Made for", True, (150,150,150))
-        t2 = self.font_big.render("InteriumX", True, COLOR_ACCENT)
+
+    def draw_splash(self):
+        self.renderer.invalidate_screen()
+        self.screen.fill((0,0,0))
+        t1 = render_text(self.font, "Made for", (150,150,150))
+        t2 = render_text(self.font_big, "InteriumX", COLOR_ACCENT)
         t1.set_alpha(self.splash_alpha); t2.set_alpha(self.splash_alpha)
         self.screen.blit(t1, t1.get_rect(center=(self.sw//2, self.sh//2-20)))
         self.screen.blit(t2, t2.get_rect(center=(self.sw//2, self.sh//2+20)))
 
     def draw_game_over(self):
         self.draw_game()
-        overlay = pygame.Surface((self.sw, self.sh), pygame.SRCALPHA)
-        overlay.fill(COLOR_OVERLAY)
-        self.screen.blit(overlay, (0,0))
-        txt = self.font_big.render("GAME OVER", True, (255, 60, 60))
-        sc = self.font.render(f"Final Score: {self.score}", True, COLOR_TEXT)
+        self.renderer.invalidate_screen()
+        self.screen.blit(self.overlay, (0,0))
+        txt = render_text(self.font_big, "GAME OVER", (255, 60, 60))
         self.screen.blit(txt, txt.get_rect(center=(self.sw//2, self.sh//2-20)))
-        self.screen.blit(sc, sc.get_rect(center=(self.sw//2, self.sh//2+20)))
-        help_txt = self.font_small.render("Press Start/Enter to Menu", True, (150,150,150))
-        self.screen.blit(help_txt, help_txt.get_rect(center=(self.sw//2, self.sh//2+60)))
+        draw_text(self.screen, self.font, f"Final Score: {self.score}", COLOR_TEXT, center=(self.sw//2, self.sh//2+20))
+        draw_text(self.screen, self.font_small, f"Best: {self.best}", COLOR_ACCENT, center=(self.sw//2, self.sh//2+50))
+        help_txt = render_text(self.font_small, "Press Start/Enter to Menu", (150,150,150))
+        self.screen.blit(help_txt, help_txt.get_rect(center=(self.sw//2, self.sh//2+80)))
 
     def execute_menu(self):
         self.play_snd("move")
@@ -305,39 +579,113 @@ class Tetris:
 
     def move(self, dx):
         if not self.check_collision(self.current_piece, adj_x=dx):
-            self.current_piece['x'] += dx
+            self.current_piece.x += dx
             self.play_snd("move")
 
-    def rotate(self):
-        rotated = self.rotate_shape(self.current_piece['shape'])
-        if not self.check_collision(self.current_piece, adj_rot=rotated):
-            self.current_piece['shape'] = rotated
+    def rotate(self, turn=1):
+        if self.board.try_rotate(self.current_piece, turn):
             self.play_snd("rotate")
 
+    def hold_piece(self):
+        # Одна замена на фигуру: снова доступна после постановки
+        if self.hold_used: return
+        kind = self.current_piece.kind
+        fits = self.spawn(self.next_kind() if self.hold is None else self.hold)
+        self.hold, self.hold_used = kind, True
+        self.play_snd("rotate")
+        if not fits: self.game_over()
+
     def move_down(self, manual=False):
         if not self.check_collision(self.current_piece, adj_y=1):
-            self.current_piece['y'] += 1
+            self.current_piece.y += 1
             if manual: self.score += 1
         else:
             self.merge_piece()
             self.clear_lines()
-            self.current_piece = self.next_piece
-            self.next_piece = self.get_new_piece()
-            if self.check_collision(self.current_piece):
-                self.state = "GAMEOVER"
-                self.play_snd("gameover")
-
-    def run_frame(self):
+            self.hold_used = False
+            if not self.spawn(self.next_kind()): self.game_over()
+
+    def game_over(self):
+        self.state = "GAMEOVER"
+        self.play_snd("gameover")
+        self.submit_score()
+
+    def submit_score(self):
+        self.best = max(self.best, self.score)
+        if high_scores:
+            try: self.best = high_scores().submit("tetris", self.score)
+            except OSError: pass
+
+    # --- СНИМОК ---
+    def snapshot(self):
+        """Партия в байтах: поле, фигура, очередь, удержание, мешок, счёт, таймеры, RNG (~2.7 КБ)"""
+        head = SNAP_HEAD.pack(SNAP_MAGIC, GRID_WIDTH, GRID_HEIGHT, STATES.index(self.state),
+                              self.score, self.fall_speed, int(self.fall_time))
+        cells = bytes(c for row in self.grid for c in row)
+        queue = SNAP_QUEUE.pack(bytes(self.queue), NO_HOLD if self.hold is None else self.hold,
+                                self.hold_used, len(self.bag.left), bytes(self.bag.left))
+        return b"".join((head, cells, pack_piece(self.current_piece), queue, pack_rng(self.rng)))
+
+    def restore(self, data):
+        """Обратно из snapshot(); прерванная партия продолжается из меню (Resume)"""
+        try:
+            magic, w, h, state, score, speed, fall_time = SNAP_HEAD.unpack_from(data)
+            if magic != SNAP_MAGIC or (w, h) != (GRID_WIDTH, GRID_HEIGHT): raise ValueError("not a Tetris snapshot")
+            pos = SNAP_HEAD.size
+            cells = data[pos:pos + w * h]
+            pos += w * h
+            current = unpack_piece(data, pos)
+            pos += SNAP_PIECE.size
+            queue, hold, hold_used, left, bag = SNAP_QUEUE.unpack_from(data, pos)
+            kinds = list(queue) + list(bag[:left]) + ([] if hold == NO_HOLD else [hold])
+            if left > 7 or max(kinds) >= len(TETROMINOS): raise ValueError("bad queue in Tetris snapshot")
+            unpack_rng(self.rng, data[pos + SNAP_QUEUE.size:])
+        except struct.error as e:
+            raise ValueError(f"truncated Tetris snapshot: {e}")
+        self.board.load_colors([list(cells[y * w:(y + 1) * w]) for y in range(h)])
+        self.current_piece = current
+        self.queue = deque(queue, PREVIEW)
+        self.hold = None if hold == NO_HOLD else hold
+        self.hold_used = bool(hold_used)
+        self.bag.left = list(bag[:left])
+        self.spawns += 1
+        self.score, self.fall_speed, self.fall_time = score, speed, fall_time
+        self.state = "GAMEOVER" if STATES[state] == "GAMEOVER" else "MENU"
+        self.renderer.invalidate_stack()
+        self.renderer.invalidate_screen()
+        self.drawn_key = None
+
+    def run_frame(self, with_rects=False):
         """
         Запускает один кадр логики игры.
         Возвращает: 'RUNNING', 'EXIT', или 'HOME'
+        С with_rects=True — кортеж (статус, dirty rects) для display.update(rects)
         """
-        dt = self.clock.tick(60)
+        status = self.step_frame()
+        if status != "RUNNING": self.renderer.invalidate_screen(); self.drawn_key = None
+        if with_rects: return status, self.dirty_rects
+        return status
+
+    def static_frame_key(self):
+        # Ключ неподвижного кадра: пока он тот же, экран перерисовывать незачем
+        if self.state == "MENU": return ("MENU", self.menu_index)
+        if self.state == "GAMEOVER": return ("GAMEOVER", self.score)
+        return None
+
+    def step_frame(self):
+        dt = self.clock.tick(IDLE_FPS if self.idle else 60)
         current_time = pygame.time.get_ticks()
+        prof = self.profiler
+        if prof: prof.mark("input")
         
         # --- INPUT ---
-        for event in pygame.event.get():
+        events = self.controls.poll() if self.controls else pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT: return "EXIT"
+            if event.type == pygame.JOYHATMOTION:
+                # Прошлое значение крестовины: Controls шлёт обе оси при смене любой из них
+                hat_was = self.hats.get(event.instance_id, (0, 0))
+                self.hats[event.instance_id] = tuple(event.value)
             
             # HOME BUTTON LOGIC (Button 6 is typically Select/Back/-)
             if event.type == pygame.JOYBUTTONDOWN:
@@ -356,6 +704,7 @@ class Tetris:
                 if event.type == pygame.JOYBUTTONDOWN:
                     if event.button == 0: # A Button
                          if self.execute_menu() == "EXIT": return "EXIT"
+                    if event.button == 1: return "EXIT" # B — назад из меню
                 if event.type == pygame.JOYHATMOTION:
                     if event.value[1] != 0: self.menu_index = 0 if event.value[1] == 1 else 1; self.play_snd("move")
             
@@ -363,12 +712,20 @@ class Tetris:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_LEFT: self.move(-1)
                     if event.key == pygame.K_RIGHT: self.move(1)
-                    if event.key == pygame.K_UP: self.rotate()
+                    if event.key in (pygame.K_UP, pygame.K_x): self.rotate()
+                    if event.key == pygame.K_z: self.rotate(-1)
+                    if event.key in (pygame.K_c, pygame.K_LSHIFT): self.hold_piece()
                     if event.key == pygame.K_DOWN: self.move_down(manual=True)
                     if event.key == pygame.K_ESCAPE: self.state = "MENU"
                 if event.type == pygame.JOYBUTTONDOWN:
                     if event.button == 0: self.rotate() # A
+                    if event.button == 1: self.rotate(-1) # B
+                    if event.button == 4: self.hold_piece() # LB
                     if event.button == 7: self.state = "MENU" # Start
+                if event.type == pygame.JOYHATMOTION: # крестовина и стик
+                    # Сдвиг только на новое нажатие по оси; удержание дальше повторяет DAS/ARR
+                    if event.value[0] and event.value[0] != hat_was[0]: self.move(event.value[0])
+                    if event.value[1] == -1 and hat_was[1] != -1: self.move_down(manual=True)
             
             elif self.state == "GAMEOVER":
                 if event.type == pygame.KEYDOWN:
@@ -376,26 +733,41 @@ class Tetris:
                 if event.type == pygame.JOYBUTTONDOWN:
                     if event.button == 7 or event.button == 0: self.reset_game_vars(); self.state = "MENU"
 
-        if self.state == "PLAYING" and self.joysticks:
-            if current_time - self.last_move_time > self.input_delay:
-                js = self.joysticks[0]
-                ax, ay = js.get_axis(0), js.get_axis(1)
-                hx = js.get_hat(0)[0]
-                if ax < -0.5 or hx == -1: self.move(-1); self.last_move_time = current_time
-                if ax > 0.5 or hx == 1: self.move(1); self.last_move_time = current_time
-                if ay > 0.5: self.move_down(manual=True)
+        # Автоповтор удержания считается по времени: длинный кадр даёт столько же сдвигов
+        repeats = self.controls.repeats(current_time) if self.controls else []
+        if self.state == "PLAYING":
+            for name in repeats:
+                if name == "left": self.move(-1)
+                elif name == "right": self.move(1)
+                elif name == "down": self.move_down(manual=True)
 
         # --- UPDATE ---
+        if prof: prof.mark("update")
+        if self.state == "SPLASH": self.update_splash()
         if self.state == "PLAYING":
             self.fall_time += dt
             if self.fall_time > self.fall_speed:
                 self.fall_time = 0
                 self.move_down()
+        self.update_audio()
         
         # --- DRAW ---
+        if prof: prof.mark("draw")
+        key = self.static_frame_key()
+        self.idle = key is not None and key == self.drawn_key
+        if not self.render_enabled:
+            self.renderer.invalidate_screen()
+            self.drawn_key = None
+            self.dirty_rects = []
+            return "RUNNING"
+        if self.idle:
+            self.dirty_rects = []  # на экране уже этот кадр
+            return "RUNNING"
+        self.drawn_key = key
+        self.dirty_rects = [self.screen.get_rect()]
         if self.state == "SPLASH": self.draw_splash()
         elif self.state == "MENU": self.draw_menu()
-        elif self.state == "PLAYING": self.draw_game()
+        elif self.state == "PLAYING": self.dirty_rects = self.draw_game()
         elif self.state == "GAMEOVER": self.draw_game_over()
         
         return "RUNNING"
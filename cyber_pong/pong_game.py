@@ -1,104 +1,347 @@
 import pygame
 import math
-import struct
-import wave
-import io
+import array
 import random
+import threading
+import queue
+import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Из ixstore: кэш текста, ввод с горячим подключением, снимки, группы каналов звука.
+# Pong без ixstore: font.render, сырые события, Sound.play() на любом свободном канале
+try:
+    from ixstore.textcache import render_text, draw_text
+    from ixstore.controls import Controls
+    from ixstore.saves import pack_rng, unpack_rng
+    from ixstore.audio import AudioManager
+except ImportError:
+    Controls = AudioManager = None
+    def render_text(font, text, color, antialias=True):
+        return font.render(text, antialias, color)
+    def draw_text(dest, font, text, color, antialias=True, **anchor):
+        surf = font.render(text, antialias, color)
+        return dest.blit(surf, surf.get_rect(**anchor))
 
 # --- ГЕНЕРАЦИЯ ЗВУКОВ (Static Helpers) ---
-def create_sound_data(freq, duration, volume=0.3, fade=True):
-    buffer = io.BytesIO()
-    sample_rate = 44100
+# Сразу сырые int16-буферы под формат микшера, без wave/BytesIO
+def to_mixer_format(samples, channels=1):
+    buf = array.array('h', samples)
+    if channels == 1: return buf
+    out = array.array('h', bytes(len(buf) * 2 * channels))
+    for c in range(channels): out[c::channels] = buf
+    return out
+
+def create_sound_data(freq, duration, volume=0.3, fade=True, sample_rate=44100, channels=1):
     n_samples = int(sample_rate * duration)
     amplitude = 32767 * volume
-    
-    with wave.open(buffer, 'wb') as wav:
-        wav.setnchannels(1)
-        wav.setsampwidth(2)
-        wav.setframerate(sample_rate)
-        
-        data = bytearray()
-        for i in range(n_samples):
-            t = float(i) / sample_rate
-            val = int(amplitude * math.sin(2 * math.pi * freq * t))
-            if fade:
-                if i < 500: val = int(val * (i/500))
-                if i > n_samples - 500: val = int(val * ((n_samples-i)/500))
-            data.extend(struct.pack('<h', max(-32767, min(32767, val))))
-        wav.writeframes(data)
-    buffer.seek(0)
-    return buffer
-
-def create_chord_data(freqs, duration, volume=0.3):
-    buffer = io.BytesIO()
-    sample_rate = 44100
+    if np is not None:
+        i = np.arange(n_samples)
+        val = np.trunc(amplitude * np.sin(2 * np.pi * freq * (i / sample_rate)))
+        if fade:
+            val = np.where(i < 500, np.trunc(val * (i / 500)), val)
+            val = np.where(i > n_samples - 500, np.trunc(val * ((n_samples - i) / 500)), val)
+        val = np.clip(val, -32767, 32767).astype(np.int16)
+        if channels > 1: val = np.repeat(val, channels)
+        return val.tobytes()
+
+    w = 2 * math.pi * freq / sample_rate
+    sin = math.sin
+    vals = [int(amplitude * sin(w * i)) for i in range(n_samples)]
+    if fade:
+        for i in range(min(500, n_samples)): vals[i] = int(vals[i] * (i / 500))
+        for i in range(max(0, n_samples - 499), n_samples): vals[i] = int(vals[i] * ((n_samples - i) / 500))
+    vals = [max(-32767, min(32767, v)) for v in vals]
+    return to_mixer_format(vals, channels).tobytes()
+
+def create_chord_data(freqs, duration, volume=0.3, sample_rate=44100, channels=1):
     n_samples = int(sample_rate * duration)
-    amplitude = 32767 * volume / len(freqs) 
-    
-    with wave.open(buffer, 'wb') as wav:
-        wav.setnchannels(1)
-        wav.setsampwidth(2)
-        wav.setframerate(sample_rate)
-        
-        data = bytearray()
-        for i in range(n_samples):
-            t = float(i) / sample_rate
-            val = 0.0
-            for f in freqs:
-                val += amplitude * math.sin(2 * math.pi * f * t)
-            
-            fade_in_len = int(sample_rate * 0.5)
-            fade_out_len = int(sample_rate * 1.0)
-            
-            env = 1.0
-            if i < fade_in_len: env = i / fade_in_len
-            elif i > n_samples - fade_out_len: env = (n_samples - i) / fade_out_len
-            
-            final_val = int(val * env)
-            data.extend(struct.pack('<h', max(-32767, min(32767, final_val))))
-        wav.writeframes(data)
-    buffer.seek(0)
-    return buffer
+    amplitude = 32767 * volume / len(freqs)
+    fade_in_len = int(sample_rate * 0.5)
+    fade_out_len = int(sample_rate * 1.0)
+    if np is not None:
+        i = np.arange(n_samples)
+        t = i / sample_rate
+        val = np.zeros(n_samples)
+        for f in freqs:
+            val += amplitude * np.sin(2 * np.pi * f * t)
+        env = np.ones(n_samples)
+        env = np.where(i > n_samples - fade_out_len, (n_samples - i) / fade_out_len, env)
+        env = np.where(i < fade_in_len, i / fade_in_len, env)
+        val = np.clip(np.trunc(val * env), -32767, 32767).astype(np.int16)
+        if channels > 1: val = np.repeat(val, channels)
+        return val.tobytes()
+
+    ws = [2 * math.pi * f / sample_rate for f in freqs]
+    sin = math.sin
+    vals = []
+    for i in range(n_samples):
+        env = 1.0
+        if i < fade_in_len: env = i / fade_in_len
+        elif i > n_samples - fade_out_len: env = (n_samples - i) / fade_out_len
+        v = int(sum(amplitude * sin(w * i) for w in ws) * env)
+        vals.append(max(-32767, min(32767, v)))
+    return to_mixer_format(vals, channels).tobytes()
+
+# Порядок важен: интро рендерится первым, чтобы заиграть как можно раньше
+SOUND_SPECS = [
+    ("snd_intro", create_chord_data, ([261.63, 329.63, 392.00, 493.88], 3.0, 0.4)),
+    ("snd_paddle", create_sound_data, (440, 0.08, 0.4)),
+    ("snd_wall", create_sound_data, (220, 0.08, 0.4)),
+    ("snd_score", create_sound_data, (880, 0.4, 0.3)),
+]
+
+def render_sounds(specs, sample_rate, channels, out):
+    """Фоновый рендер: кладёт (имя, PCM, мс) в очередь по мере готовности"""
+    for name, func, args in specs:
+        t0 = time.perf_counter()
+        try:
+            data = func(*args, sample_rate=sample_rate, channels=channels)
+        except Exception as e:
+            print(f"Audio error: {e}")
+            data = None
+        out.put((name, data, (time.perf_counter() - t0) * 1000))
+
+# --- СНИМОК СОСТОЯНИЯ ---
+SNAP_MAGIC = b"IXP1"
+SNAP_HEAD = struct.Struct("<4sHHB7dii")  # magic, размер поля, сложность, мяч/скорости/ракетки, счёт
+
+# --- СИМУЛЯЦИЯ ---
+# Фиксированный шаг + аккумулятор: скорость игры не зависит от частоты кадров.
+# Скорости заданы как раньше — в пикселях за кадр при 60 FPS.
+SIM_HZ = 120
+SIM_STEP = 1.0 / SIM_HZ
+BASE_HZ = 60
+MAX_FRAME_TIME = 0.25  # при провале кадра догоняем не больше 250 мс
+IDLE_FPS = 20  # неподвижная пауза перед подачей
+PADDLE_SPEED = 7
+
+# AI: скорость ракетки (px/кадр), задержка реакции (с) и ошибка прицела (px)
+# поверх точного прогноза точки перехвата
+AI_PROFILES = [
+    (4, 0.45, 50),  # EASY
+    (5, 0.25, 22),  # MEDIUM
+    (6, 0.10, 8),   # HARD
+]
+
+def predict_intercept(x, y, vx, vy, face_x, court_h, size):
+    """
+    Верхний y мяча в момент, когда он дойдёт до плоскости ракетки face_x,
+    с аналитическим учётом отражений от стен. None, если мяч летит от неё.
+    """
+    if vx > 0: dist = face_x - size - x
+    elif vx < 0: dist = x - face_x
+    else: return None
+    if dist < 0: return None
+    span = court_h - size
+    m = (y + vy * dist / abs(vx)) % (2 * span)
+    return m if m <= span else 2 * span - m
+
+# --- СТОЛКНОВЕНИЯ (swept AABB) ---
+MAX_SUBSTEPS = 64  # подшаги: мяч за подшаг сдвигается не больше чем на полразмера
+MAX_BOUNCES = 16   # событий (стена/ракетка) за один подшаг
+
+def sweep_aabb(x, y, w, h, dx, dy, rx, ry, rw, rh):
+    """Доля пути (0..1) до первого касания движущегося прямоугольника с неподвижным, иначе None"""
+    if dx > 0: tx0, tx1 = (rx - x - w) / dx, (rx + rw - x) / dx
+    elif dx < 0: tx0, tx1 = (rx + rw - x) / dx, (rx - x - w) / dx
+    elif x + w <= rx or x >= rx + rw: return None
+    else: tx0, tx1 = -math.inf, math.inf
+    if dy > 0: ty0, ty1 = (ry - y - h) / dy, (ry + rh - y) / dy
+    elif dy < 0: ty0, ty1 = (ry + rh - y) / dy, (ry - y - h) / dy
+    elif y + h <= ry or y >= ry + rh: return None
+    else: ty0, ty1 = -math.inf, math.inf
+    t0, t1 = max(tx0, ty0), min(tx1, ty1)
+    if t0 >= t1 or t1 <= 0 or t0 > 1: return None
+    return max(t0, 0.0)
+
+def advance_ball(x, y, vx, vy, mult, k, court_w, court_h, size, paddles):
+    """
+    Непрерывное движение мяча за k кадров (60 Гц) с отскоками от стен и ракеток.
+    paddles — [(x, y, w, h, side)], side=-1 для левой ракетки, 1 для правой.
+    Возвращает (x, y, vx, vy, mult, events), events — список "wall"/"paddle".
+    """
+    events = []
+    dist = max(abs(vx), abs(vy)) * mult * k
+    n = min(MAX_SUBSTEPS, max(1, math.ceil(dist / (size / 2))))
+    sk = k / n
+    bottom = court_h - size
+    for _ in range(n):
+        remaining = 1.0
+        for _ in range(MAX_BOUNCES):
+            dx, dy = vx * mult * sk * remaining, vy * mult * sk * remaining
+            t, hit = None, None
+            if dy < 0: tw = max(0.0, -y / dy)
+            elif dy > 0: tw = max(0.0, (bottom - y) / dy)
+            else: tw = None
+            if tw is not None and tw <= 1: t, hit = tw, "wall"
+            for rx, ry, rw, rh, side in paddles:
+                if vx * side <= 0: continue  # летит от ракетки
+                tp = sweep_aabb(x, y, size, size, dx, dy, rx, ry, rw, rh)
+                if tp is not None and (t is None or tp < t): t, hit = tp, "paddle"
+            if hit is None:
+                x += dx; y += dy
+                break
+            x += dx * t; y += dy * t
+            remaining *= 1 - t
+            if hit == "wall": vy = -vy
+            else: vx = -vx; mult += 0.05
+            events.append(hit)
+        y = max(0.0, min(bottom, y))
+        if x <= 0 or x + size >= court_w: break  # гол
+    return x, y, vx, vy, mult, events
+
+def stress_test(rallies=1000000, seed=1, w=800, h=480, max_mult=500.0):
+    """
+    Headless-проверка на туннелирование: случайные подачи в ракетку на скоростях
+    до 5*max_mult px/кадр. Ожидаемый исход считается аналитически (развёртка
+    отражений от стен); случаи с отражением внутри ракетки и касанием ребром пропускаются.
+    Возвращает (проверено, пропущено, ошибок).
+    """
+    rng = random.Random(seed)
+    size, pw, ph = 20, 15, 80
+    span = h - size
+    checked = skipped = failures = 0
+    for _ in range(rallies):
+        side = rng.choice((-1, 1))
+        px = 30 if side < 0 else w - 30 - pw
+        py = rng.uniform(0, h - ph)
+        mult = math.exp(rng.uniform(0, math.log(max_mult)))
+        vx, vy = 5 * side, rng.choice((-5, 5)) * rng.uniform(0.2, 1.0)
+        gap = rng.uniform(0, 300)
+        x0 = px - size - gap if side > 0 else px + pw + gap
+        y0 = rng.uniform(0, span)
+
+        # Аналитика: окно по x, когда мяч перекрывает ракетку, и y на его краях
+        sx = vx * mult
+        ta = gap / abs(sx)
+        tb = (gap + pw + size) / abs(sx)
+        ya, yb = y0 + vy * mult * ta, y0 + vy * mult * tb
+        if math.floor(ya / span) != math.floor(yb / span):
+            skipped += 1
+            continue
+        def fold(Y):
+            m = Y % (2 * span)
+            return m if m <= span else 2 * span - m
+        lo, hi = sorted((fold(ya), fold(yb)))
+        if min(abs(hi - (py - size)), abs(lo - (py + ph))) < 1e-6:
+            skipped += 1
+            continue
+        expect_hit = hi > py - size and lo < py + ph
+
+        x, y, bvx, bvy, m = x0, y0, vx, vy, mult
+        hit = False
+        for _ in range(100000):
+            x, y, bvx, bvy, m, events = advance_ball(x, y, bvx, bvy, m, 1.0, w, h, size, [(px, py, pw, ph, side)])
+            if "paddle" in events: hit = True; break
+            if x <= 0 or x + size >= w: break
+        checked += 1
+        if hit != expect_hit: failures += 1
+    return checked, skipped, failures
 
 class PongGame:
-    def __init__(self, screen):
+    def __init__(self, screen, seed=None):
+        self.t_start = time.perf_counter()
+        self.startup_times = {}
         self.screen = screen
         self.w, self.h = screen.get_size()
+        self.seed = seed if seed is not None else random.randrange(1 << 31)
+        self.rng = random.Random(self.seed)  # ошибки AI воспроизводимы по seed
+        self.render_enabled = True
+        self.profiler = None  # хост может подставить ixstore.profiler.FrameProfiler
         self.clock = pygame.time.Clock()
+        self.fps = 60  # хост может поднять до 120/144
+        self.accumulator = 0.0
+        self.idle = False  # пауза без изменений: ни симуляции, ни отрисовки до ввода
+        self.drawn_key = None
         
         # Аудио
         if not pygame.mixer.get_init():
             pygame.mixer.init()
         self.init_audio()
+        # Аккорд интро не обрывается отскоками, серия отскоков не занимает больше двух каналов
+        self.audio = AudioManager({"intro": 1, "hits": 2, "sfx": 1}) if AudioManager else None
         
         # Джойстики (обновляем список)
-        if not pygame.joystick.get_init():
-            pygame.joystick.init()
-        self.joysticks = [pygame.joystick.Joystick(x) for x in range(pygame.joystick.get_count())]
+        self.controls = Controls() if Controls else None
+        if self.controls:
+            self.joysticks = self.controls.joysticks
+        else:
+            if not pygame.joystick.get_init():
+                pygame.joystick.init()
+            self.joysticks = [pygame.joystick.Joystick(x) for x in range(pygame.joystick.get_count())]
+        self.stick_y = 0.0  # ось ракетки — из событий, а не опросом get_axis
 
         # Шрифты
         self.font = pygame.font.SysFont("Arial", 40, bold=True)
         self.font_small = pygame.font.SysFont("Arial", 20)
         self.intro_font = pygame.font.SysFont("Arial", 50, bold=True)
+        self.pause_overlay = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
+        self.pause_overlay.fill((0,0,0,100))
 
         # Состояние игры
         self.game_state = "INTRO" # INTRO, PLAYING
         self.setup_intro()
         self.setup_game()
+        self.startup_times["init"] = (time.perf_counter() - self.t_start) * 1000
 
     def init_audio(self):
+        self.snd_paddle = self.snd_wall = self.snd_score = self.snd_intro = None
+        self.intro_played = False
+        self.startup_reported = False
+        self.audio_queue = queue.Queue()
+        self.audio_pending = len(SOUND_SPECS)
+        self.audio_ms = {}
         try:
-            self.snd_paddle = pygame.mixer.Sound(create_sound_data(440, 0.08, 0.4))
-            self.snd_wall = pygame.mixer.Sound(create_sound_data(220, 0.08, 0.4))
-            self.snd_score = pygame.mixer.Sound(create_sound_data(880, 0.4, 0.3))
-            chord_freqs = [261.63, 329.63, 392.00, 493.88] 
-            self.snd_intro = pygame.mixer.Sound(create_chord_data(chord_freqs, 3.0, 0.4))
+            freq, _, channels = pygame.mixer.get_init()
         except Exception as e:
             print(f"Audio error: {e}")
-            self.snd_paddle = self.snd_wall = self.snd_score = self.snd_intro = None
+            self.audio_pending = 0
+            self.startup_times["audio_ready"] = 0
+            return
+        self.audio_thread = threading.Thread(target=render_sounds, args=(SOUND_SPECS, freq, channels, self.audio_queue), daemon=True)
+        self.audio_thread.start()
+
+    def poll_audio(self):
+        # Забираем готовые буферы из фонового потока (Sound создаём в главном)
+        while self.audio_pending:
+            try: name, data, ms = self.audio_queue.get_nowait()
+            except queue.Empty: break
+            self.audio_pending -= 1
+            self.audio_ms[name] = ms
+            if data is not None:
+                try: setattr(self, name, pygame.mixer.Sound(buffer=data))
+                except Exception as e: print(f"Audio error: {e}")
+            if not self.audio_pending:
+                self.startup_times["audio_ready"] = (time.perf_counter() - self.t_start) * 1000
+        # Интро-аккорд стартует, как только готов буфер
+        if self.snd_intro and not self.intro_played and self.game_state == "INTRO" and self.intro_phase < 2:
+            self.intro_played = True
+            self.play_snd(self.snd_intro, "intro", 2)
+
+    def play_snd(self, sound, group, priority=0, limit=0):
+        if sound is None: return
+        if self.audio: self.audio.play(sound, group, priority, limit)
+        else: sound.play()
+
+    # --- ХУКИ ХОСТА ---
+    def suspend(self):
+        if self.audio: self.audio.pause()
+
+    def resume(self):
+        if self.audio: self.audio.resume()
+
+    def report_startup(self):
+        t = self.startup_times
+        renders = ", ".join(f"{k[4:]} {v:.0f}" for k, v in self.audio_ms.items())
+        print(f"[pong] startup: init {t.get('init', 0):.0f} ms, first frame {t.get('first_frame', 0):.0f} ms, "
+              f"audio ready {t.get('audio_ready', 0):.0f} ms ({renders})")
 
     def setup_intro(self):
-        if self.snd_intro: self.snd_intro.play()
         self.intro_text = self.intro_font.render("for InteriumX", True, (255, 255, 255))
         self.intro_rect = self.intro_text.get_rect(center=(self.w//2, self.h//2))
         self.intro_alpha = 0
@@ -125,16 +368,36 @@ class PongGame:
         
         self.paused = True # Это "внутриигровая" пауза (перед подачей)
 
+        # Позиции в float (левый верхний угол), Rect — округлённая копия
+        self.ball_x, self.ball_y = float(self.ball.x), float(self.ball.y)
+        self.p1_y, self.p2_y = float(self.p1.y), float(self.p2.y)
+        self.prev_pos = self.sim_pos()
+        self.ai_target = None
+        self.ai_delay = 0.0
+
+    def sim_pos(self):
+        return (self.ball_x, self.ball_y, self.p1_y, self.p2_y)
+
+    def sync_rects(self):
+        self.ball.x, self.ball.y = round(self.ball_x), round(self.ball_y)
+        self.p1.y, self.p2.y = round(self.p1_y), round(self.p2_y)
+
     def run_frame(self):
         # 1. ОБРАБОТКА ВВОДА
-        self.clock.tick(60)  # Ограничиваем игру до 60 кадров в секунду
-        for event in pygame.event.get():
+        frame_ms = self.clock.tick(IDLE_FPS if self.idle else self.fps)  # Ограничиваем частоту кадров (по умолчанию 60)
+        prof = self.profiler
+        if prof: prof.mark("input")
+        had_input = False
+        for event in (self.controls.poll() if self.controls else pygame.event.get()):
+            had_input = True
             if event.type == pygame.QUIT: return "EXIT"
+            if event.type == pygame.JOYAXISMOTION and event.axis == 1: self.stick_y = event.value
+            if event.type == pygame.JOYDEVICEREMOVED: self.stick_y = 0.0
             
             # --- HOME / EXIT LOGIC ---
             if event.type == pygame.JOYBUTTONDOWN:
-                if event.button == 6: return "HOME" # Select/-
-                if event.button == 1: return "EXIT" # B/Circle (Exit game)
+                if event.button == 6: self.drawn_key = None; return "HOME" # Select/-
+                if event.button == 1 and self.paused and self.game_state == "PLAYING": return "EXIT" # B/Circle — выход с экрана паузы, как в других играх
 
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE: return "EXIT"
             
@@ -151,36 +414,113 @@ class PongGame:
                         if event.key == pygame.K_1: self.difficulty = 0
                         if event.key == pygame.K_2: self.difficulty = 1
                         if event.key == pygame.K_3: self.difficulty = 2
+                        self.ai_target = None
                 
                 if event.type == pygame.JOYBUTTONDOWN:
                     if event.button == 7: self.paused = not self.paused # Start
                     if self.paused:
                         if event.button == 4: self.difficulty = (self.difficulty - 1) % 3 # LB
                         if event.button == 5: self.difficulty = (self.difficulty + 1) % 3 # RB
+                        self.ai_target = None
                 
                 if event.type == pygame.JOYHATMOTION and self.paused:
                     if event.value[0] == -1: self.difficulty = (self.difficulty - 1) % 3
                     elif event.value[0] == 1: self.difficulty = (self.difficulty + 1) % 3
+                    self.ai_target = None
 
-        # 2. ЛОГИКА
-        if self.game_state == "INTRO":
-            self.update_intro()
+        # 2. ЛОГИКА (фиксированными шагами)
+        if prof: prof.mark("update")
+        self.poll_audio()
+        self.accumulator += min(frame_ms / 1000.0, MAX_FRAME_TIME)
+        if self.idle and not had_input:
+            # пауза, ничего не нажато и не зажато — шаги ничего не изменят; время не теряется
+            self.accumulator = min(self.accumulator, MAX_FRAME_TIME)
+        else:
+            while self.accumulator >= SIM_STEP:
+                self.accumulator -= SIM_STEP
+                self.step()
+
+        # 3. ОТРИСОВКА (интерполяция между двумя последними шагами)
+        if prof: prof.mark("draw")
+        key = self.static_frame_key()
+        self.idle = key is not None and key == self.drawn_key
+        if not self.render_enabled:
+            self.drawn_key = None
+        elif self.idle:
+            pass  # на экране уже этот кадр
+        elif self.game_state == "INTRO":
             self.draw_intro()
         elif self.game_state == "PLAYING":
-            self.update_game()
-            self.draw_game()
+            self.draw_game(self.accumulator / SIM_STEP)
+            self.drawn_key = key
 
+        if "first_frame" not in self.startup_times:
+            self.startup_times["first_frame"] = (time.perf_counter() - self.t_start) * 1000
+        if not self.startup_reported and "audio_ready" in self.startup_times:
+            self.startup_reported = True
+            self.report_startup()
         return "RUNNING"
 
-    def update_intro(self):
+    # --- СНИМОК ---
+    def snapshot(self):
+        """Мяч, скорости, ракетки, счёт, сложность и RNG ошибок AI — около 2.6 КБ"""
+        head = SNAP_HEAD.pack(SNAP_MAGIC, self.w, self.h, self.difficulty,
+                              self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y, self.speed_mult,
+                              self.p1_y, self.p2_y, self.p1_score, self.p2_score)
+        return head + pack_rng(self.rng)
+
+    def restore(self, data):
+        """Обратно из snapshot(); игра продолжается с паузы перед подачей"""
+        try:
+            (magic, w, h, difficulty, bx, by, vx, vy, mult, p1y, p2y, s1, s2) = SNAP_HEAD.unpack_from(data)
+            if magic != SNAP_MAGIC or (w, h) != (self.w, self.h): raise ValueError("not a Pong snapshot for this screen")
+            unpack_rng(self.rng, data[SNAP_HEAD.size:])
+        except struct.error as e:
+            raise ValueError(f"truncated Pong snapshot: {e}")
+        self.difficulty = difficulty
+        self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y, self.speed_mult = bx, by, vx, vy, mult
+        self.p1_y, self.p2_y = p1y, p2y
+        self.p1_score, self.p2_score = s1, s2
+        self.sync_rects()
+        self.prev_pos = self.sim_pos()
+        self.ai_target = None
+        self.game_state = "PLAYING"
+        self.paused = True
+        self.drawn_key = None
+
+    def static_frame_key(self):
+        # Пауза перед подачей неподвижна, пока не сдвинулась ракетка игрока или настройки.
+        # Зажатые W/S или стик — не покой: кадр без шага (fps выше SIM_HZ) ракетку ещё не сдвинул
+        if self.game_state != "PLAYING" or not self.paused or self.paddle_held(): return None
+        return (self.prev_pos, self.sim_pos(), self.p1_score, self.p2_score, self.difficulty)
+
+    def paddle_held(self):
+        keys = pygame.key.get_pressed()
+        return keys[pygame.K_w] or keys[pygame.K_s] or abs(self.stick_y) > 0.2
+
+    def step(self, dt=SIM_STEP):
+        if self.game_state == "INTRO":
+            self.update_intro(dt)
+        elif self.game_state == "PLAYING":
+            self.prev_pos = self.sim_pos()
+            self.update_game(dt)
+
+    def fast_forward(self, seconds):
+        """Headless: гоняет симуляцию без отрисовки и ожидания, возвращает число шагов"""
+        steps = int(seconds * SIM_HZ)
+        for _ in range(steps): self.step()
+        return steps
+
+    def update_intro(self, dt=SIM_STEP):
+        k = dt * BASE_HZ
         if self.intro_phase == 0:
-            self.intro_alpha += 3
+            self.intro_alpha += 3 * k
             if self.intro_alpha >= 255: self.intro_alpha = 255; self.intro_phase = 1
         elif self.intro_phase == 1:
-            self.intro_timer -= 1
+            self.intro_timer -= k
             if self.intro_timer <= 0: self.intro_phase = 2
         elif self.intro_phase == 2:
-            self.intro_alpha -= 3
+            self.intro_alpha -= 3 * k
             if self.intro_alpha <= 0: 
                 self.intro_alpha = 0
                 self.game_state = "PLAYING"
@@ -188,87 +528,114 @@ class PongGame:
     def draw_intro(self):
         self.screen.fill((0,0,0))
         temp_surf = self.intro_text.copy()
-        temp_surf.set_alpha(self.intro_alpha)
+        temp_surf.set_alpha(int(self.intro_alpha))
         self.screen.blit(temp_surf, self.intro_rect)
 
-    def update_game(self):
+    def update_game(self, dt=SIM_STEP):
+        k = dt * BASE_HZ
+
         # Paddle 1 (Player)
         keys = pygame.key.get_pressed()
-        if keys[pygame.K_w]: self.p1.y -= 7
-        if keys[pygame.K_s]: self.p1.y += 7
+        if keys[pygame.K_w]: self.p1_y -= PADDLE_SPEED * k
+        if keys[pygame.K_s]: self.p1_y += PADDLE_SPEED * k
         
-        if self.joysticks:
-            try:
-                axis = self.joysticks[0].get_axis(1)
-                if abs(axis) > 0.2: self.p1.y += int(axis * 7)
-            except: pass
-
-        # Paddle 2 (AI)
-        if self.ball.centerx > self.w//2 and not self.paused:
-            ai_speed = [3, 5, 9][self.difficulty]
-            target_y = self.ball.centery
-            # Ошибки AI на легком
-            if self.difficulty == 0: 
-                if self.ball.centery < self.p2.centery + 20: target_y = self.p2.centery - 10
-            
-            if self.p2.centery < target_y: self.p2.y += ai_speed
-            elif self.p2.centery > target_y: self.p2.y -= ai_speed
+        if abs(self.stick_y) > 0.2: self.p1_y += self.stick_y * PADDLE_SPEED * k
+
+        # Paddle 2 (AI): едет к заранее посчитанной точке перехвата
+        if not self.paused:
+            if self.ai_target is None: self.plan_ai()
+            if self.ai_delay > 0:
+                self.ai_delay -= dt
+            else:
+                ai_step = AI_PROFILES[self.difficulty][0] * k
+                p2_cy = self.p2_y + self.paddle_h / 2
+                if p2_cy < self.ai_target: self.p2_y += min(ai_step, self.ai_target - p2_cy)
+                elif p2_cy > self.ai_target: self.p2_y -= min(ai_step, p2_cy - self.ai_target)
 
         # Clamping
-        self.p1.y = max(0, min(self.h - self.paddle_h, self.p1.y))
-        self.p2.y = max(0, min(self.h - self.paddle_h, self.p2.y))
+        self.p1_y = max(0, min(self.h - self.paddle_h, self.p1_y))
+        self.p2_y = max(0, min(self.h - self.paddle_h, self.p2_y))
 
         # Ball
         if not self.paused:
-            self.ball.x += self.ball_speed_x * self.speed_mult
-            self.ball.y += self.ball_speed_y * self.speed_mult
-            
-            if self.ball.top <= 0 or self.ball.bottom >= self.h:
-                self.ball_speed_y *= -1
-                if self.snd_wall: self.snd_wall.play()
-                
-            if self.ball.left <= 0:
+            paddles = [(self.p1.x, self.p1_y, self.paddle_w, self.paddle_h, -1),
+                       (self.p2.x, self.p2_y, self.paddle_w, self.paddle_h, 1)]
+            self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y, self.speed_mult, events = advance_ball(
+                self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y, self.speed_mult,
+                k, self.w, self.h, self.ball.w, paddles)
+            if "paddle" in events: self.ai_target = None  # новая траектория; отскоки от стен predict_intercept уже учёл
+            for ev in events:
+                if ev == "wall": self.play_snd(self.snd_wall, "hits", 0, 1)
+                if ev == "paddle": self.play_snd(self.snd_paddle, "hits", 1, 1)
+        self.sync_rects()
+
+        if not self.paused:
+            if self.ball_x <= 0:
                 self.p2_score += 1
-                if self.snd_score: self.snd_score.play()
+                self.play_snd(self.snd_score, "sfx", 1)
                 self.reset_ball(1)
-            if self.ball.right >= self.w:
+            elif self.ball_x + self.ball.w >= self.w:
                 self.p1_score += 1
-                if self.snd_score: self.snd_score.play()
+                self.play_snd(self.snd_score, "sfx", 1)
                 self.reset_ball(-1)
-                
-            if self.ball.colliderect(self.p1) and self.ball_speed_x < 0:
-                self.ball_speed_x *= -1
-                self.speed_mult += 0.05
-                if self.snd_paddle: self.snd_paddle.play()
-            if self.ball.colliderect(self.p2) and self.ball_speed_x > 0:
-                self.ball_speed_x *= -1
-                self.speed_mult += 0.05
-                if self.snd_paddle: self.snd_paddle.play()
 
     def reset_ball(self, direction_mult):
         self.ball.center = (self.w//2, self.h//2)
+        self.ball_x, self.ball_y = float(self.ball.x), float(self.ball.y)
         self.ball_speed_x = 5 * direction_mult
         self.speed_mult = 1.0
         self.paused = True
+        self.prev_pos = self.sim_pos()  # без интерполяции через всё поле
+        self.ai_target = None
+
+    def plan_ai(self):
+        """Пересчёт цели AI — только после удара ракеткой или подачи"""
+        _, reaction, aim_error = AI_PROFILES[self.difficulty]
+        y = predict_intercept(self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y,
+                              self.p2.x, self.h, self.ball.h)
+        if y is None:
+            self.ai_target = self.h / 2  # мяч летит к игроку — возвращаемся в центр
+        else:
+            self.ai_target = y + self.ball.h / 2 + self.rng.uniform(-aim_error, aim_error)
+        self.ai_delay = reaction
+
+    def draw_game(self, alpha=1.0):
+        pb = self.prev_pos
+        bx, by, p1y, p2y = [p + (c - p) * alpha for p, c in zip(pb, self.sim_pos())]
+        ball = pygame.Rect(round(bx), round(by), self.ball.w, self.ball.h)
+        p1 = pygame.Rect(self.p1.x, round(p1y), self.paddle_w, self.paddle_h)
+        p2 = pygame.Rect(self.p2.x, round(p2y), self.paddle_w, self.paddle_h)
 
-    def draw_game(self):
         self.screen.fill((0, 0, 0))
         pygame.draw.line(self.screen, (50, 50, 50), (self.w//2, 0), (self.w//2, self.h), 2)
         
-        pygame.draw.rect(self.screen, (0, 200, 255), self.p1, border_radius=4)
-        pygame.draw.rect(self.screen, (255, 50, 100), self.p2, border_radius=4)
-        pygame.draw.ellipse(self.screen, (255, 255, 255), self.ball)
+        pygame.draw.rect(self.screen, (0, 200, 255), p1, border_radius=4)
+        pygame.draw.rect(self.screen, (255, 50, 100), p2, border_radius=4)
+        pygame.draw.ellipse(self.screen, (255, 255, 255), ball)
         
-        score_surf = self.font.render(f"{self.p1_score}   {self.p2_score}", True, (255, 255, 255))
-        self.screen.blit(score_surf, score_surf.get_rect(center=(self.w//2, 40)))
+        draw_text(self.screen, self.font, f"{self.p1_score}   {self.p2_score}", (255, 255, 255), center=(self.w//2, 40))
         
         if self.paused:
-            overlay = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-            overlay.fill((0,0,0,100))
-            self.screen.blit(overlay, (0,0))
+            self.screen.blit(self.pause_overlay, (0,0))
 
-            txt = self.font_small.render("Press START / SPACE to Serve", True, (200, 200, 200))
+            txt = render_text(self.font_small, "Press START / SPACE to Serve", (200, 200, 200))
             self.screen.blit(txt, txt.get_rect(center=(self.w//2, self.h/2 + 50)))
             
-            diff_lbl = self.font_small.render(f"Difficulty: {self.diff_names[self.difficulty]} (LB/RB or D-PAD)", True, self.diff_colors[self.difficulty])
-            self.screen.blit(diff_lbl, diff_lbl.get_rect(center=(self.w//2, self.h/2 + 80)))
\ No newline at end of file
+            diff_lbl = render_text(self.font_small, f"Difficulty: {self.diff_names[self.difficulty]} (LB/RB or D-PAD)", self.diff_colors[self.difficulty])
+            self.screen.blit(diff_lbl, diff_lbl.get_rect(center=(self.w//2, self.h/2 + 80)))
+
+if __name__ == "__main__":
+    # python pong_game.py --stress [N] — прогон N подач (по умолчанию миллион) по всем ядрам; без флага — ничего
+    import sys
+    if sys.argv[1:2] == ["--stress"]:
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+        workers = os.cpu_count() or 1
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(stress_test, [n // workers + (i < n % workers) for i in range(workers)], range(1, workers + 1)))
+        checked, skipped, failures = [sum(col) for col in zip(*parts)]
+        print(f"stress: {checked} rallies checked, {skipped} skipped, {failures} tunneling failures "
+              f"({time.perf_counter() - t0:.1f} s)")
+        sys.exit(1 if failures else 0)
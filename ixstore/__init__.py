@@ -0,0 +1 @@
+"""Общий код iXStore: хост, каталог игр и вспомогательные подсистемы"""
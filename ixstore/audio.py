@@ -0,0 +1,298 @@
+"""
+Звук: каналы микшера поделены на зарезервированные группы, голоса в группе
+вытесняются по приоритету, музыка синтезируется потоково.
+
+Группы — непересекающиеся наборы каналов: частые "move"/"rotate" в своей
+группе не могут занять каналы аккорда снятия линии. Каналы менеджер получает
+из общего для процесса распределителя, поэтому игры, приостановленные хостом,
+не делят каналы между собой; диапазон освобождается вместе с менеджером. Если в группе нет
+свободного канала, новый звук занимает канал самого слабого голоса (при равном
+приоритете — самого старого); звук слабее всех играющих отбрасывается.
+limit ограничивает число копий одного звука: лишняя копия перезапускает свою же.
+
+Музыка: фоновый поток берёт куски PCM у генератора (chiptune или любой
+итератор bytes в формате микшера) и держит AHEAD готовых; update() из кадра
+подаёт их в Channel.queue. В памяти не больше AHEAD + 2 кусков, старт — время
+одного куска, независимо от длины трека.
+
+    audio = AudioManager({"music": 1, "moves": 2, "sfx": 3})
+    audio.play(move_snd, "moves", priority=0, limit=1)
+    audio.play(clear_snd, "sfx", priority=3)
+    audio.play_music(lambda rate, channels: chiptune(SONG, rate, channels))  # SONG — см. chiptune()
+    audio.update()                          # раз в кадр
+"""
+import array
+import queue
+import random
+import threading
+import time
+import weakref
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FREE_CHANNELS = 2     # вне групп: Sound.play() без менеджера продолжает работать
+CHUNK_MS = 200        # длина куска музыки
+AHEAD = 3             # готовых кусков в очереди потока
+IDLE_EXIT = 5.0       # куски не забирают столько секунд — поток синтеза завершается
+MUSIC_VOLUME = 0.35
+
+# --- РАСПРЕДЕЛЕНИЕ КАНАЛОВ ---
+_ranges = {}  # номер менеджера -> (первый канал, за последним)
+_serial = 0
+
+def allocate(n):
+    """Первый свободный промежуток из n каналов; резерв и число каналов растут под него"""
+    global _serial
+    start = 0
+    for a, b in sorted(_ranges.values()):
+        if start + n <= a: break
+        start = max(start, b)
+    _serial += 1
+    _ranges[_serial] = (start, start + n)
+    reserve()
+    return _serial, start
+
+def release(serial):
+    span = _ranges.pop(serial, None)
+    if span is None or not pygame.mixer.get_init(): return
+    for i in range(*span): pygame.mixer.Channel(i).stop()  # паузы закрытой игры не достаются следующей
+    reserve()
+
+def reserve():
+    end = max((b for _, b in _ranges.values()), default=0)
+    if pygame.mixer.get_num_channels() < end + FREE_CHANNELS:
+        pygame.mixer.set_num_channels(end + FREE_CHANNELS)
+    pygame.mixer.set_reserved(end)  # Sound.play() сам в каналы менеджеров не попадёт
+
+# --- ГОЛОСА ---
+class AudioManager:
+    def __init__(self, groups):
+        self.groups = {}
+        self.voices = {}   # канал -> (приоритет, номер запуска)
+        self.started = 0
+        self.stolen = self.dropped = 0
+        self.stream = None
+        self.music_was_playing = False
+        self.enabled = bool(pygame.mixer.get_init())
+        if not self.enabled: return
+        serial, index = allocate(sum(groups.values()))
+        weakref.finalize(self, release, serial)
+        for name, n in groups.items():
+            self.groups[name] = [pygame.mixer.Channel(index + i) for i in range(n)]
+            index += n
+
+    def voice(self, ch):
+        # Канал, занятый не через этот менеджер (остаток закрытой игры), вытесняется первым
+        return self.voices.get(ch, (-1, 0))
+
+    def play(self, sound, group="sfx", priority=0, limit=0, volume=1.0):
+        """Канал, на котором заиграл звук, или None (отброшен: группа занята более важными)"""
+        channels = self.groups.get(group)
+        if not channels or sound is None: return None
+        target = None
+        if limit:
+            same = [ch for ch in channels if ch.get_busy() and ch.get_sound() is sound]
+            if len(same) >= limit: target = min(same, key=self.voice)
+        if target is None:
+            target = next((ch for ch in channels if not ch.get_busy()), None)
+        if target is None:
+            target = min(channels, key=self.voice)
+            if self.voice(target)[0] > priority:
+                self.dropped += 1
+                return None
+            self.stolen += 1
+        self.started += 1
+        target.play(sound)
+        target.set_volume(volume)
+        self.voices[target] = (priority, self.started)
+        return target
+
+    # --- МУЗЫКА ---
+    def play_music(self, source, group="music"):
+        """source(rate, channels) -> итератор кусков PCM; повторный вызов снимает паузу"""
+        if not self.enabled or not self.groups.get(group): return
+        if self.stream is None:
+            rate, _, channels = pygame.mixer.get_init()
+            self.stream = MusicStream(self.groups[group][0], source(rate, channels))
+        self.stream.resume()
+
+    def pause_music(self):
+        if self.stream: self.stream.pause()
+
+    def music_playing(self):
+        return self.stream is not None and not self.stream.paused
+
+    def update(self):
+        if self.stream: self.stream.update()
+
+    # --- ПАУЗА ХОСТА ---
+    def pause(self):
+        """Игра уходит в фон: все голоса и музыка замирают на месте"""
+        self.music_was_playing = self.music_playing()
+        for channels in self.groups.values():
+            for ch in channels: ch.pause()
+        if self.stream: self.stream.paused = True
+
+    def resume(self):
+        music = self.stream.channel if self.stream else None
+        for channels in self.groups.values():
+            for ch in channels:
+                if ch is not music: ch.unpause()
+        if self.music_was_playing: self.stream.resume()
+
+    def stats(self):
+        out = {"started": self.started, "stolen": self.stolen, "dropped": self.dropped}
+        if self.stream: out["underruns"] = self.stream.underruns
+        return out
+
+class MusicStream:
+    def __init__(self, channel, chunks, ahead=AHEAD, volume=MUSIC_VOLUME):
+        self.channel = channel
+        self.chunks = chunks
+        self.ready = queue.Queue(ahead)
+        self.pending = None      # кусок, который поток не успел положить в очередь
+        self.thread = None
+        self.finished = False    # генератор кончился, всё уже отдано
+        self.paused = True
+        self.played = False
+        self.underruns = 0
+        self.last_take = time.monotonic()
+        channel.stop()  # мог остаться на паузе от закрытой игры
+        channel.set_volume(volume)
+
+    def fill(self):
+        # Поток: готовит куски, пока их забирают; после IDLE_EXIT без спроса — выходит, update() запустит снова
+        while True:
+            if self.pending is None:
+                try: self.pending = next(self.chunks)
+                except StopIteration: self.pending = b""
+                except Exception as e:
+                    print(f"[audio] music generator failed: {e}")
+                    self.pending = b""
+            try:
+                self.ready.put(self.pending, timeout=0.25)
+            except queue.Full:
+                if time.monotonic() - self.last_take > IDLE_EXIT: return
+                continue
+            if not self.pending: return
+            self.pending = None
+
+    def update(self):
+        """Из кадра: канал играет кусок и держит следующий в Channel.queue"""
+        if self.paused or self.finished: return
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.fill, daemon=True)
+            self.thread.start()
+        ch = self.channel
+        while not ch.get_busy() or ch.get_queue() is None:
+            try: data = self.ready.get_nowait()
+            except queue.Empty:
+                if self.played and not ch.get_busy(): self.underruns += 1
+                return
+            self.last_take = time.monotonic()
+            if not data:
+                self.finished = True
+                return
+            sound = pygame.mixer.Sound(buffer=data)
+            if ch.get_busy(): ch.queue(sound)
+            else: ch.play(sound)
+            self.played = True
+
+    def pause(self):
+        if not self.paused: self.channel.pause()
+        self.paused = True
+
+    def resume(self):
+        if self.paused: self.channel.unpause()
+        self.paused = False
+
+# --- СИНТЕЗ МУЗЫКИ ---
+NOTE_INDEX = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+RELEASE = 64  # сэмплов затухания в конце шага — без щелчков на стыке нот
+
+def pattern(text):
+    """'A4 . C5 x' -> MIDI-номера по шагам: '.' — пауза, 'x' — удар (для шума)"""
+    out = []
+    for tok in text.split():
+        if tok == ".": out.append(0)
+        elif tok == "x": out.append(1)
+        else:
+            note = NOTE_INDEX[tok[0].upper()] + tok[1:-1].count("#") - tok[1:-1].count("b")
+            out.append(12 * (int(tok[-1]) + 1) + note)
+    return out
+
+def note_freq(n):
+    return 440.0 * 2 ** ((n - 69) / 12)
+
+def chiptune(song, sample_rate, channels=1, chunk_ms=CHUNK_MS):
+    """
+    Бесконечная петля трека кусками по chunk_ms: bytes int16 (каналы чередуются).
+    song = {"bpm": 140, "tracks": [(волна, громкость, спад, ноты по шагам 1/16), ...]}
+    Ноты — строка для pattern() или список MIDI-номеров.
+    Волны: square, pulse (скважность 1/4), triangle, noise. Спад — доля громкости, теряемая за шаг.
+    """
+    tracks = [(w, v, d, pattern(n) if isinstance(n, str) else n) for w, v, d, n in song["tracks"]]
+    step_len = int(sample_rate * 60 / song["bpm"] / 4)
+    steps = max(len(t[3]) for t in tracks)
+    loop = steps * step_len
+    chunk = int(sample_rate * chunk_ms / 1000)
+    rng = random.Random(0)
+    noise = [rng.uniform(-1, 1) for _ in range(step_len)]  # один шум на все удары — петля детерминирована
+    noise_np = np.asarray(noise) if np is not None else None
+    pos = 0
+    while True:
+        if np is not None:
+            mix = np.zeros(chunk)
+        else:
+            mix = [0.0] * chunk
+        done = 0
+        while done < chunk:
+            s = (pos + done) % loop
+            step, offset = divmod(s, step_len)
+            seg = min(chunk - done, step_len - offset)
+            for wave, vol, decay, notes in tracks:
+                n = notes[step % len(notes)]
+                if n: render_note(mix, done, offset, seg, wave, vol, decay, n, sample_rate, step_len,
+                                  noise_np if np is not None else noise)
+            done += seg
+        pos = (pos + chunk) % loop
+        yield to_pcm(mix, channels)
+
+def render_note(mix, at, offset, seg, wave, vol, decay, n, sample_rate, step_len, noise):
+    """Кусок ноты: сэмплы offset..offset+seg от начала шага -> mix[at:at+seg]"""
+    k = note_freq(n) / sample_rate
+    if np is not None:
+        t = np.arange(offset, offset + seg)
+        phase = (t * k) % 1.0
+        if wave == "square": val = np.where(phase < 0.5, 1.0, -1.0)
+        elif wave == "pulse": val = np.where(phase < 0.25, 1.0, -1.0)
+        elif wave == "triangle": val = 4 * np.abs(phase - 0.5) - 1
+        else: val = noise[offset:offset + seg]
+        env = np.maximum(0.0, 1 - decay * t / step_len) * np.minimum(1.0, (step_len - t) / RELEASE)
+        mix[at:at + seg] += vol * val * env
+        return
+    for i in range(seg):
+        t = offset + i
+        phase = (t * k) % 1.0
+        if wave == "square": v = 1.0 if phase < 0.5 else -1.0
+        elif wave == "pulse": v = 1.0 if phase < 0.25 else -1.0
+        elif wave == "triangle": v = 4 * abs(phase - 0.5) - 1
+        else: v = noise[t]
+        env = max(0.0, 1 - decay * t / step_len) * min(1.0, (step_len - t) / RELEASE)
+        mix[at + i] += vol * v * env
+
+def to_pcm(mix, channels):
+    if np is not None:
+        val = np.clip(mix * 32767, -32767, 32767).astype(np.int16)
+        if channels > 1: val = np.repeat(val, channels)
+        return val.tobytes()
+    buf = array.array('h', (max(-32767, min(32767, int(v * 32767))) for v in mix))
+    if channels == 1: return buf.tobytes()
+    out = array.array('h', bytes(len(buf) * 2 * channels))
+    for c in range(channels): out[c::channels] = buf
+    return out.tobytes()
@@ -0,0 +1,281 @@
+"""
+Headless-бенчмарк игр: SDL dummy-драйверы, скриптованный ввод через очередь
+событий, виртуальные часы вместо clock.tick(60).
+
+    python -m ixstore.bench [tetris pong snake] --frames 3000
+    python -m ixstore.bench --save-baseline bench_baseline.json
+    python -m ixstore.bench --baseline bench_baseline.json   # код 1 при регрессии
+    python -m ixstore.bench snake --profile prof/            # фазы и вызовы draw.* по кадрам в prof/snake.json
+    python -m ixstore.bench --size 1920x1080 --render smooth   # кадр + масштабирование, размер из loader.ini
+    python -m ixstore.bench snake --size 1920x1080 --internal 320x180   # свой размер для названных игр
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import gc
+import importlib
+import inspect
+import json
+import random
+import sys
+import time
+import types
+
+import pygame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# имя -> (папка, модуль, класс)
+GAMES = {
+    "tetris": ("Tetris_Xiport", "tetris_game", "Tetris"),
+    "pong": ("cyber_pong", "pong_game", "PongGame"),
+    "snake": ("neon_snake_Xi", "neon_snake", "NeonSnake"),
+}
+
+DRAW_FUNCS = ("rect", "line", "lines", "aaline", "aalines", "circle", "ellipse", "arc", "polygon")
+
+def counted_pygame(prof):
+    """Копия модуля pygame для модуля игры на время --profile: вызовы draw.* и Surface()
+    идут в счётчики prof. Сам pygame и остальные модули процесса не меняются"""
+    def counted(fn):
+        def wrapper(*args, **kwargs):
+            prof.draw_calls += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    def surface(*args, **kwargs):
+        prof.surfaces += 1
+        return pygame.Surface(*args, **kwargs)
+    draw = types.ModuleType(pygame.draw.__name__)
+    draw.__dict__.update(pygame.draw.__dict__)
+    for name in DRAW_FUNCS: setattr(draw, name, counted(getattr(pygame.draw, name)))
+    pg = types.ModuleType(pygame.__name__)
+    pg.__dict__.update(pygame.__dict__)
+    pg.draw, pg.Surface = draw, surface
+    return pg
+
+def loader_resolution(name):
+    """resolution= из loader.ini игры, как у хоста; нет или мусор — None"""
+    from .catalog import LOADER_NAME, parse_loader_ini
+    from .render import parse_size
+    try:
+        with open(os.path.join(ROOT, GAMES[name][0], LOADER_NAME), encoding="utf-8", errors="replace") as f:
+            return parse_size(parse_loader_ini(f.read()).get("resolution"))
+    except OSError:
+        return None
+
+def load_game_class(name):
+    folder, module, cls = GAMES[name]
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path: sys.path.insert(0, path)
+    return getattr(importlib.import_module(module), cls)
+
+class VirtualClock:
+    """Подмена pygame.time.Clock: tick() не спит, время идёт шагами 1000/fps"""
+    def __init__(self):
+        self.now = 0.0
+        self.last_dt = 0
+
+    def tick(self, framerate=0):
+        dt = int(1000 / framerate) if framerate else 16
+        self.now += dt
+        self.last_dt = dt
+        return dt
+
+    def get_ticks(self):
+        return int(self.now)
+
+    def get_time(self):
+        return self.last_dt
+
+    def get_fps(self):
+        return 1000 / self.last_dt if self.last_dt else 0.0
+
+# --- СКРИПТЫ ВВОДА ---
+def key_event(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+
+def tetris_script(frame, rng):
+    if frame % 60 == 0: return [key_event(pygame.K_UP), key_event(pygame.K_RETURN)]  # сплэш/меню/game over
+    r = rng.random()
+    if r < 0.06: return [key_event(rng.choice((pygame.K_LEFT, pygame.K_RIGHT)))]
+    if r < 0.09: return [key_event(pygame.K_UP)]
+    if r < 0.14: return [key_event(pygame.K_DOWN)]
+    return []
+
+def pong_script(frame, rng):
+    if frame % 240 == 120: return [key_event(pygame.K_SPACE)]  # пропуск интро / подача
+    return []
+
+def snake_script(frame, rng):
+    if frame % 90 == 0: return [key_event(pygame.K_RETURN)]  # рестарт после game over
+    if rng.random() < 0.05:
+        return [key_event(rng.choice((pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)))]
+    return []
+
+SCRIPTS = {"tetris": tetris_script, "pong": pong_script, "snake": snake_script}
+
+# Фаза кадра = текущее состояние игры
+PHASES = {
+    "tetris": lambda g: g.state,
+    "pong": lambda g: g.game_state + ("/PAUSED" if g.game_state == "PLAYING" and g.paused else ""),
+    "snake": lambda g: "GAMEOVER" if g.game_over else "PLAYING",
+}
+
+def percentiles(samples, ps=(50, 90, 99)):
+    s = sorted(samples)
+    out = {f"p{p}": round(s[min(len(s) - 1, int(len(s) * p / 100))], 4) for p in ps}
+    out["max"] = round(s[-1], 4)
+    out["mean"] = round(sum(s) / len(s), 4)
+    out["n"] = len(s)
+    return out
+
+def run_game(name, frames=3000, size=(640, 480), seed=1, profile_dir=None, internal=None, render="sharp"):
+    screen = pygame.display.set_mode(size)
+    target = None
+    if internal:
+        from .render import RenderTarget
+        target = RenderTarget(screen, internal, render)
+        screen = target.surface
+    pygame.event.clear()
+    clock = VirtualClock()
+    real_get_ticks = pygame.time.get_ticks
+    pygame.time.get_ticks = clock.get_ticks
+    prof = None
+    try:
+        cls = load_game_class(name)
+        module = sys.modules[cls.__module__]
+        gc.collect()
+        t0 = time.perf_counter()
+        game = cls(screen)
+        startup_ms = (time.perf_counter() - t0) * 1000
+        game.clock = clock
+        if profile_dir:
+            from .profiler import FrameProfiler
+            prof = game.profiler = FrameProfiler(size=frames)
+            prof.enable()
+            module.pygame = counted_pygame(prof)
+
+        with_rects = "with_rects" in inspect.signature(game.run_frame).parameters
+        script, phase_of, rng = SCRIPTS[name], PHASES[name], random.Random(seed)
+        phases = {}
+        gc_before = gc.get_stats()[0]["collections"]
+        blocks_before = sys.getallocatedblocks()
+        status = "RUNNING"
+        for frame in range(frames):
+            for ev in script(frame, rng): pygame.event.post(ev)
+            phase = phase_of(game)
+            t = time.perf_counter()
+            if target and with_rects:
+                status, rects = game.run_frame(with_rects=True)
+            else:
+                status, rects = game.run_frame(), None
+            if prof: prof.mark("flip")
+            if target: target.present(rects)  # как в хосте: только изменившиеся rects
+            if prof: prof.end_frame()
+            phases.setdefault(phase, []).append((time.perf_counter() - t) * 1000)
+            if status != "RUNNING": break
+        blocks_after = sys.getallocatedblocks()
+        gc_runs = gc.get_stats()[0]["collections"] - gc_before
+        if prof:
+            prof.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            prof.export(os.path.join(profile_dir, f"{name}.json"), game=name, seed=seed, size=list(size))
+    finally:
+        pygame.time.get_ticks = real_get_ticks
+        if prof: module.pygame = pygame
+
+    n = sum(len(v) for v in phases.values())
+    return {
+        "internal": list(internal) if internal else None,
+        "startup_ms": round(startup_ms, 3),
+        "frames": n,
+        "status": status,
+        "phases": {k: percentiles(v) for k, v in phases.items()},
+        "alloc": {
+            "net_blocks": blocks_after - blocks_before,
+            "net_blocks_per_frame": round((blocks_after - blocks_before) / max(1, n), 3),
+            "gc_gen0_runs": gc_runs,
+        },
+    }
+
+MIN_SAMPLES = 30  # фазы с меньшим числом кадров слишком шумные для сравнения
+
+def compare(results, baseline, tolerance):
+    """Регрессии: startup и p90 каждой фазы хуже базы больше чем на tolerance"""
+    problems = []
+    for name, res in results.items():
+        base = baseline.get("games", {}).get(name)
+        if not base: continue
+        if res["startup_ms"] > base["startup_ms"] * (1 + tolerance):
+            problems.append(f"{name}: startup {base['startup_ms']:.2f} -> {res['startup_ms']:.2f} ms")
+        for phase, st in res["phases"].items():
+            old = base["phases"].get(phase)
+            if old and min(st["n"], old["n"]) >= MIN_SAMPLES and st["p90"] > old["p90"] * (1 + tolerance):
+                problems.append(f"{name}/{phase}: p90 {old['p90']:.3f} -> {st['p90']:.3f} ms")
+    return problems
+
+def print_report(results):
+    for name, res in results.items():
+        a = res["alloc"]
+        scaled = f", internal {res['internal'][0]}x{res['internal'][1]}" if res.get("internal") else ""
+        print(f"{name}{scaled}: startup {res['startup_ms']:.1f} ms, {res['frames']} frames, "
+              f"net blocks/frame {a['net_blocks_per_frame']}, gc0 runs {a['gc_gen0_runs']}")
+        for phase, st in sorted(res["phases"].items()):
+            print(f"  {phase:<16} n={st['n']:<6} p50 {st['p50']:.3f}  p90 {st['p90']:.3f}  "
+                  f"p99 {st['p99']:.3f}  max {st['max']:.3f} ms")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless frame-time benchmark for iXStore games")
+    ap.add_argument("games", nargs="*", help="subset of: " + ", ".join(GAMES))
+    ap.add_argument("--frames", type=int, default=3000)
+    ap.add_argument("--size", default="640x480")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="compare against a stored baseline")
+    ap.add_argument("--save-baseline", help="store results as a new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--profile", metavar="DIR", help="record per-phase frame profiles to DIR/<game>.json")
+    ap.add_argument("--internal", help="WxH internal surface for the games named on the command line "
+                                       "(others use resolution= from their loader.ini)")
+    ap.add_argument("--render", choices=("sharp", "smooth"),
+                    help="scale an internal surface to --size (default sharp when --internal is given)")
+    args = ap.parse_args(argv)
+    for name in args.games:
+        if name not in GAMES: ap.error(f"unknown game: {name}")
+    games = args.games or list(GAMES)
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    internal = tuple(int(v) for v in args.internal.lower().split("x")) if args.internal else None
+    render = args.render or ("sharp" if internal else None)
+
+    def internal_for(name):
+        # Как Host.make_target: только уменьшение работы, поверхность меньше дисплея
+        if render is None: return None
+        res = internal if internal and name in args.games else loader_resolution(name)
+        if res is None or res[0] > size[0] or res[1] > size[1] or res == size: return None
+        return res
+
+    pygame.init()
+    results = {name: run_game(name, args.frames, size, args.seed, args.profile, internal_for(name), render)
+               for name in games}
+    report = {"python": sys.version.split()[0], "pygame": pygame.version.ver,
+              "frames": args.frames, "size": list(size), "seed": args.seed, "games": results}
+    if render: report["render"] = render
+    print_report(results)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for p in problems: print("REGRESSION", p)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Каталог игр: находит папки с loader.ini, держит индекс на диске
+(пересканируются только изменившиеся папки) и импортирует модуль игры
+только когда её выбрали.
+
+    python -m ixstore.catalog [папка_библиотеки]
+"""
+import importlib.util
+import json
+import os
+import sys
+
+from .paths import cache_dir, write_atomic
+
+INDEX_VERSION = 1
+LOADER_NAME = "loader.ini"
+THUMB_NAME = "thumbnail.png"
+
+def parse_loader_ini(text):
+    """Терпимый разбор всех трёх форматов: [Meta] с кавычками, голые key=value,
+    неполные файлы. Ключи приводятся к нижнему регистру, кавычки снимаются."""
+    meta = {}
+    for line in text.splitlines():
+        line = line.strip().lstrip("\ufeff")
+        if not line or line[0] in "#;" or (line[0] == "[" and line.endswith("]")):
+            continue
+        if "=" in line: key, _, value = line.partition("=")
+        elif ":" in line: key, _, value = line.partition(":")
+        else: continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        key = key.strip().lower()
+        if key: meta[key] = value
+    return meta
+
+class GameEntry:
+    """Запись каталога: метаданные из loader.ini, модуль грузится лениво"""
+    FIELDS = ("folder", "path", "game", "title", "author", "version", "genre", "description", "thumbnail", "mtime", "meta")
+
+    def __init__(self, folder, path, meta, mtime):
+        self.folder = folder
+        self.path = path
+        self.meta = meta
+        self.mtime = mtime
+        self.game = meta.get("game", "")
+        self.title = meta.get("title") or folder
+        self.author = meta.get("author", "")
+        self.version = meta.get("version", "")
+        self.genre = meta.get("genre", "")
+        self.description = meta.get("description", "")
+        thumb = os.path.join(path, THUMB_NAME)
+        self.thumbnail = thumb if os.path.exists(thumb) else None
+        self.module = None
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, d):
+        entry = cls.__new__(cls)
+        for k in cls.FIELDS: setattr(entry, k, d.get(k))
+        entry.module = None
+        return entry
+
+    def __repr__(self):
+        return f"<GameEntry {self.folder!r} {self.title!r}>"
+
+    def load_module(self):
+        # Импорт только при выборе игры; папка игры попадает в sys.path для её локальных импортов
+        if self.module is None:
+            script = os.path.join(self.path, self.game)
+            if not self.game or not os.path.isfile(script):
+                raise ImportError(f"{self.folder}: game script {self.game!r} not found")
+            name = "ixgame_" + "".join(c if c.isalnum() else "_" for c in self.folder)
+            spec = importlib.util.spec_from_file_location(name, script)
+            module = importlib.util.module_from_spec(spec)
+            if self.path not in sys.path: sys.path.insert(0, self.path)
+            sys.modules[name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                del sys.modules[name]
+                raise
+            self.module = module
+        return self.module
+
+    def game_class(self):
+        """Класс игры: meta 'class', иначе первый класс модуля с run_frame"""
+        module = self.load_module()
+        name = self.meta.get("class")
+        if name: return getattr(module, name)
+        for obj in vars(module).values():
+            if isinstance(obj, type) and obj.__module__ == module.__name__ and hasattr(obj, "run_frame"):
+                return obj
+        raise ImportError(f"{self.folder}: no game class with run_frame in {self.game}")
+
+class Catalog:
+    def __init__(self, root, index_path=None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or cache_dir("catalog.json")
+        self.entries = {}
+        self.dirty = False
+
+    def load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return {}
+        return {folder: GameEntry.from_dict(d) for folder, d in data.get("games", {}).items()}
+
+    def save_index(self):
+        data = {"version": INDEX_VERSION, "root": self.root,
+                "games": {folder: e.to_dict() for folder, e in self.entries.items()}}
+        try:
+            write_atomic(self.index_path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+            self.dirty = False
+        except OSError:
+            pass
+
+    @staticmethod
+    def folder_mtime(path):
+        # Папка меняет mtime при добавлении/удалении файлов, loader.ini — при правке
+        try:
+            return max(os.stat(path).st_mtime_ns, os.stat(os.path.join(path, LOADER_NAME)).st_mtime_ns)
+        except OSError:
+            return None
+
+    def scan(self):
+        """Инкрементальный пересчёт: разбираются только новые и изменившиеся папки"""
+        old = self.entries or self.load_index()
+        entries = {}
+        try:
+            dirs = sorted(d.name for d in os.scandir(self.root) if d.is_dir() and not d.name.startswith("."))
+        except OSError:
+            dirs = []
+        for folder in dirs:
+            path = os.path.join(self.root, folder)
+            mtime = self.folder_mtime(path)
+            if mtime is None: continue
+            entry = old.get(folder)
+            if entry is None or entry.mtime != mtime or entry.path != path:
+                try:
+                    with open(os.path.join(path, LOADER_NAME), encoding="utf-8", errors="replace") as f:
+                        meta = parse_loader_ini(f.read())
+                except OSError:
+                    continue
+                entry = GameEntry(folder, path, meta, mtime)
+                self.dirty = True
+            entries[folder] = entry
+        if set(entries) != set(old): self.dirty = True
+        self.entries = entries
+        if self.dirty: self.save_index()
+        return list(entries.values())
+
+    def get(self, folder):
+        return self.entries.get(folder)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    root = argv[0] if argv else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for e in Catalog(root).scan():
+        print(f"{e.folder:<16} {e.title:<16} {e.version:<8} {e.genre:<8} {e.game}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
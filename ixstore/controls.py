@@ -0,0 +1,219 @@
+"""
+Общий слой ввода: горячее подключение джойстиков, таблицы раскладок по имени
+устройства, автоповтор удержания (DAS/ARR) по времени, а не по кадрам,
+и замер задержки от выборки события до показа кадра.
+
+Игры получают события уже в канонической раскладке (XInput: 0 A, 1 B, 4 LB,
+5 RB, 6 Select/-, 7 Start, крестовина и левый стик — JOYHATMOTION), поэтому
+обработчики не зависят от конкретного контроллера:
+
+    controls = Controls()
+    controls.set_repeat("left", das=170, arr=50)
+    for event in controls.poll():           # вместо pygame.event.get()
+        ...
+    for name in controls.repeats(now):      # "left"/"right"/"up"/"down"
+        ...
+    controls.presented()                    # хост — сразу после display.flip()
+"""
+import time
+from collections import deque
+
+import pygame
+
+# Канонические кнопки (раскладка XInput, на неё рассчитаны игры)
+A, B, X, Y, LB, RB, SELECT, START = range(8)
+
+# SDL HIDAPI-драйверы (PlayStation, Switch) нумеруют кнопки в порядке SDL_GameController,
+# крестовина у них — кнопки 11..14, а не hat
+HIDAPI_BUTTONS = {0: A, 1: B, 2: X, 3: Y, 4: SELECT, 6: START, 9: LB, 10: RB}
+HIDAPI_DPAD = {11: (0, 1), 12: (0, -1), 13: (-1, 0), 14: (1, 0)}
+
+# Подстроки имени устройства -> (кнопки, кнопки-крестовина); None — отдаём как есть
+DEVICE_MAPS = [
+    (("ps4", "ps5", "dualsense", "dualshock", "nintendo switch"), HIDAPI_BUTTONS, HIDAPI_DPAD),
+]
+
+STICK_ON, STICK_OFF = 0.5, 0.35  # гистерезис стика-как-крестовины
+KEY_DIRS = {pygame.K_LEFT: "left", pygame.K_RIGHT: "right", pygame.K_UP: "up", pygame.K_DOWN: "down"}
+MAX_REPEATS = 20  # за один вызов repeats(), чтобы подвисание не выстрелило сотней сдвигов
+
+def mapping_for(name):
+    name = (name or "").lower()
+    for needles, buttons, dpad in DEVICE_MAPS:
+        if any(n in name for n in needles): return buttons, dpad
+    return None, None
+
+def hat_dirs(value):
+    x, y = value
+    return {"left": x < 0, "right": x > 0, "down": y < 0, "up": y > 0}
+
+class Device:
+    def __init__(self, joystick):
+        self.joystick = joystick
+        self.buttons, self.dpad = mapping_for(joystick.get_name())
+        self.pad = [0, 0]     # крестовина (hat или кнопки)
+        self.stick = [0, 0]   # левый стик, оцифрованный с гистерезисом
+        self.hat = (0, 0)     # что отдано игре последним JOYHATMOTION
+
+    def combined(self):
+        return tuple(self.pad) if self.pad != [0, 0] else tuple(self.stick)
+
+class Controls:
+    def __init__(self, latency_samples=512):
+        self.devices = {}
+        self.joysticks = []  # живой список, игры могут держать ссылку
+        self.repeat = {}
+        self.held = {}       # направление -> время следующего повтора (мс)
+        self.held_by = {}    # направление -> источники удержания (клавиша / устройство)
+        self.latency = deque(maxlen=latency_samples)
+        self.pending = deque(maxlen=64)
+        self.last_poll = None
+        if not pygame.joystick.get_init(): pygame.joystick.init()
+        for i in range(pygame.joystick.get_count()): self.add_device(i)
+
+    # --- УСТРОЙСТВА ---
+    def add_device(self, index):
+        try: js = pygame.joystick.Joystick(index)
+        except pygame.error: return
+        if js.get_instance_id() in self.devices: return
+        self.devices[js.get_instance_id()] = Device(js)
+        self.joysticks.append(js)
+
+    def remove_device(self, instance_id):
+        dev = self.devices.pop(instance_id, None)
+        if dev is None: return
+        if dev.joystick in self.joysticks: self.joysticks.remove(dev.joystick)
+        for name in list(self.held_by): self.release(name, instance_id)
+
+    def reset(self):
+        """После паузы игры: пересобрать список устройств (подключения могли смениться)
+        и забыть удержания — отпускания клавиш игра не видела"""
+        alive = {}
+        for i in range(pygame.joystick.get_count()):
+            try: js = pygame.joystick.Joystick(i)
+            except pygame.error: continue
+            iid = js.get_instance_id()
+            dev = self.devices.get(iid)
+            alive[iid] = dev if dev is not None and not isinstance(dev.joystick, _Unnamed) else Device(js)
+        self.devices = alive
+        self.joysticks[:] = [dev.joystick for dev in alive.values()]
+        for dev in alive.values(): dev.pad, dev.stick, dev.hat = [0, 0], [0, 0], (0, 0)
+        self.held.clear()
+        self.held_by.clear()
+        self.pending.clear()
+        self.last_poll = None
+
+    # --- АВТОПОВТОР ---
+    def set_repeat(self, name, das, arr):
+        """Удержание направления name повторяет его через das мс, затем каждые arr мс"""
+        self.repeat[name] = (das, arr)
+
+    def press(self, name, source, now):
+        sources = self.held_by.setdefault(name, set())
+        if not sources and name in self.repeat: self.held[name] = now + self.repeat[name][0]
+        sources.add(source)
+
+    def release(self, name, source):
+        sources = self.held_by.get(name)
+        if not sources: return
+        sources.discard(source)
+        if not sources: self.held.pop(name, None)
+
+    def repeats(self, now):
+        """Повторы удерживаемых направлений, накопившиеся к моменту now (мс игры)"""
+        out = []
+        for name, due in self.held.items():
+            arr = max(1, self.repeat[name][1])
+            n = 0
+            while due <= now and n < MAX_REPEATS:
+                out.append(name)
+                due += arr
+                n += 1
+            self.held[name] = now + arr if n == MAX_REPEATS else due
+        return out
+
+    # --- СОБЫТИЯ ---
+    def set_hat(self, dev, source, now, out, event):
+        value = dev.combined()
+        if value == dev.hat: return
+        old, new = hat_dirs(dev.hat), hat_dirs(value)
+        for name in new:
+            if new[name] and not old[name]: self.press(name, source, now)
+            elif old[name] and not new[name]: self.release(name, source)
+        dev.hat = value
+        out.append(pygame.event.Event(pygame.JOYHATMOTION, joy=event.joy, instance_id=source, hat=0, value=value))
+
+    def translate(self, event, now, out):
+        t = event.type
+        if t == pygame.JOYDEVICEADDED: self.add_device(event.device_index)
+        elif t == pygame.JOYDEVICEREMOVED: self.remove_device(event.instance_id)
+        if t == pygame.KEYDOWN or t == pygame.KEYUP:
+            name = KEY_DIRS.get(event.key)
+            if name:
+                if t == pygame.KEYDOWN: self.press(name, ("key", event.key), now)
+                else: self.release(name, ("key", event.key))
+            out.append(event)
+            return
+        if t not in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION, pygame.JOYAXISMOTION):
+            out.append(event)
+            return
+        iid = getattr(event, "instance_id", event.joy)
+        dev = self.devices.get(iid)
+        if dev is None:
+            # Устройство без записи (например, повтор лога) — раскладка как есть
+            dev = self.devices[iid] = Device(_Unnamed())
+        if t == pygame.JOYHATMOTION:
+            if event.hat != 0: out.append(event); return
+            dev.pad = list(event.value)
+            self.set_hat(dev, iid, now, out, event)
+        elif t == pygame.JOYAXISMOTION:
+            out.append(event)  # аналоговые значения нужны как есть (ракетка в Pong)
+            if event.axis > 1: return
+            i = event.axis
+            v = -event.value if i == 1 else event.value  # у hat «вверх» — +1
+            cur = dev.stick[i]
+            if cur == 0 and abs(v) >= STICK_ON: dev.stick[i] = 1 if v > 0 else -1
+            elif cur != 0 and (abs(v) < STICK_OFF or (v > 0) != (cur > 0)): dev.stick[i] = 0
+            self.set_hat(dev, iid, now, out, event)
+        else:
+            down = t == pygame.JOYBUTTONDOWN
+            if dev.dpad and event.button in dev.dpad:
+                dx, dy = dev.dpad[event.button]
+                if dx: dev.pad[0] = dx if down else 0
+                if dy: dev.pad[1] = dy if down else 0
+                self.set_hat(dev, iid, now, out, event)
+            elif dev.buttons is None:
+                out.append(event)
+            elif event.button in dev.buttons:
+                out.append(pygame.event.Event(t, joy=event.joy, instance_id=iid, button=dev.buttons[event.button]))
+
+    def poll(self):
+        """pygame.event.get() с переводом в каноническую раскладку"""
+        t = time.perf_counter()
+        now = pygame.time.get_ticks()
+        out = []
+        for event in pygame.event.get(): self.translate(event, now, out)
+        if out and self.last_poll is not None:
+            # Событие пришло где-то между прошлым и этим опросом: ожидание не больше интервала
+            self.pending.append((t, t - self.last_poll))
+        self.last_poll = t
+        return out
+
+    # --- ЗАДЕРЖКА ---
+    def presented(self):
+        """Кадр, обработавший ввод, показан: закрываем замеры (вызывает хост после flip)"""
+        t = time.perf_counter()
+        while self.pending:
+            t_poll, wait = self.pending.popleft()
+            self.latency.append(((t - t_poll) * 1000, wait * 1000))
+
+    def latency_stats(self):
+        """{'n', 'p50', 'p99', 'wait_max'} в мс: опрос -> показ и верхняя граница ожидания в очереди"""
+        if not self.latency: return {"n": 0}
+        shown = sorted(s[0] for s in self.latency)
+        pick = lambda p: shown[min(len(shown) - 1, int(len(shown) * p / 100))]
+        return {"n": len(shown), "p50": pick(50), "p99": pick(99),
+                "wait_max": max(s[1] for s in self.latency)}
+
+class _Unnamed:
+    def get_name(self): return ""
@@ -0,0 +1,386 @@
+"""
+Хост iXStore: один цикл кадров на все игры. Хост держит окно (с vsync, если
+драйвер умеет), сам спит между кадрами и отдаёт играм часы, которые только
+сообщают dt. По HOME игра не уничтожается, а засыпает «тёплой»: звуки
+остановлены, экземпляр лежит в LRU в пределах бюджета памяти и возвращается
+без повторного конструктора (синтез звука, SysFont, джойстики).
+Игры с snapshot()/restore() сохраняются в фоне раз в SNAPSHOT_EVERY секунд
+и при HOME, так что партия переживает и перезапуск хоста. Если меню простаивает
+ATTRACT_AFTER секунд, хост запускает заставку — игру с demo="1" в loader.ini
+(конструктор с demo=True); любой ввод возвращает в меню.
+С --render sharp/smooth игры с resolution="WxH" в loader.ini рисуют во внутреннюю
+поверхность этого размера, хост масштабирует её на дисплей (ixstore.render);
+F4 переключает качество на ходу.
+
+    python -m ixstore.host [папка_библиотеки] [--size 800x480] [--budget 96] [--render sharp]
+
+Общий интерфейс с играми — run_frame() (или run_frame(with_rects=True)),
+атрибут clock и статусы RUNNING/HOME/EXIT; необязательные хуки suspend()/resume()
+и snapshot()/restore(data).
+"""
+import array
+import inspect
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+
+import pygame
+
+from .catalog import Catalog
+from .controls import Controls
+from .render import QUALITIES, RenderTarget, parse_size
+from .saves import SnapshotStore, writer
+from .textcache import draw_text
+
+DEFAULT_BUDGET_MB = 96
+LAUNCHER_FPS = 30
+SNAPSHOT_EVERY = 5.0
+ATTRACT_AFTER = 30.0
+
+class HostClock:
+    """Часы игры под хостом: tick() не спит — хост уже выдержал кадр;
+    запрошенная игрой частота (60, 20 на неподвижном экране...) запоминается для хоста"""
+    def __init__(self, fps=60):
+        self.dt = 0
+        self.requested = fps
+
+    def tick(self, framerate=0):
+        if framerate: self.requested = framerate
+        return self.dt
+
+    def get_time(self): return self.dt
+    def get_fps(self): return 1000 / self.dt if self.dt else 0.0
+
+def walk_resources(obj, skip=(), depth=3):
+    """Surface, Sound и буферы, достижимые из атрибутов игры (без общих модулей и классов)"""
+    seen = {id(s) for s in skip}
+    stack = [(obj, depth)]
+    while stack:
+        o, d = stack.pop()
+        if id(o) in seen: continue
+        seen.add(id(o))
+        if isinstance(o, (pygame.SurfaceType, pygame.mixer.Sound, bytes, bytearray, array.array)):
+            yield o
+        elif d <= 0 or isinstance(o, (str, int, float, type)) or inspect.ismodule(o) or callable(o):
+            continue
+        elif isinstance(o, dict):
+            stack.extend((v, d - 1) for v in o.values())
+        elif isinstance(o, (list, tuple, set, deque)):
+            stack.extend((v, d - 1) for v in o)
+        elif hasattr(o, "__dict__"):
+            stack.extend((v, d - 1) for v in vars(o).values())
+
+def resource_bytes(o):
+    if isinstance(o, pygame.SurfaceType):
+        return 0 if o.get_parent() is not None else o.get_width() * o.get_height() * o.get_bytesize()
+    if isinstance(o, pygame.mixer.Sound):
+        init = pygame.mixer.get_init()
+        if not init: return 0
+        freq, fmt, channels = init
+        return int(o.get_length() * freq * channels * abs(fmt) // 8)
+    if isinstance(o, array.array): return len(o) * o.itemsize
+    return len(o)
+
+class GameSlot:
+    """Запущенная игра: экземпляр, её часы, внутренняя поверхность (или None) и оценка занятой памяти"""
+    def __init__(self, entry, game, clock, target=None):
+        self.entry = entry
+        self.game = game
+        self.clock = clock
+        self.target = target
+        self.with_rects = "with_rects" in inspect.signature(game.run_frame).parameters
+        self.size = 0
+
+    def frame(self):
+        if self.with_rects: status, rects = self.game.run_frame(with_rects=True)
+        else: status, rects = self.game.run_frame(), None
+        if self.target and status == "RUNNING": rects = self.target.present(rects)
+        return status, rects
+
+    def resources(self, screen):
+        return walk_resources(self.game, skip=(screen,))
+
+    def suspend(self, screen):
+        # Освобождаем каналы микшера: звуки игры больше не играют
+        for res in self.resources(screen):
+            if isinstance(res, pygame.mixer.Sound): res.stop()
+        hook = getattr(self.game, "suspend", None)
+        if hook: hook()
+        self.size = sum(resource_bytes(r) for r in self.resources(screen))
+
+    def resume(self):
+        if self.target: self.target.invalidate()  # дисплей занимало меню хоста
+        controls = getattr(self.game, "controls", None)
+        if controls: controls.reset()
+        hook = getattr(self.game, "resume", None)
+        if hook: hook()
+
+class Host:
+    def __init__(self, root, size=(800, 480), fps=60, budget_mb=DEFAULT_BUDGET_MB, vsync=True, render="native"):
+        self.catalog = Catalog(root)
+        self.entries = self.catalog.scan()
+        self.fps = fps
+        self.budget = budget_mb * 1024 * 1024
+        self.screen = self.open_display(size, vsync)
+        self.clock = pygame.time.Clock()
+        self.controls = Controls()  # для меню хоста; у игр — свои
+        self.font = pygame.font.SysFont("Arial", 26, bold=True)
+        self.font_small = pygame.font.SysFont("Arial", 16)
+        self.current = None
+        self.suspended = OrderedDict()  # папка -> GameSlot, самый давний — первым
+        self.menu_index = 0
+        self.menu_key = None
+        self.message = ""
+        self.profiler = None
+        self.resume_ms = {}
+        self.saves = SnapshotStore()
+        self.last_save = 0.0
+        self.attract = None  # GameSlot заставки
+        self.last_input = time.monotonic()
+        self.render = render  # native / sharp / smooth
+
+    def open_display(self, size, vsync):
+        # vsync в pygame 2 работает только с SCALED/OPENGL; без поддержки — обычное окно
+        if vsync:
+            try: return pygame.display.set_mode(size, pygame.SCALED, vsync=1)
+            except pygame.error: pass
+        return pygame.display.set_mode(size)
+
+    # --- ВНУТРЕННЕЕ РАЗРЕШЕНИЕ ---
+    def make_target(self, entry):
+        # Только уменьшение работы: внутренняя поверхность не больше дисплея
+        size = parse_size(entry.meta.get("resolution"))
+        if self.render == "native" or size is None: return None
+        w, h = self.screen.get_size()
+        if size[0] > w or size[1] > h or size == (w, h): return None
+        return RenderTarget(self.screen, size, self.render)
+
+    def slots(self):
+        if self.current: yield self.current
+        if self.attract: yield self.attract
+        yield from self.suspended.values()
+
+    def cycle_render(self):
+        """F4: следующее качество; sharp/smooth сразу применяются к играм с внутренней поверхностью,
+        native — к следующим запускам"""
+        self.render = QUALITIES[(QUALITIES.index(self.render) + 1) % len(QUALITIES)]
+        for slot in self.slots():
+            if slot.target: slot.target.set_quality(self.render)
+        print(f"[host] render: {self.render}")
+
+    # --- ЖИЗНЕННЫЙ ЦИКЛ ИГР ---
+    def launch(self, entry):
+        t0 = time.perf_counter()
+        slot = self.suspended.pop(entry.folder, None)
+        if slot is not None:
+            slot.resume()
+            self.resume_ms[entry.folder] = (time.perf_counter() - t0) * 1000
+            print(f"[host] {entry.folder}: resumed in {self.resume_ms[entry.folder]:.2f} ms")
+        else:
+            try:
+                cls = entry.game_class()
+                clock = HostClock(self.fps)
+                target = self.make_target(entry)
+                game = cls(target.surface if target else self.screen)
+            except Exception as e:
+                self.message = f"{entry.title}: {e}"
+                return
+            game.clock = clock
+            if hasattr(game, "fps"): game.fps = self.fps
+            slot = GameSlot(entry, game, clock, target)
+            self.restore(slot)
+            print(f"[host] {entry.folder}: started in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        if self.profiler: slot.game.profiler = self.profiler
+        self.current = slot
+        self.message = ""
+        self.last_save = time.monotonic()
+
+    # --- СНИМКИ ---
+    def restore(self, slot):
+        data = self.saves.load(slot.entry.folder) if hasattr(slot.game, "restore") else None
+        if not data: return
+        try: slot.game.restore(data)
+        except ValueError as e:
+            print(f"[host] {slot.entry.folder}: snapshot ignored ({e})")
+            self.saves.delete(slot.entry.folder)
+
+    def save(self, slot):
+        # Сборка байтов — в кадре (микросекунды), запись с fsync — в фоновом потоке
+        if hasattr(slot.game, "snapshot"): self.saves.save(slot.entry.folder, slot.game.snapshot())
+        self.last_save = time.monotonic()
+
+    def suspend_current(self):
+        slot, self.current = self.current, None
+        self.save(slot)
+        slot.suspend(self.screen)
+        slot.game.profiler = None
+        self.suspended[slot.entry.folder] = slot
+        self.enforce_budget()
+        self.menu_key = None
+
+    def close_current(self):
+        # Выход из игры — партия закончена, снимок больше не нужен
+        slot, self.current = self.current, None
+        slot.suspend(self.screen)
+        self.saves.delete(slot.entry.folder)
+        self.menu_key = None
+
+    def enforce_budget(self):
+        # Вытесняем самые давно приостановленные игры, пока не влезем в бюджет
+        while self.suspended and sum(s.size for s in self.suspended.values()) > self.budget:
+            folder, slot = self.suspended.popitem(last=False)
+            print(f"[host] {folder}: evicted ({slot.size / 1048576:.1f} MB)")
+
+    # --- КАДР ---
+    def pump_host_events(self):
+        """Забирает события хоста (QUIT, F3), остальное возвращает в очередь для игры"""
+        rest = []
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT: return False
+            if ev.type == pygame.KEYDOWN and ev.key == pygame.K_F4: self.cycle_render(); continue
+            if self.profiler and self.profiler.handle_event(ev): continue
+            rest.append(ev)
+        for ev in rest: pygame.event.post(ev)
+        return True
+
+    def game_frame(self):
+        slot = self.current
+        status, rects = slot.frame()
+        if status == "HOME": self.suspend_current(); return None
+        if status == "EXIT": self.close_current(); return None
+        return rects
+
+    # --- ЗАСТАВКА ---
+    def start_attract(self):
+        self.last_input = time.monotonic()
+        entry = next((e for e in self.entries if e.meta.get("demo", "") not in ("", "0")), None)
+        if entry is None: return
+        try:
+            clock = HostClock(self.fps)
+            target = self.make_target(entry)
+            game = entry.game_class()(target.surface if target else self.screen, demo=True)
+        except Exception as e:
+            print(f"[host] {entry.folder}: demo failed ({e})")
+            return
+        game.clock = clock
+        if hasattr(game, "fps"): game.fps = self.fps
+        self.attract = GameSlot(entry, game, clock, target)
+
+    def stop_attract(self):
+        slot, self.attract = self.attract, None
+        slot.suspend(self.screen)  # остановить звуки; экземпляр заставки не храним
+        self.last_input = time.monotonic()
+        self.menu_key = None
+
+    def attract_frame(self):
+        status, rects = self.attract.frame()
+        if status != "RUNNING": self.stop_attract(); return
+        if rects is None: pygame.display.flip()
+        elif rects: pygame.display.update(rects)
+
+    def launcher_frame(self):
+        events = self.controls.poll()
+        if events: self.last_input = time.monotonic()
+        elif time.monotonic() - self.last_input >= ATTRACT_AFTER: self.start_attract()
+        for ev in events:
+            if ev.type == pygame.KEYDOWN:
+                if ev.key == pygame.K_ESCAPE: return "EXIT"
+                if ev.key in (pygame.K_UP, pygame.K_DOWN): self.move_menu(-1 if ev.key == pygame.K_UP else 1)
+                if ev.key == pygame.K_RETURN: self.choose()
+            elif ev.type == pygame.JOYHATMOTION and ev.value[1]:
+                self.move_menu(-ev.value[1])
+            elif ev.type == pygame.JOYBUTTONDOWN:
+                if ev.button == 0: self.choose()
+                if ev.button == 1: return "EXIT"
+        if self.current is None: self.draw_launcher()
+        return None
+
+    def move_menu(self, step):
+        if self.entries: self.menu_index = (self.menu_index + step) % len(self.entries)
+
+    def choose(self):
+        if self.entries: self.launch(self.entries[self.menu_index])
+
+    def draw_launcher(self):
+        key = (self.menu_index, tuple(self.suspended), self.message)
+        if key == self.menu_key: return
+        self.menu_key = key
+        w, h = self.screen.get_size()
+        self.screen.fill((10, 10, 15))
+        draw_text(self.screen, self.font, "iXStore", (0, 200, 255), topleft=(30, 20))
+        for i, e in enumerate(self.entries):
+            color = (255, 255, 255) if i == self.menu_index else (120, 120, 130)
+            label = e.title + ("  (paused)" if e.folder in self.suspended else "")
+            draw_text(self.screen, self.font, label, color, topleft=(50, 80 + i * 40))
+        if self.message:
+            draw_text(self.screen, self.font_small, self.message, (255, 80, 80), bottomleft=(30, h - 20))
+        pygame.display.flip()
+
+    def run(self):
+        while True:
+            slot = self.current
+            active = slot or self.attract
+            rate = active.clock.requested if active else LAUNCHER_FPS
+            dt = self.clock.tick(rate)
+            if not self.pump_host_events(): return 0
+            if slot is None and self.attract:
+                self.attract.clock.dt = dt
+                self.attract_frame()
+                continue
+            if slot is None:
+                if self.launcher_frame() == "EXIT": return 0
+                continue
+            slot.clock.dt = dt
+            # Картинка под оверлеем прошлого кадра — до того, как игра нарисует поверх свои rects
+            restored = self.profiler.restore(self.screen) if self.profiler else None
+            rects = self.game_frame()
+            if self.current is None: continue
+            self.present(rects, restored)
+            if time.monotonic() - self.last_save >= SNAPSHOT_EVERY: self.save(self.current)
+
+    def shutdown(self):
+        if self.current: self.save(self.current)
+        for slot in self.suspended.values(): self.save(slot)
+        writer().flush()
+
+    def present(self, rects, restored=None):
+        """rects игры (None — flip); restored — место оверлея прошлого кадра, уже без него"""
+        prof = self.profiler
+        if prof: prof.mark("flip")
+        over = prof.draw(self.screen) if prof else None
+        if rects is not None:
+            # Оверлей держится на экране до следующего кадра: его место — в rects этого
+            rects = list(rects) + [r for r in (restored, over) if r is not None]
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        if prof: prof.end_frame()
+        controls = getattr(self.current.game, "controls", None)
+        if controls: controls.presented()
+
+def main(argv=None):
+    import argparse
+    from .profiler import FrameProfiler
+    ap = argparse.ArgumentParser(description="iXStore host: shared frame loop with warm suspend/resume")
+    ap.add_argument("root", nargs="?", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    ap.add_argument("--size", default="800x480")
+    ap.add_argument("--fps", type=int, default=60)
+    ap.add_argument("--budget", type=int, default=DEFAULT_BUDGET_MB, help="MB for suspended games")
+    ap.add_argument("--no-vsync", action="store_true")
+    ap.add_argument("--render", choices=QUALITIES, default="native",
+                    help="internal-resolution scaling for games with resolution= in loader.ini (F4 cycles)")
+    args = ap.parse_args(argv)
+    pygame.init()
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    host = Host(args.root, size, args.fps, args.budget, vsync=not args.no_vsync, render=args.render)
+    host.profiler = FrameProfiler()  # пишет только после F3
+    try:
+        return host.run()
+    finally:
+        host.shutdown()
+        pygame.quit()
+
+if __name__ == "__main__":
+    sys.exit(main())
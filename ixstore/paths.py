@@ -0,0 +1,16 @@
+"""Пути к пользовательскому кэшу iXStore"""
+import os
+
+def cache_dir(*parts):
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "ixstore", *parts)
+
+def write_atomic(path, data):
+    """Запись через временный файл + os.replace: при сбое старая версия остаётся целой"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
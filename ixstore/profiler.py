@@ -0,0 +1,174 @@
+"""
+Покадровый профайлер по фазам (ожидание, ввод, логика, отрисовка, flip)
+с кольцевым буфером, счётчиками, оверлеем-графиком и экспортом в JSON.
+
+Игры не импортируют модуль: у них есть атрибут profiler (по умолчанию None)
+и метки `if prof: prof.mark("update")` — без профайлера это одна проверка.
+Хост подставляет экземпляр и закрывает кадр после flip:
+
+    prof = FrameProfiler(); prof.enable()
+    game.profiler = prof
+    game.run_frame()
+    prof.mark("flip"); pygame.display.flip(); prof.end_frame()
+    prof.draw(screen)          # оверлей (F3 — prof.handle_event)
+    prof.export("frames.json")
+
+Счётчики gc0 и blocks пишутся всегда. draw_calls и surfaces увеличивает тот, кто
+считает вызовы: bench --profile подменяет pygame только в модуле игры, сам профайлер
+pygame не трогает.
+"""
+import array
+import gc
+import json
+import sys
+import time
+
+import pygame
+
+PHASES = ("wait", "input", "update", "draw", "flip")
+COUNTERS = ("draw_calls", "surfaces", "gc0", "blocks")
+PHASE_COLORS = {"wait": (60, 60, 70), "input": (255, 200, 0), "update": (0, 200, 255),
+                "draw": (0, 255, 120), "flip": (255, 60, 120)}
+BUDGET_MS = 1000 / 60
+
+def _percentile(sorted_vals, p):
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * p / 100))]
+
+class FrameProfiler:
+    def __init__(self, size=600):
+        self.size = size
+        self.enabled = False
+        self.visible = False
+        self.times = {p: array.array('f', bytes(4 * size)) for p in PHASES}
+        self.counts = {c: array.array('i', bytes(4 * size)) for c in COUNTERS}
+        self.frames = 0        # сколько кадров записано всего
+        self.row = dict.fromkeys(PHASES, 0.0)
+        self.phase = None
+        self.t_phase = 0.0
+        self.t_end = None      # конец прошлого кадра: отсюда до первой метки — ожидание
+        self.draw_calls = 0    # увеличиваются снаружи (bench --profile)
+        self.surfaces = 0
+        self.base = None
+        self.under = None
+        self.font = None
+        self.stats = None
+
+    # --- ВКЛЮЧЕНИЕ И СЧЁТЧИКИ ---
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.phase = None
+        self.t_end = None
+
+    def snapshot(self):
+        return (self.draw_calls, self.surfaces, gc.get_stats()[0]["collections"], sys.getallocatedblocks())
+
+    # --- МЕТКИ КАДРА ---
+    def mark(self, phase):
+        """Начало фазы phase (конец предыдущей). "input" открывает новый кадр"""
+        if not self.enabled: return
+        t = time.perf_counter()
+        if phase == "input":
+            if self.phase is not None: self.end_frame(t)
+            self.row = dict.fromkeys(PHASES, 0.0)
+            if self.t_end is not None: self.row["wait"] = (t - self.t_end) * 1000
+            self.base = self.snapshot()
+        elif self.phase is not None:
+            self.row[self.phase] += (t - self.t_phase) * 1000
+        else:
+            return  # кадр не открыт (профайлер включили посреди кадра)
+        self.phase = phase
+        self.t_phase = t
+
+    def end_frame(self, t=None):
+        if not self.enabled or self.phase is None: return
+        if t is None: t = time.perf_counter()
+        self.row[self.phase] += (t - self.t_phase) * 1000
+        i = self.frames % self.size
+        for p in PHASES: self.times[p][i] = self.row[p]
+        for c, before, after in zip(COUNTERS, self.base, self.snapshot()):
+            self.counts[c][i] = after - before
+        self.frames += 1
+        self.phase = None
+        self.t_end = t
+
+    # --- ДАННЫЕ ---
+    def rows(self):
+        """Кадры из буфера в хронологическом порядке: [{фаза: мс, счётчик: n}]"""
+        n = min(self.frames, self.size)
+        start = self.frames - n
+        out = []
+        for k in range(start, self.frames):
+            i = k % self.size
+            row = {p: round(self.times[p][i], 4) for p in PHASES}
+            row.update({c: self.counts[c][i] for c in COUNTERS})
+            out.append(row)
+        return out
+
+    def summary(self):
+        rows = self.rows()
+        if not rows: return {}
+        out = {}
+        for key in PHASES + ("total",):
+            vals = sorted(sum(r[p] for p in PHASES if p != "wait") if key == "total" else r[key] for r in rows)
+            out[key] = {"p50": round(_percentile(vals, 50), 4), "p99": round(_percentile(vals, 99), 4),
+                        "max": round(vals[-1], 4)}
+        for c in COUNTERS:
+            out[c] = {"mean": round(sum(r[c] for r in rows) / len(rows), 3), "max": max(r[c] for r in rows)}
+        return out
+
+    def export(self, path, **meta):
+        """JSON для офлайн-анализа: метаданные, сводка и все кадры буфера"""
+        from .paths import write_atomic
+        data = {"phases": list(PHASES), "counters": list(COUNTERS), "frames_total": self.frames,
+                "meta": meta, "summary": self.summary(), "frames": self.rows()}
+        write_atomic(path, json.dumps(data, indent=1).encode("utf-8"))
+
+    # --- ОВЕРЛЕЙ ---
+    def handle_event(self, event):
+        """F3 — показать/скрыть оверлей (и включить запись). True, если событие съедено"""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.visible = not self.visible
+            if self.visible and not self.enabled: self.enable()
+            return True
+        return False
+
+    def draw(self, surface, width=240, height=90):
+        """График времени кадров по фазам в правом верхнем углу; возвращает rect или None.
+        Под оверлеем сохраняется картинка — restore() вернёт её перед следующим кадром игры"""
+        self.under = None
+        if not self.visible or not self.frames: return None
+        if self.font is None: self.font = pygame.font.SysFont("Arial", 12)
+        rect = pygame.Rect(surface.get_width() - width - 4, 4, width, height)
+        self.under = (surface.subsurface(rect).copy(), rect)
+        surface.fill((0, 0, 0), rect)
+        scale = (height - 16) / (2 * BUDGET_MS)  # по высоте — два кадровых бюджета
+        n = min(self.frames, width, self.size)
+        for k in range(n):
+            i = (self.frames - n + k) % self.size
+            x, y = rect.x + width - n + k, rect.bottom
+            for p in PHASES[1:]:
+                h = self.times[p][i] * scale
+                if h <= 0: continue
+                top = max(rect.y + 16, y - h)
+                pygame.draw.line(surface, PHASE_COLORS[p], (x, y - 1), (x, top))
+                y = top
+        budget_y = rect.bottom - int(BUDGET_MS * scale)
+        pygame.draw.line(surface, (120, 120, 120), (rect.x, budget_y), (rect.right - 1, budget_y))
+        if self.stats is None or self.frames % 30 == 0: self.stats = self.summary()
+        st = self.stats
+        text = f"p50 {st['total']['p50']:.2f}  p99 {st['total']['p99']:.2f} ms"
+        if st["draw_calls"]["max"]: text += f"  draws {st['draw_calls']['mean']:.0f}"
+        surface.blit(self.font.render(text, True, (230, 230, 230)), (rect.x + 3, rect.y + 2))
+        return rect
+
+    def restore(self, surface):
+        """Возвращает картинку под оверлеем до того, как игра нарисует следующий кадр
+        (для игр с dirty rects); rect для обновления в этом кадре или None"""
+        if self.under is None: return None
+        img, rect = self.under
+        surface.blit(img, rect)
+        self.under = None
+        return rect
@@ -0,0 +1,90 @@
+"""
+Внутреннее разрешение: игра рисует в поверхность фиксированного размера
+(resolution="640x360" в loader.ini), хост переносит кадр на дисплей одним
+проходом масштабирования. Заливки и оверлеи игры стоят по внутреннему
+размеру, а не по размеру панели.
+
+Качество (меняется на ходу, F4 в хосте):
+    native — без внутренней поверхности, игра рисует прямо на дисплей
+    sharp  — transform.scale с целым множителем (чёткие пиксели, поля по краям);
+             изменившиеся rects игры масштабируются по отдельности
+    smooth — transform.smoothscale во весь экран с сохранением пропорций
+
+    target = RenderTarget(display, (640, 360), "sharp")
+    game = cls(target.surface)
+    rects = target.present(rects)   # rects дисплея; None — нужен flip
+"""
+import pygame
+
+QUALITIES = ("native", "sharp", "smooth")
+BORDER = (0, 0, 0)
+
+def parse_size(text):
+    """'640x360' -> (640, 360); пусто или мусор — None"""
+    try:
+        w, h = (int(v) for v in (text or "").lower().split("x"))
+    except ValueError:
+        return None
+    return (w, h) if w > 0 and h > 0 else None
+
+def fit(src, dst, integer):
+    """Место картинки src на дисплее dst: по центру, с сохранением пропорций;
+    integer — наибольший целый множитель (если влезает хотя бы 1:1)"""
+    sw, sh = src
+    dw, dh = dst
+    k = min(dw // sw, dh // sh) if integer else 0
+    if k >= 1: w, h = sw * k, sh * k
+    else:
+        scale = min(dw / sw, dh / sh)
+        w, h = max(1, int(sw * scale)), max(1, int(sh * scale))
+    return pygame.Rect((dw - w) // 2, (dh - h) // 2, w, h)
+
+class RenderTarget:
+    def __init__(self, display, size, quality="sharp"):
+        self.display = display
+        self.surface = pygame.Surface(size, 0, display)  # формат дисплея — scale без конвертации
+        self.set_quality(quality)
+
+    def set_quality(self, quality):
+        if quality == "native": quality = "sharp"  # уже запущенная игра остаётся на своей поверхности
+        # smoothscale работает только с 24/32 бит
+        if quality == "smooth" and self.surface.get_bitsize() < 24: quality = "sharp"
+        self.quality = quality
+        self.dest = fit(self.surface.get_size(), self.display.get_size(), quality == "sharp")
+        self.view = self.display.subsurface(self.dest)
+        w = self.surface.get_width()
+        self.factor = self.dest.w // w if quality == "sharp" and self.dest.w % w == 0 else 0  # 0 — не целый
+        self.full = True  # поля и весь кадр — при следующем present
+
+    def invalidate(self):
+        """Дисплей перерисовывал кто-то другой (меню хоста) — следующий present переносит всё"""
+        self.full = True
+
+    def present(self, rects):
+        """Переносит кадр игры на дисплей. rects игры (None — весь кадр) ->
+        rects дисплея для display.update, None — нужен display.flip()"""
+        if self.full:
+            self.display.fill(BORDER)
+            self.full = False
+            self.scale_all()
+            return None
+        if rects is None:
+            self.scale_all()
+            return None
+        if not rects: return rects
+        if not self.factor:
+            # Сглаживание и дробный множитель цепляют соседние пиксели — кадр целиком, одним проходом
+            self.scale_all()
+            return [self.dest]
+        k, bounds, out = self.factor, self.surface.get_rect(), []
+        for r in rects:
+            r = bounds.clip(r)
+            if not r.width or not r.height: continue
+            d = pygame.Rect(r.x * k, r.y * k, r.width * k, r.height * k)
+            pygame.transform.scale(self.surface.subsurface(r), d.size, self.view.subsurface(d))
+            out.append(d.move(self.dest.topleft))
+        return out
+
+    def scale_all(self):
+        scale = pygame.transform.smoothscale if self.quality == "smooth" else pygame.transform.scale
+        scale(self.surface, self.dest.size, self.view)
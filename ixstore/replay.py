@@ -0,0 +1,277 @@
+"""
+Детерминированная запись ввода и повтор на максимальной скорости.
+
+Лог — компактный бинарный файл: заголовок (игра, seed, число джойстиков),
+dt каждого кадра (array 'H') и события ввода (array 'i', по 5 чисел:
+кадр, тип, a, b, c). Время игры при записи и повторе — сумма dt кадров,
+get_pressed()/джойстики читаются из состояния, собранного по событиям,
+поэтому повтор через run_frame даёт ту же партию.
+
+    python -m ixstore.replay record tetris session.ixr
+    python -m ixstore.replay play session.ixr [--render]
+"""
+import array
+import os
+import struct
+import sys
+import time
+
+import pygame
+
+MAGIC = b"IXRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHqBB")  # magic, version, seed, джойстики, длина имени
+EVENT_SIZE = 5
+
+# Коды событий в логе
+QUIT, KEYDOWN, KEYUP, JOYBUTTONDOWN, JOYBUTTONUP, JOYHATMOTION, JOYAXISMOTION = range(7)
+
+class InputLog:
+    def __init__(self, game="", seed=0, n_joy=0):
+        self.game = game
+        self.seed = seed
+        self.n_joy = n_joy
+        self.dts = array.array('H')
+        self.events = array.array('i')
+
+    @property
+    def frames(self):
+        return len(self.dts)
+
+    def add_event(self, tick, code, a=0, b=0, c=0):
+        self.events.extend((tick, code, a, b, c))
+
+    def save(self, path):
+        name = self.game.encode("utf-8")[:255]
+        dts, events = array.array('H', self.dts), array.array('i', self.events)
+        if sys.byteorder == "big": dts.byteswap(); events.byteswap()
+        data = (HEADER.pack(MAGIC, VERSION, self.seed, self.n_joy, len(name)) + name +
+                struct.pack("<I", len(dts)) + dts.tobytes() +
+                struct.pack("<I", len(events)) + events.tobytes())
+        from .paths import write_atomic
+        write_atomic(path, data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, n_joy, name_len = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not an input log (or unsupported version)")
+        pos = HEADER.size
+        log = cls(data[pos:pos + name_len].decode("utf-8"), seed, n_joy)
+        pos += name_len
+        n, = struct.unpack_from("<I", data, pos); pos += 4
+        log.dts.frombytes(data[pos:pos + 2 * n]); pos += 2 * n
+        n, = struct.unpack_from("<I", data, pos); pos += 4
+        log.events.frombytes(data[pos:pos + 4 * n])
+        if sys.byteorder == "big": log.dts.byteswap(); log.events.byteswap()
+        return log
+
+# --- СОСТОЯНИЕ ВВОДА ---
+def encode_event(ev):
+    """pygame-событие -> (код, a, b, c) или None, если оно не влияет на игру"""
+    t = ev.type
+    if t == pygame.QUIT: return QUIT, 0, 0, 0
+    if t == pygame.KEYDOWN: return KEYDOWN, ev.key, 0, 0
+    if t == pygame.KEYUP: return KEYUP, ev.key, 0, 0
+    if t == pygame.JOYBUTTONDOWN: return JOYBUTTONDOWN, ev.joy, ev.button, 0
+    if t == pygame.JOYBUTTONUP: return JOYBUTTONUP, ev.joy, ev.button, 0
+    if t == pygame.JOYHATMOTION: return JOYHATMOTION, ev.joy, ev.hat, (ev.value[0] + 1) * 3 + ev.value[1] + 1
+    if t == pygame.JOYAXISMOTION: return JOYAXISMOTION, ev.joy, ev.axis, int(ev.value * 32767)
+    return None
+
+def decode_event(code, a, b, c):
+    if code == QUIT: return pygame.event.Event(pygame.QUIT)
+    if code in (KEYDOWN, KEYUP):
+        return pygame.event.Event(pygame.KEYDOWN if code == KEYDOWN else pygame.KEYUP, key=a, mod=0, unicode="", scancode=0)
+    if code in (JOYBUTTONDOWN, JOYBUTTONUP):
+        return pygame.event.Event(pygame.JOYBUTTONDOWN if code == JOYBUTTONDOWN else pygame.JOYBUTTONUP,
+                                  joy=a, instance_id=a, button=b)
+    if code == JOYHATMOTION:
+        return pygame.event.Event(pygame.JOYHATMOTION, joy=a, instance_id=a, hat=b, value=(c // 3 - 1, c % 3 - 1))
+    return pygame.event.Event(pygame.JOYAXISMOTION, joy=a, instance_id=a, axis=b, value=c / 32767)
+
+class KeyState:
+    """Замена pygame.key.get_pressed(): индексируется кодом клавиши"""
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+class VirtualJoystick:
+    """Джойстик, чьи оси/крестовины/кнопки собраны из событий лога"""
+    def __init__(self, index, state):
+        self.index = index
+        self.state = state
+
+    def get_instance_id(self): return self.index
+    def get_init(self): return True
+    def get_numaxes(self): return 6
+    def get_numhats(self): return 1
+    def get_axis(self, i): return self.state.axes.get((self.index, i), 0.0)
+    def get_hat(self, i): return self.state.hats.get((self.index, i), (0, 0))
+    def get_button(self, i): return (self.index, i) in self.state.buttons
+
+class InputState:
+    def __init__(self):
+        self.keys = set()
+        self.buttons = set()
+        self.axes = {}
+        self.hats = {}
+
+    def apply(self, code, a, b, c):
+        if code == KEYDOWN: self.keys.add(a)
+        elif code == KEYUP: self.keys.discard(a)
+        elif code == JOYBUTTONDOWN: self.buttons.add((a, b))
+        elif code == JOYBUTTONUP: self.buttons.discard((a, b))
+        elif code == JOYHATMOTION: self.hats[(a, b)] = (c // 3 - 1, c % 3 - 1)
+        elif code == JOYAXISMOTION: self.axes[(a, b)] = c / 32767
+
+    def get_pressed(self):
+        return KeyState(self.keys)
+
+# --- СЕССИИ ---
+class LogClock:
+    """Часы сессии: при записи берут dt у настоящих часов и пишут в лог,
+    при повторе отдают записанные dt без ожидания"""
+    def __init__(self, log, real=None):
+        self.log = log
+        self.real = real
+        self.frame = 0
+        self.now = 0
+        self.last_dt = 0
+
+    def tick(self, framerate=0):
+        if self.real is not None:
+            dt = min(self.real.tick(framerate), 0xFFFF)
+            self.log.dts.append(dt)
+        else:
+            dt = self.log.dts[self.frame] if self.frame < len(self.log.dts) else 0
+        self.frame += 1
+        self.now += dt
+        self.last_dt = dt
+        return dt
+
+    def get_ticks(self): return self.now
+    def get_time(self): return self.last_dt
+    def get_fps(self): return 1000 / self.last_dt if self.last_dt else 0.0
+
+class Session:
+    """
+    Общая часть записи и повтора. Открывать ДО создания игры: на время сессии
+    pygame.time.get_ticks и pygame.key.get_pressed идут от часов и состояния лога.
+    """
+    def __init__(self, log, real_clock=None):
+        self.log = log
+        self.state = InputState()
+        self.clock = LogClock(log, real_clock)
+        self.game = None
+        self.saved = None
+
+    def __enter__(self):
+        self.saved = (pygame.time.get_ticks, pygame.key.get_pressed)
+        pygame.time.get_ticks = self.clock.get_ticks
+        pygame.key.get_pressed = self.state.get_pressed
+        return self
+
+    def __exit__(self, *exc):
+        pygame.time.get_ticks, pygame.key.get_pressed = self.saved
+        return False
+
+    def attach(self, game):
+        self.game = game
+        game.clock = self.clock
+        game.joysticks = [VirtualJoystick(i, self.state) for i in range(self.log.n_joy)]
+
+class Recorder(Session):
+    def __init__(self, game_name, seed, n_joy=None):
+        if n_joy is None: n_joy = pygame.joystick.get_count() if pygame.joystick.get_init() else 0
+        super().__init__(InputLog(game_name, seed, n_joy), pygame.time.Clock())
+
+    def run_frame(self):
+        """Забирает очередь событий, пишет их в лог, возвращает обратно и вызывает run_frame игры"""
+        tick = self.clock.frame
+        for ev in pygame.event.get():
+            enc = encode_event(ev)
+            if enc is not None:
+                self.log.add_event(tick, *enc)
+                self.state.apply(*enc)
+            pygame.event.post(ev)
+        return self.game.run_frame()
+
+class Replayer(Session):
+    def __init__(self, log):
+        super().__init__(log)
+        self.pos = 0
+
+    def run_frame(self):
+        tick = self.clock.frame
+        ev = self.log.events
+        pygame.event.clear()
+        while self.pos < len(ev) and ev[self.pos] <= tick:
+            code, a, b, c = ev[self.pos + 1:self.pos + EVENT_SIZE]
+            self.state.apply(code, a, b, c)
+            pygame.event.post(decode_event(code, a, b, c))
+            self.pos += EVENT_SIZE
+        return self.game.run_frame()
+
+    def run(self, render=False):
+        """Повтор всего лога без ограничения скорости; отрисовка по желанию"""
+        self.game.render_enabled = render
+        status = "RUNNING"
+        while self.clock.frame < self.log.frames:
+            status = self.run_frame()
+            if render: pygame.display.flip()
+            if status != "RUNNING": break
+        return status
+
+def replay(game_class, log, screen, render=False):
+    with Replayer(log) as rp:
+        game = game_class(screen, seed=log.seed)
+        rp.attach(game)
+        t0 = time.perf_counter()
+        status = rp.run(render)
+        return game, status, time.perf_counter() - t0
+
+def main(argv=None):
+    import argparse
+    from .bench import GAMES, load_game_class
+    ap = argparse.ArgumentParser(description="Record or replay an input log")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("game", choices=list(GAMES))
+    rec.add_argument("path")
+    rec.add_argument("--seed", type=int, default=None)
+    rec.add_argument("--size", default="800x480")
+    play = sub.add_parser("play")
+    play.add_argument("path")
+    play.add_argument("--render", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "play":
+        if not args.render: os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.init()
+        log = InputLog.load(args.path)
+        screen = pygame.display.set_mode((800, 480))
+        game, status, dt = replay(load_game_class(log.game), log, screen, args.render)
+        print(f"{log.game}: {log.frames} frames ({sum(log.dts) / 1000:.1f} s of play) replayed in {dt:.2f} s, "
+              f"status {status}, score {getattr(game, 'score', None)}")
+        return 0
+
+    pygame.init()
+    screen = pygame.display.set_mode(tuple(int(v) for v in args.size.split("x")))
+    seed = args.seed if args.seed is not None else int(time.time())
+    with Recorder(args.game, seed) as rec:
+        game = load_game_class(args.game)(screen, seed=seed)
+        rec.attach(game)
+        while rec.run_frame() == "RUNNING":
+            pygame.display.flip()
+    rec.log.save(args.path)
+    print(f"saved {rec.log.frames} frames, {len(rec.log.events) // EVENT_SIZE} events to {args.path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Сохранения: снимки состояния игр и таблица рекордов.
+
+Снимок — байты от game.snapshot() (формат у каждой игры свой, компактный,
+через struct/array). Главный поток только собирает байты; запись с fsync
+и os.replace делает фоновый поток, так что периодическое сохранение
+не даёт просадок кадра. Из очереди пишется только последний снимок игры.
+
+Рекорды — журнал только на дозапись: запись = crc32 + длина + (очки, время, игра),
+каждая дозапись с fsync. После сбоя питания недописанный хвост отбрасывается
+по crc при чтении; раз в COMPACT_EVERY записей журнал сжимается до TOP_N лучших
+на игру атомарной перезаписью.
+
+    store = high_scores()
+    best = store.submit("tetris", 1200)
+"""
+import array
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from .paths import cache_dir, write_atomic
+
+# --- ФОНОВАЯ ЗАПИСЬ ---
+class BackgroundWriter:
+    """Поток записи: задачи по ключу (новая вытесняет ещё не записанную) в порядке поступления"""
+    def __init__(self):
+        self.jobs = OrderedDict()
+        self.lock = threading.Condition()
+        self.thread = None
+        self.busy = False
+        self.errors = []
+
+    def submit(self, key, fn, *args):
+        with self.lock:
+            self.jobs.pop(key, None)
+            self.jobs[key] = (fn, args)
+            if self.thread is None: self.start()
+            self.lock.notify()
+
+    def start(self):
+        # Вызывается под self.lock
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try: self.loop()
+        finally:
+            # Сбой потока: flush не ждать, оставшиеся задачи — новому потоку
+            with self.lock:
+                if self.thread is threading.current_thread():
+                    self.thread = None
+                    if self.jobs: self.start()
+                self.busy = False
+                self.lock.notify_all()
+
+    def loop(self):
+        while True:
+            with self.lock:
+                while not self.jobs:
+                    self.busy = False
+                    self.lock.notify_all()
+                    if not self.lock.wait(timeout=5.0) and not self.jobs:
+                        # Простой: решение и сброс thread под одним lock — следующий submit запустит новый поток
+                        self.thread = None
+                        return
+                _, (fn, args) = self.jobs.popitem(last=False)
+                self.busy = True
+            try: fn(*args)
+            except Exception as e:
+                # Ошибка одной задачи не останавливает запись остальных
+                print(f"[saves] write failed: {e!r}")
+                self.errors.append(e)
+
+    def flush(self, timeout=5.0):
+        """Дождаться записи всего, что уже в очереди (выход из хоста)"""
+        end = time.monotonic() + timeout
+        with self.lock:
+            while self.jobs or self.busy:
+                left = end - time.monotonic()
+                if left <= 0: return False
+                self.lock.wait(left)
+        return True
+
+_writer = None
+
+def writer():
+    global _writer
+    if _writer is None: _writer = BackgroundWriter()
+    return _writer
+
+# --- СНИМКИ ---
+class SnapshotStore:
+    def __init__(self, root=None):
+        self.root = root or cache_dir("saves")
+
+    def path(self, name):
+        return os.path.join(self.root, name + ".snap")
+
+    def save(self, name, data):
+        writer().submit(("snap", name), write_atomic, self.path(name), data)
+
+    def load(self, name):
+        try:
+            with open(self.path(name), "rb") as f: return f.read()
+        except OSError:
+            return None
+
+    def delete(self, name):
+        writer().submit(("snap", name), _remove, self.path(name))
+
+def _remove(path):
+    try: os.remove(path)
+    except FileNotFoundError: pass
+
+def pack_rng(rng):
+    # Состояние random.Random (Mersenne Twister) для снимка: 624 слова + индекс
+    return array.array('I', rng.getstate()[1]).tobytes()
+
+def unpack_rng(rng, data):
+    rng.setstate((3, tuple(array.array('I', data)), None))
+
+# --- РЕКОРДЫ ---
+RECORD_HEAD = struct.Struct("<IH")   # crc32 данных, длина данных
+RECORD_BODY = struct.Struct("<qd")   # очки, время (unix)
+TOP_N = 10
+COMPACT_EVERY = 256
+
+def encode_record(game, score, ts):
+    body = RECORD_BODY.pack(score, ts) + game.encode("utf-8")[:255]
+    return RECORD_HEAD.pack(zlib.crc32(body), len(body)) + body
+
+def decode_records(data):
+    """[(игра, очки, время)] и длина целой части журнала (дальше — оборванный хвост)"""
+    out, pos = [], 0
+    while pos + RECORD_HEAD.size <= len(data):
+        crc, n = RECORD_HEAD.unpack_from(data, pos)
+        end = pos + RECORD_HEAD.size + n
+        body = data[pos + RECORD_HEAD.size:end]
+        if n < RECORD_BODY.size or len(body) < n or zlib.crc32(body) != crc: break
+        score, ts = RECORD_BODY.unpack_from(body)
+        out.append((body[RECORD_BODY.size:].decode("utf-8", "replace"), score, ts))
+        pos = end
+    return out, pos
+
+class ScoreStore:
+    def __init__(self, path=None, top_n=TOP_N, compact_every=COMPACT_EVERY):
+        self.path = path or cache_dir("scores.log")
+        self.top_n = top_n
+        self.compact_every = compact_every
+        self.lock = threading.Lock()      # таблица: главный поток и поток записи (сжатие)
+        self.io_lock = threading.Lock()   # файл журнала: дозапись и сжатие
+        self.scores = {}   # игра -> [(очки, время)] по убыванию, не длиннее top_n
+        self.records = 0   # записей в журнале с последнего сжатия
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f: data = f.read()
+        except OSError:
+            data = b""
+        records, good = decode_records(data)
+        if good < len(data):
+            # Оборванная запись (питание пропало посреди write) — отрезаем
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+        for game, score, ts in records: self.add(game, score, ts)
+        self.records = len(records)
+        if self.records > self.compact_every: self.compact()
+
+    def add(self, game, score, ts):
+        with self.lock:
+            table = self.scores.setdefault(game, [])
+            if (score, ts) in table: return  # уже попало в журнал при сжатии
+            table.append((score, ts))
+            table.sort(key=lambda r: (-r[0], r[1]))
+            del table[self.top_n:]
+
+    def best(self, game):
+        with self.lock:
+            table = self.scores.get(game)
+            return table[0][0] if table else 0
+
+    def top(self, game):
+        with self.lock: return list(self.scores.get(game, ()))
+
+    def submit(self, game, score, sync=False):
+        """Запоминает результат, дописывает журнал (в фоне, либо сразу при sync); возвращает рекорд игры"""
+        ts = time.time()
+        self.add(game, score, ts)
+        record = encode_record(game, score, ts)
+        if sync: self.append(record)
+        else: writer().submit(("score", game, ts, score), self.append, record)
+        return self.best(game)
+
+    def append(self, record):
+        with self.io_lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, record)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.records += 1
+            if self.records > self.compact_every: self._compact()
+
+    def compact(self):
+        with self.io_lock: self._compact()
+
+    def _compact(self):
+        # В журнале остаются только лучшие top_n каждой игры; таблица копируется под lock, пишется без него
+        with self.lock:
+            rows = [(game, score, ts) for game, table in self.scores.items() for score, ts in table]
+        write_atomic(self.path, b"".join(encode_record(*row) for row in rows))
+        self.records = len(rows)
+
+_scores = None
+
+def high_scores():
+    """Общая таблица рекордов (открывается при первом обращении)"""
+    global _scores
+    if _scores is None: _scores = ScoreStore()
+    return _scores
@@ -0,0 +1,87 @@
+"""
+Общий кэш отрендеренного текста: Surface по ключу (шрифт, текст, цвет, сглаживание)
+с LRU-вытеснением. Числа собираются из заранее отрендеренной полосы цифр,
+поэтому меняющийся счёт не плодит новых Surface.
+
+    from ixstore.textcache import render_text, draw_text
+    label = render_text(font, "Next:", (240, 240, 240))
+    rect = draw_text(screen, font, f"Score: {score}", (240, 240, 240), topleft=(20, 20))
+"""
+import re
+from collections import OrderedDict
+
+import pygame
+
+DIGITS = "0123456789"
+_RUNS = re.compile(r"([0-9]+)")
+
+class TextCache:
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.strips = {}
+        self.hits = self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Готовая Surface строки; рендер только при первом обращении"""
+        key = (font, text, tuple(color), antialias)
+        surf = self.items.get(key)
+        if surf is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.items[key] = surf
+        if len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+        return surf
+
+    def digit_strip(self, font, color, antialias=True):
+        """Полоса '0123456789' и (x, ширина) каждой цифры в ней"""
+        key = (font, tuple(color), antialias)
+        strip = self.strips.get(key)
+        if strip is None:
+            surf = font.render(DIGITS, antialias, color)
+            spans, x = [], 0
+            for i in range(len(DIGITS)):
+                nx = font.size(DIGITS[:i + 1])[0]
+                spans.append((x, nx - x))
+                x = nx
+            strip = self.strips[key] = (surf, spans)
+        return strip
+
+    def layout(self, font, text, color, antialias=True):
+        """[(Surface, x, area)] и общая ширина: подписи целиком, цифры — кусками полосы"""
+        parts, x = [], 0
+        for i, run in enumerate(_RUNS.split(text)):
+            if not run: continue
+            if i % 2:  # цифры
+                strip, spans = self.digit_strip(font, color, antialias)
+                h = strip.get_height()
+                for ch in run:
+                    sx, w = spans[ord(ch) - 48]
+                    parts.append((strip, x, pygame.Rect(sx, 0, w, h)))
+                    x += w
+            else:
+                surf = self.render(font, run, color, antialias)
+                parts.append((surf, x, None))
+                x += font.size(run)[0]  # ширина Surface не учитывает хвостовые пробелы
+        return parts, x
+
+    def draw(self, dest, font, text, color, antialias=True, **anchor):
+        """Рисует строку на dest; anchor как у get_rect (topleft=, center=...). Возвращает Rect"""
+        parts, width = self.layout(font, text, color, antialias)
+        rect = pygame.Rect(0, 0, width, font.get_height())
+        for name, value in anchor.items(): setattr(rect, name, value)
+        dest.blits([(surf, (rect.x + x, rect.y), area) for surf, x, area in parts], False)
+        return rect
+
+    def clear(self):
+        self.items.clear()
+        self.strips.clear()
+
+# Общий экземпляр для всех игр
+text_cache = TextCache()
+render_text = text_cache.render
+draw_text = text_cache.draw
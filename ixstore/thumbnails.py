@@ -0,0 +1,209 @@
+"""
+Превью обложек: уменьшенные копии thumbnail.png нескольких стандартных размеров
+в дисковом кэше (ключ — sha1 содержимого, пересчёт при смене mtime/размера),
+декодирование в фоновом потоке в порядке «сначала видимые» и небольшой LRU
+готовых Surface в памяти.
+
+    python -m ixstore.thumbnails   # прогреть кэш для всей библиотеки
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from .paths import cache_dir, write_atomic
+
+SIZES = {
+    "small": (160, 90),
+    "medium": (320, 180),
+    "large": (640, 360),
+}
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_mtime(path):
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return None
+
+def fit_size(src, box):
+    # Вписываем с сохранением пропорций
+    sw, sh = src
+    bw, bh = box
+    k = min(bw / sw, bh / sh)
+    return max(1, round(sw * k)), max(1, round(sh * k))
+
+class ThumbnailCache:
+    def __init__(self, path=None, max_items=48):
+        self.path = path or cache_dir("thumbs")
+        self.max_items = max_items
+        self.surfaces = OrderedDict()  # (src, size) -> Surface, LRU
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()  # запись index.json; self.lock — только словарь в памяти
+        self.index = self.load_index()
+        self.pending = []              # heap (priority, seq, key)
+        self.queued = {}               # key -> лучший приоритет в очереди
+        self.failed = {}               # src -> mtime_ns исходника, который не удалось прочитать
+        self.seq = itertools.count()
+        self.wakeup = threading.Condition(self.lock)
+        self.done = queue.Queue()
+        self.closed = False
+        self.worker = None
+
+    # --- ИНДЕКС ИСХОДНИКОВ ---
+    def index_path(self):
+        return os.path.join(self.path, "index.json")
+
+    def load_index(self):
+        try:
+            with open(self.index_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        # Копия индекса под lock, запись с fsync — после: главный поток не ждёт диск в request()
+        with self.io_lock:
+            with self.lock: data = json.dumps(self.index).encode("utf-8")
+            try: write_atomic(self.index_path(), data)
+            except OSError: pass
+
+    def source_digest(self, src):
+        """sha1 исходника; хэш пересчитывается только если изменились mtime или размер"""
+        st = os.stat(src)
+        with self.lock:
+            meta = self.index.get(src)
+        if meta and meta["mtime"] == st.st_mtime_ns and meta["size"] == st.st_size:
+            return meta["sha1"]
+        digest = file_sha1(src)
+        with self.lock:
+            self.index[src] = {"mtime": st.st_mtime_ns, "size": st.st_size, "sha1": digest}
+        self.save_index()
+        return digest
+
+    # --- РЕНДЕР (фоновый поток) ---
+    def render(self, src, size):
+        """Возвращает (w, h, mode, bytes) превью; читает из кэша или создаёт"""
+        digest = self.source_digest(src)
+        box = SIZES[size]
+        for mode in ("RGB", "RGBA"):
+            cached = os.path.join(self.path, f"{digest}_{box[0]}x{box[1]}.{mode.lower()}")
+            try:
+                with open(cached, "rb") as f:
+                    data = f.read()
+                w, h = int.from_bytes(data[:2], "little"), int.from_bytes(data[2:4], "little")
+                if w and h and len(data) - 4 == w * h * len(mode): return w, h, mode, data[4:]
+                break  # обрезанный файл кэша — рендерим заново и перезаписываем
+            except OSError:
+                pass
+
+        img = pygame.image.load(src)
+        alpha = bool(img.get_flags() & pygame.SRCALPHA)
+        if img.get_bitsize() not in (24, 32):
+            tmp = pygame.Surface(img.get_size(), pygame.SRCALPHA if alpha else 0, 32)
+            tmp.blit(img, (0, 0))
+            img = tmp
+        w, h = fit_size(img.get_size(), box)
+        small = pygame.transform.smoothscale(img, (w, h))
+        mode = "RGBA" if alpha else "RGB"
+        data = pygame.image.tobytes(small, mode)
+        cached = os.path.join(self.path, f"{digest}_{box[0]}x{box[1]}.{mode.lower()}")
+        try: write_atomic(cached, w.to_bytes(2, "little") + h.to_bytes(2, "little") + data)
+        except OSError: pass
+        return w, h, mode, data
+
+    def run_worker(self):
+        while True:
+            with self.lock:
+                while not self.pending and not self.closed:
+                    self.wakeup.wait()
+                if self.closed: return
+                prio, _, key = heapq.heappop(self.pending)
+                if self.queued.get(key) != prio: continue  # устаревшая запись
+                del self.queued[key]
+            try: result = self.render(*key)
+            except (OSError, pygame.error, ValueError) as e:
+                print(f"Thumbnail error: {key[0]}: {e}")
+                with self.lock: self.failed[key[0]] = file_mtime(key[0])
+                result = None
+            self.done.put((key, result))
+
+    # --- API ГЛАВНОГО ПОТОКА ---
+    def request(self, src, size="medium", priority=0):
+        key = (src, size)
+        if key in self.surfaces: return
+        # Битый исходник не перечитываем каждый кадр — только после изменения файла
+        if src in self.failed and self.failed[src] == file_mtime(src): return
+        with self.lock:
+            old = self.queued.get(key)
+            if old is not None and old <= priority: return
+            self.queued[key] = priority
+            heapq.heappush(self.pending, (priority, next(self.seq), key))
+            self.wakeup.notify()
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.run_worker, daemon=True)
+            self.worker.start()
+
+    def prefetch(self, sources, size="medium"):
+        """Ставит в очередь в порядке списка: первыми — видимые на экране"""
+        for i, src in enumerate(sources):
+            self.request(src, size, i)
+
+    def get(self, src, size="medium", priority=0):
+        """Готовая Surface или None (превью поставлено в очередь)"""
+        key = (src, size)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            return surf
+        self.request(src, size, priority)
+        return None
+
+    def poll(self, limit=4):
+        """Переводит готовые превью в формат дисплея; вызывать раз за кадр"""
+        n = 0
+        while n < limit:
+            try: key, result = self.done.get_nowait()
+            except queue.Empty: break
+            n += 1
+            if result is None: continue
+            w, h, mode, data = result
+            surf = pygame.image.frombytes(data, (w, h), mode)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert_alpha() if mode == "RGBA" else surf.convert()
+            self.surfaces[key] = surf
+            self.surfaces.move_to_end(key)
+            while len(self.surfaces) > self.max_items:
+                self.surfaces.popitem(last=False)
+        return n
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.wakeup.notify_all()
+
+def main(argv=None):
+    from .catalog import Catalog
+    argv = sys.argv[1:] if argv is None else argv
+    root = argv[0] if argv else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cache = ThumbnailCache()
+    for entry in Catalog(root).scan():
+        if not entry.thumbnail: continue
+        for size in SIZES:
+            w, h, mode, _ = cache.render(entry.thumbnail, size)
+            print(f"{entry.folder:<16} {size:<7} {w}x{h} {mode}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
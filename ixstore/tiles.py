@@ -0,0 +1,113 @@
+"""
+Атлас плиток: каждая клетка (цвет, стиль, фон) рисуется один раз в маленькую
+Surface формата дисплея (convert), дальше поле, фигура или тело змейки
+выводятся одним dest.blits(...) вместо draw.rect на каждую клетку.
+Неоновые и светящиеся стили поэтому стоят столько же, сколько плоский прямоугольник.
+
+    atlas = tile_atlas(24)
+    tile = atlas.tile((0, 240, 240), "block")
+    atlas.draw(screen, [(x, y), ...], (0, 240, 240), "block")
+    screen.blits([(atlas.tile(c, "neon", bg), pos) for pos, c in cells], False)
+
+Плитка непрозрачная: фон под скруглениями и рамкой — цвет bg.
+"""
+import pygame
+
+STYLES = {}
+
+def style(name):
+    def register(paint):
+        STYLES[name] = paint
+        return paint
+    return register
+
+def scaled(color, k):
+    return tuple(min(255, int(c * k)) for c in color)
+
+def mix(a, b, t):
+    return tuple(int(x + (y - x) * t) for x, y in zip(a, b))
+
+# --- СТИЛИ ---
+# painter(surf, color, bg): surf уже залита bg, размер size×size
+@style("flat")
+def paint_flat(surf, color, bg):
+    surf.fill(color)
+
+@style("block")
+def paint_block(surf, color, bg):
+    # Заливка с чёрной рамкой в 1 пиксель (клетки Тетриса)
+    surf.fill(color)
+    pygame.draw.rect(surf, (0, 0, 0), surf.get_rect(), 1)
+
+@style("outline")
+def paint_outline(surf, color, bg):
+    pygame.draw.rect(surf, color, surf.get_rect(), 1)
+
+@style("round")
+def paint_round(surf, color, bg):
+    # Скругление size/5, зазор 1 пиксель справа и снизу (еда змейки)
+    size = surf.get_width()
+    pygame.draw.rect(surf, color, (0, 0, size - 1, size - 1), border_radius=max(1, size // 5))
+
+@style("soft")
+def paint_soft(surf, color, bg):
+    # То же, скругление size/10 (тело змейки)
+    size = surf.get_width()
+    pygame.draw.rect(surf, color, (0, 0, size - 1, size - 1), border_radius=max(1, size // 10))
+
+@style("neon")
+def paint_neon(surf, color, bg):
+    # Тёмная сердцевина, яркая рамка и светлый блик внутри
+    size = surf.get_width()
+    r = max(1, size // 6)
+    rect = pygame.Rect(0, 0, size - 1, size - 1)
+    pygame.draw.rect(surf, mix(bg, color, 0.25), rect, border_radius=r)
+    pygame.draw.rect(surf, color, rect, max(1, size // 10), border_radius=r)
+    inner = rect.inflate(-size // 2, -size // 2)
+    pygame.draw.rect(surf, mix(color, (255, 255, 255), 0.5), inner, 1, border_radius=max(1, r // 2))
+
+@style("glow")
+def paint_glow(surf, color, bg):
+    # Концентрические прямоугольники от фона к краю и от цвета к белому в центре
+    size = surf.get_width()
+    steps = max(2, size // 4)
+    for i in range(steps):
+        t = (i + 1) / steps
+        rect = pygame.Rect(0, 0, size - 1, size - 1).inflate(-i * 2, -i * 2)
+        if rect.width <= 0 or rect.height <= 0: break
+        c = mix(bg, color, min(1.0, t * 2)) if t <= 0.5 else mix(color, (255, 255, 255), (t - 0.5) * 0.8)
+        pygame.draw.rect(surf, c, rect, border_radius=max(1, rect.width // 4))
+
+# --- АТЛАС ---
+class TileAtlas:
+    """Плитки size×size по ключу (цвет, стиль, фон); рисуются при первом обращении"""
+    def __init__(self, size):
+        self.size = size
+        self.tiles = {}
+
+    def tile(self, color, style="block", bg=(0, 0, 0)):
+        key = (color, style, bg)
+        surf = self.tiles.get(key)
+        if surf is None:
+            surf = pygame.Surface((self.size, self.size))
+            surf.fill(bg)
+            STYLES[style](surf, color, bg)
+            if pygame.display.get_surface() is not None: surf = surf.convert()
+            self.tiles[key] = surf
+        return surf
+
+    def draw(self, dest, positions, color, style="block", bg=(0, 0, 0)):
+        """Одна плитка во все позиции (левые верхние углы в пикселях) одним blits"""
+        tile = self.tile(color, style, bg)
+        dest.blits([(tile, pos) for pos in positions], False)
+
+    def clear(self):
+        self.tiles.clear()
+
+_atlases = {}
+
+def tile_atlas(size):
+    """Общий атлас для плиток этого размера"""
+    atlas = _atlases.get(size)
+    if atlas is None: atlas = _atlases[size] = TileAtlas(size)
+    return atlas
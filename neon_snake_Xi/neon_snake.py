@@ -1,56 +1,180 @@
 import pygame
 import random
+import array
+import struct
+from collections import deque
+
+from snake_autopilot import Autopilot
+
+# Змейка в витрине ixstore берёт оттуда текст, плитки, ввод, рекорды и снимки;
+# сама по себе рисует клетки draw.rect, читает сырые события и помнит рекорд до выхода
+try:
+    from ixstore.textcache import render_text, draw_text
+    from ixstore.tiles import tile_atlas
+    from ixstore.controls import Controls
+    from ixstore.saves import high_scores, pack_rng, unpack_rng
+except ImportError:
+    tile_atlas = Controls = high_scores = None
+    def render_text(font, text, color, antialias=True):
+        return font.render(text, antialias, color)
+    def draw_text(dest, font, text, color, antialias=True, **anchor):
+        surf = font.render(text, antialias, color)
+        return dest.blit(surf, surf.get_rect(**anchor))
+
+# --- СНИМОК СОСТОЯНИЯ ---
+SNAP_MAGIC = b"IXS1"
+SNAP_HEAD = struct.Struct("<4sHHbbbbiiBI")  # magic, cols, rows, direction, next_direction, еда, очки, флаги, длина тела
+
+DEMO_RESTART_MS = 3000  # автопилот начинает заново через столько после Game Over
+DEMO_AXIS = 0.5         # отклонение стика, которое прерывает заставку (дрожание нуля — нет)
+
+def wakes_demo(event):
+    # Ввод человека: клавиша, кнопка, крестовина (JOYHATMOTION) или заметное отклонение стика
+    t = event.type
+    if t in (pygame.KEYDOWN, pygame.JOYBUTTONDOWN): return True
+    if t == pygame.JOYHATMOTION: return tuple(event.value) != (0, 0)
+    if t == pygame.JOYAXISMOTION: return abs(event.value) >= DEMO_AXIS
+    return False
 
 class NeonSnake:
-    def __init__(self, screen):
+    def __init__(self, screen, seed=None, demo=False):
+        # demo — заставка: играет автопилот, любой ввод возвращает в меню (HOME)
         self.screen = screen
         self.w, self.h = screen.get_size()
+        self.seed = seed if seed is not None else random.randrange(1 << 31)
+        self.rng = random.Random(self.seed)  # еда воспроизводима по seed
+        self.render_enabled = True
+        self.profiler = None  # хост может подставить ixstore.profiler.FrameProfiler
         
         # --- НАСТРОЙКИ ---
         self.CELL_SIZE = 20
         self.cols = self.w // self.CELL_SIZE
         self.rows = self.h // self.CELL_SIZE
+        self.demo = demo
+        self.autopilot = Autopilot(self.cols, self.rows) if demo else None
+        self.over_time = 0
         
         # Цвета
         self.BG_COLOR = (10, 10, 15)
         self.SNAKE_COLOR = (0, 255, 200)
         self.FOOD_COLOR = (255, 50, 100)
+        self.HEAD_COLOR = (200, 255, 255) # Голова светлее
         self.TEXT_COLOR = (255, 255, 255)
+        # Плитки из общего атласа: один blit на клетку при любом стиле (soft, round, neon, glow)
+        self.BODY_STYLE = "soft"
+        self.FOOD_STYLE = "round"
+        self.tiles = tile_atlas(self.CELL_SIZE) if tile_atlas else None
         
         self.font = pygame.font.SysFont("Arial", 24)
         self.font_big = pygame.font.SysFont("Arial", 48, bold=True)
 
+        # Ввод: джойстики подключаются на ходу, стик работает как крестовина
+        self.controls = Controls() if Controls else None
+
         # Тайминг
         self.clock = pygame.time.Clock()
         self.move_timer = 0
         self.move_interval = 80 # ~12-15 FPS (ms)
+        self.idle_fps = 20 # экран Game Over не меняется до ввода
+        self.idle = False
+        self.drawn_key = None
+
+        # Инкрементальная отрисовка: постоянный слой поля + перерисовка изменившихся клеток
+        self.incremental = True
+        self.field = None
+        self.screen_valid = False
+        self.dirty_cells = []
+        self.dirty_rects = []
+        self.score_text = None
+        self.score_rect = None
+        self.overlay = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
+        self.overlay.fill((0,0,0,180))
 
         self.reset_game()
+        self.best = high_scores().best("snake") if high_scores else 0
 
     def reset_game(self):
-        self.snake = [(self.cols//2, self.rows//2)]
+        self.reset_body([(self.cols//2, self.rows//2)])
         self.direction = (1, 0)
         self.next_direction = (1, 0)
         self.score = 0
         self.game_over = False
+        self.won = False
         self.spawn_food()
         self.move_timer = pygame.time.get_ticks()
+        self.field = None
+        self.dirty_cells = []
+        if self.autopilot: self.autopilot.reset()
+
+    def set_autopilot(self, on):
+        self.autopilot = Autopilot(self.cols, self.rows) if on else None
+
+    def steer(self, direction):
+        # Ход игрока; на автопилоте управление переходит к игроку
+        if self.autopilot and not self.demo: self.set_autopilot(False)
+        self.next_direction = direction
+
+    def reset_body(self, cells):
+        # Тело — deque (голова слева), свободные клетки — индексированный пул:
+        # free[k] = индекс клетки, free_pos[клетка] = k или -1, если клетка занята змейкой
+        n = self.cols * self.rows
+        self.free = list(range(n))
+        self.free_pos = array.array('i', range(n))
+        self.snake = deque()
+        for cell in reversed(cells): self.grow(cell)
+
+    def is_occupied(self, cell):
+        return self.free_pos[cell[1] * self.cols + cell[0]] < 0
+
+    def grow(self, cell):
+        # Новая голова: клетка уходит из пула за O(1) (swap с последней)
+        self.snake.appendleft(cell)
+        idx = cell[1] * self.cols + cell[0]
+        k = self.free_pos[idx]
+        last = self.free.pop()
+        if last != idx:
+            self.free[k] = last
+            self.free_pos[last] = k
+        self.free_pos[idx] = -1
+
+    def shrink(self):
+        # Хвост возвращается в пул
+        x, y = self.snake.pop()
+        idx = y * self.cols + x
+        self.free_pos[idx] = len(self.free)
+        self.free.append(idx)
+        return (x, y)
 
     def spawn_food(self):
-        while True:
-            self.food = (random.randint(0, self.cols-1), random.randint(0, self.rows-1))
-            if self.food not in self.snake:
-                break
+        if not self.free:
+            # Поле заполнено целиком — победа
+            self.food = None
+            self.won = True
+            self.game_over = True
+            return
+        idx = self.rng.choice(self.free)
+        self.food = (idx % self.cols, idx // self.cols)
 
-    def run_frame(self):
+    def run_frame(self, with_rects=False):
         # Возвращает: 'RUNNING', 'EXIT', или 'HOME'
-        dt = self.clock.tick(60) # Держим dt для плавности, но логику обновляем реже
+        # С with_rects=True — кортеж (статус, dirty rects) для display.update(rects)
+        status = self.step_frame()
+        if status != "RUNNING": self.screen_valid = False; self.drawn_key = None
+        if with_rects: return status, self.dirty_rects
+        return status
+
+    def step_frame(self):
+        dt = self.clock.tick(self.idle_fps if self.idle else 60) # Держим dt для плавности, но логику обновляем реже
         current_time = pygame.time.get_ticks()
+        prof = self.profiler
+        if prof: prof.mark("input")
 
         # 1. Ввод
-        for event in pygame.event.get():
+        for event in (self.controls.poll() if self.controls else pygame.event.get()):
             if event.type == pygame.QUIT:
                 return "EXIT"
+            if self.demo and wakes_demo(event):
+                return "HOME"
             
             # --- HOME BUTTON LOGIC ---
             if event.type == pygame.JOYBUTTONDOWN:
@@ -61,10 +185,11 @@ class NeonSnake:
                 if event.key == pygame.K_ESCAPE: return "EXIT"
                 
                 # Управление стрелками
-                if event.key == pygame.K_UP and self.direction != (0, 1): self.next_direction = (0, -1)
-                elif event.key == pygame.K_DOWN and self.direction != (0, -1): self.next_direction = (0, 1)
-                elif event.key == pygame.K_LEFT and self.direction != (1, 0): self.next_direction = (-1, 0)
-                elif event.key == pygame.K_RIGHT and self.direction != (-1, 0): self.next_direction = (1, 0)
+                if event.key == pygame.K_UP and self.direction != (0, 1): self.steer((0, -1))
+                elif event.key == pygame.K_DOWN and self.direction != (0, -1): self.steer((0, 1))
+                elif event.key == pygame.K_LEFT and self.direction != (1, 0): self.steer((-1, 0))
+                elif event.key == pygame.K_RIGHT and self.direction != (-1, 0): self.steer((1, 0))
+                if event.key == pygame.K_TAB: self.set_autopilot(not self.autopilot)
                 
                 # Рестарт
                 if self.game_over and event.key == pygame.K_RETURN:
@@ -79,43 +204,116 @@ class NeonSnake:
                 
                 if self.game_over and event.button == 0: # A / Cross to restart
                     self.reset_game()
+                if event.button == 3: self.set_autopilot(not self.autopilot) # Y — автопилот
             
             if event.type == pygame.JOYHATMOTION:
                 hat_x, hat_y = event.value
-                if hat_y == 1 and self.direction != (0, 1): self.next_direction = (0, -1)
-                elif hat_y == -1 and self.direction != (0, -1): self.next_direction = (0, 1)
-                elif hat_x == -1 and self.direction != (1, 0): self.next_direction = (-1, 0)
-                elif hat_x == 1 and self.direction != (-1, 0): self.next_direction = (1, 0)
+                if hat_y == 1 and self.direction != (0, 1): self.steer((0, -1))
+                elif hat_y == -1 and self.direction != (0, -1): self.steer((0, 1))
+                elif hat_x == -1 and self.direction != (1, 0): self.steer((-1, 0))
+                elif hat_x == 1 and self.direction != (-1, 0): self.steer((1, 0))
 
         # 2. Логика (обновляем только если прошел интервал времени)
+        if prof: prof.mark("update")
         if not self.game_over:
             if current_time - self.move_timer > self.move_interval:
                 self.move_timer = current_time
                 self.update_snake()
+        elif self.autopilot and current_time - self.over_time > DEMO_RESTART_MS:
+            self.reset_game()
 
         # 3. Отрисовка
-        self.draw()
+        if prof: prof.mark("draw")
+        key = ("GAMEOVER", self.won, self.score, bool(self.autopilot)) if self.game_over else None
+        self.idle = key is not None and key == self.drawn_key
+        if not self.render_enabled:
+            self.field = None  # соберётся заново, когда отрисовка вернётся
+            self.dirty_cells = []
+            self.dirty_rects = []
+            self.drawn_key = None
+        elif self.idle:
+            self.dirty_rects = []  # неподвижный кадр уже на экране
+        elif self.incremental and not self.game_over:
+            self.dirty_rects = self.draw_incremental()
+        else:
+            self.draw()
+            self.screen_valid = False
+            self.drawn_key = key
+            self.dirty_rects = [self.screen.get_rect()]
         
         return "RUNNING"
 
     def update_snake(self):
+        if self.autopilot:
+            # Решение автопилота — микросекунды на кэшированном пути, единицы мс на новом поиске
+            step = self.autopilot.decide(self.snake, self.food, self.free_pos)
+            if step: self.next_direction = step
         self.direction = self.next_direction
         head_x, head_y = self.snake[0]
         dx, dy = self.direction
         new_head = (head_x + dx, head_y + dy)
         
         # Проверка столкновений
-        if (new_head in self.snake or 
-            new_head[0] < 0 or new_head[0] >= self.cols or 
-            new_head[1] < 0 or new_head[1] >= self.rows):
+        if (new_head[0] < 0 or new_head[0] >= self.cols or 
+            new_head[1] < 0 or new_head[1] >= self.rows or
+            self.is_occupied(new_head)):
             self.game_over = True
         else:
-            self.snake.insert(0, new_head)
+            self.dirty_cells.append(self.snake[0])
+            self.dirty_cells.append(new_head)
+            self.grow(new_head)
             if new_head == self.food:
                 self.score += 10
                 self.spawn_food()
+                if self.food: self.dirty_cells.append(self.food)
             else:
-                self.snake.pop()
+                self.dirty_cells.append(self.shrink())
+        if self.game_over:
+            self.over_time = pygame.time.get_ticks()
+            self.submit_score()
+
+    def submit_score(self):
+        if self.autopilot: return  # очки автопилота в рекорды не идут
+        self.best = max(self.best, self.score)
+        if high_scores:
+            try: self.best = high_scores().submit("snake", self.score)
+            except OSError: pass
+
+    # --- СНИМОК ---
+    def snapshot(self):
+        """Партия в байтах: тело (индексы клеток от головы), еда, направление, счёт, RNG"""
+        body = array.array('I', (y * self.cols + x for x, y in self.snake))
+        food = self.food[1] * self.cols + self.food[0] if self.food else -1
+        head = SNAP_HEAD.pack(SNAP_MAGIC, self.cols, self.rows, *self.direction, *self.next_direction,
+                              food, self.score, self.game_over | self.won << 1, len(body))
+        return b"".join((head, body.tobytes(), pack_rng(self.rng)))
+
+    def restore(self, data):
+        try:
+            magic, cols, rows, dx, dy, ndx, ndy, food, score, flags, n = SNAP_HEAD.unpack_from(data)
+            if magic != SNAP_MAGIC or (cols, rows) != (self.cols, self.rows): raise ValueError("not a NeonSnake snapshot for this board")
+            pos = SNAP_HEAD.size
+            body = array.array('I')
+            body.frombytes(data[pos:pos + n * body.itemsize])
+            if len(body) != n or not n: raise ValueError("truncated NeonSnake snapshot")
+            # Повреждённый снимок не должен дойти до reset_body: клетки вне поля или повторы ломают пул свободных
+            cells = cols * rows
+            if max(body) >= cells or len(set(body)) != n: raise ValueError("bad body in NeonSnake snapshot")
+            if not -1 <= food < cells: raise ValueError("bad food in NeonSnake snapshot")
+            if abs(dx) + abs(dy) != 1 or abs(ndx) + abs(ndy) != 1: raise ValueError("bad direction in NeonSnake snapshot")
+            unpack_rng(self.rng, data[pos + n * body.itemsize:])
+        except struct.error as e:
+            raise ValueError(f"truncated NeonSnake snapshot: {e}")
+        self.reset_body([(i % cols, i // cols) for i in body])
+        self.food = (food % cols, food // cols) if food >= 0 else None
+        self.direction, self.next_direction = (dx, dy), (ndx, ndy)
+        self.score = score
+        self.game_over, self.won = bool(flags & 1), bool(flags & 2)
+        self.move_timer = pygame.time.get_ticks()
+        self.field = None
+        self.screen_valid = False
+        self.drawn_key = None
+        if self.autopilot: self.autopilot.reset()
 
     def draw(self):
         self.screen.fill(self.BG_COLOR)
@@ -126,31 +324,102 @@ class NeonSnake:
         # for y in range(0, self.h, self.CELL_SIZE):
         #     pygame.draw.line(self.screen, (20, 30, 40), (0, y), (self.w, y))
 
-        # Еда
-        fx, fy = self.food
-        pygame.draw.rect(self.screen, self.FOOD_COLOR, 
-                         (fx*self.CELL_SIZE, fy*self.CELL_SIZE, self.CELL_SIZE-1, self.CELL_SIZE-1), 
-                         border_radius=4)
-        
-        # Змейка
-        for i, (sx, sy) in enumerate(self.snake):
-            color = self.SNAKE_COLOR
-            if i == 0: color = (200, 255, 255) # Голова светлее
-            pygame.draw.rect(self.screen, color, 
-                             (sx*self.CELL_SIZE, sy*self.CELL_SIZE, self.CELL_SIZE-1, self.CELL_SIZE-1), 
-                             border_radius=2)
+        # Еда и змейка
+        self.draw_cells(self.screen)
 
         # UI
-        score_surf = self.font.render(f"Score: {self.score}", True, self.TEXT_COLOR)
-        self.screen.blit(score_surf, (20, 20))
+        draw_text(self.screen, self.font, self.score_label(), self.TEXT_COLOR, topleft=(20, 20))
 
         if self.game_over:
-            overlay = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-            overlay.fill((0,0,0,180))
-            self.screen.blit(overlay, (0,0))
+            self.screen.blit(self.overlay, (0,0))
             
-            txt_over = self.font_big.render("GAME OVER", True, (255, 50, 50))
+            if self.won: txt_over = render_text(self.font_big, "YOU WIN", self.SNAKE_COLOR)
+            else: txt_over = render_text(self.font_big, "GAME OVER", (255, 50, 50))
             self.screen.blit(txt_over, txt_over.get_rect(center=(self.w//2, self.h//2 - 40)))
             
-            txt_res = self.font.render("Press Enter / A to Restart", True, (200, 200, 200))
-            self.screen.blit(txt_res, txt_res.get_rect(center=(self.w//2, self.h//2 + 20)))
\ No newline at end of file
+            txt_res = render_text(self.font, "Press Enter / A to Restart", (200, 200, 200))
+            self.screen.blit(txt_res, txt_res.get_rect(center=(self.w//2, self.h//2 + 20)))
+            draw_text(self.screen, self.font, f"Best: {self.best}", self.SNAKE_COLOR, center=(self.w//2, self.h//2 + 60))
+
+    def score_label(self):
+        return f"Score: {self.score}" + ("  AUTO" if self.autopilot else "")
+
+    # --- ИНКРЕМЕНТАЛЬНАЯ ОТРИСОВКА ---
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0]*self.CELL_SIZE, cell[1]*self.CELL_SIZE, self.CELL_SIZE, self.CELL_SIZE)
+
+    def cell_tiles(self):
+        """(плитка, позиция) для еды и всех сегментов — последовательность для blits"""
+        size, bg = self.CELL_SIZE, self.BG_COLOR
+        body = self.tiles.tile(self.SNAKE_COLOR, self.BODY_STYLE, bg)
+        seq = [(body, (x*size, y*size)) for x, y in self.snake]
+        if self.snake:
+            seq[0] = (self.tiles.tile(self.HEAD_COLOR, self.BODY_STYLE, bg), seq[0][1])
+        if self.food:
+            seq.append((self.tiles.tile(self.FOOD_COLOR, self.FOOD_STYLE, bg), (self.food[0]*size, self.food[1]*size)))
+        return seq
+
+    def draw_cells(self, surf):
+        # С атласом — одним blits, без него — draw.rect по клеткам
+        if self.tiles: return surf.blits(self.cell_tiles(), False)
+        if self.food: self.draw_cell(surf, self.food)
+        for cell in self.snake: self.draw_cell(surf, cell)
+
+    def draw_cell(self, surf, cell):
+        rect = (cell[0]*self.CELL_SIZE, cell[1]*self.CELL_SIZE, self.CELL_SIZE-1, self.CELL_SIZE-1)
+        if cell == self.food:
+            pygame.draw.rect(surf, self.FOOD_COLOR, rect, border_radius=4)
+        else:
+            color = self.HEAD_COLOR if cell == self.snake[0] else self.SNAKE_COLOR
+            pygame.draw.rect(surf, color, rect, border_radius=2)
+
+    def paint_cell(self, cell):
+        # Перерисовка одной клетки на слое поля: плитка закрывает клетку целиком
+        rect = self.cell_rect(cell)
+        if not self.tiles:
+            self.field.fill(self.BG_COLOR, rect)
+            if cell == self.food or self.is_occupied(cell): self.draw_cell(self.field, cell)
+        elif cell == self.food:
+            self.field.blit(self.tiles.tile(self.FOOD_COLOR, self.FOOD_STYLE, self.BG_COLOR), rect)
+        elif self.is_occupied(cell):
+            color = self.HEAD_COLOR if cell == self.snake[0] else self.SNAKE_COLOR
+            self.field.blit(self.tiles.tile(color, self.BODY_STYLE, self.BG_COLOR), rect)
+        else:
+            self.field.fill(self.BG_COLOR, rect)
+
+    def build_field(self):
+        self.field = pygame.Surface((self.w, self.h), 0, self.screen)
+        self.field.fill(self.BG_COLOR)
+        self.draw_cells(self.field)
+        self.dirty_cells = []
+
+    def draw_incremental(self):
+        """Перерисовывает только изменившиеся клетки и счёт, возвращает dirty rects"""
+        dirty = []
+        if self.field is None:
+            self.build_field()
+            self.screen_valid = False
+        if not self.screen_valid:
+            self.screen.blit(self.field, (0, 0))
+            self.dirty_cells = []
+            self.score_text = None
+            dirty.append(self.screen.get_rect())
+        for cell in self.dirty_cells:
+            self.paint_cell(cell)
+            r = self.cell_rect(cell)
+            self.screen.blit(self.field, r, r)
+            dirty.append(r)
+        self.dirty_cells = []
+
+        # UI: счёт перекладывается при изменении или поверх задетых клеток (глифы — из общего кэша)
+        text = self.score_label()
+        touched = self.score_rect and self.score_rect.collidelist(dirty) >= 0
+        if self.score_text != text or touched:
+            self.score_text = text
+            if self.score_rect: self.screen.blit(self.field, self.score_rect, self.score_rect)
+            rect = draw_text(self.screen, self.font, text, self.TEXT_COLOR, topleft=(20, 20))
+            area = rect.union(self.score_rect) if self.score_rect else rect
+            self.score_rect = rect
+            dirty.append(area)
+        self.screen_valid = True
+        return dirty
\ No newline at end of file
@@ -0,0 +1,435 @@
+"""
+Автопилот Neon Snake без pygame (демо-режим на экране простоя).
+Кратчайший путь до еды — BFS по битборду поля (слой поиска — несколько
+сдвигов большого целого), клетки тела открываются с того шага, когда их
+освободит хвост; путь берётся, только если после еды хвост остаётся
+достижим. Иначе — гамильтонов цикл: как только тело легло на цикл (по его
+порядку, с пропусками), змейка идёт по нему со срезками к еде и уже не может
+запереть себя; выбрав цикл, она держится его, пока тело не ляжет. С
+CYCLE_SHARE поля змейка ищет путь уже только к входу на цикл. Пока не
+легло — погоня за хвостом, а если и хвост недостижим — шаг туда, где можно
+покружить, пока хвост не освободит выход. На поле с двумя нечётными
+сторонами угол вне цикла проходится заходом вместо соседней клетки цикла.
+
+Найденный путь кэшируется и проходится по клетке за тик: поиск запускается
+только на новую еду или когда путь кончился. Цикл и маска поля считаются
+один раз на размер поля.
+
+    python snake_autopilot.py --cols 192 --rows 108 --steps 20000
+    python snake_autopilot.py --check      # самоигра на наборе полей: код 1, если змейка застряла или разбилась
+"""
+import random
+import time
+from array import array
+from collections import deque
+from itertools import chain, islice
+
+CYCLE_MARGIN = 4   # срезка по циклу не ближе этого к хвосту: запас на рост от еды
+CYCLE_SHARE = 0.25  # с такой доли поля змейка перестаёт срезать к еде по BFS и ложится на цикл
+CHASE_STEPS = 16   # после стольких шагов за хвостом снова пробуем дойти до еды
+MAX_WAITS = 8      # сколько раз проверка хвоста может «переждать» в своей области
+CHASE, CYCLE = -2, -3  # цели кэшированного пути, кроме клетки еды
+
+# Клетки внутри автопилота — индексы битборда y * (cols + 1) + x: лишний столбец
+# пустой, поэтому сдвиг на ±1 не переносит клетку через край строки
+
+# --- ТАБЛИЦЫ ПОЛЯ ---
+_TABLES = {}
+
+def grid_tables(cols, rows):
+    """Маска поля, признак клетки по индексу и гамильтонов цикл (order, cycle или None) — кэш по размеру"""
+    key = (cols, rows)
+    tables = _TABLES.get(key)
+    if tables is None:
+        w = cols + 1
+        valid = bytearray(w * rows)
+        for y in range(rows): valid[y * w:y * w + cols] = b"\x01" * cols
+        board = sum(((1 << cols) - 1) << (y * w) for y in range(rows))
+        tables = _TABLES[key] = (board, valid, hamiltonian_cycle(cols, rows))
+    return tables
+
+def cycle_cells(cols, rows):
+    """Обход «змейкой» по столбцам 1.., возврат по столбцу 0. При нечётном rows две нижние
+    строки проходятся зигзагом по столбцам, а угол (0, rows - 1) остаётся вне цикла"""
+    cells = [(x, 0) for x in range(cols)]
+    last = rows if rows % 2 == 0 else rows - 2
+    for y in range(1, last):
+        xs = range(cols - 1, 0, -1) if y % 2 else range(1, cols)
+        cells.extend((x, y) for x in xs)
+    if last < rows:
+        for x in range(cols - 1, 0, -1):
+            ys = (last, last + 1) if (cols - 1 - x) % 2 == 0 else (last + 1, last)
+            cells.extend((x, y) for y in ys)
+        last += 1
+    cells.extend((0, y) for y in range(last - 1, 0, -1))
+    return cells
+
+def hamiltonian_cycle(cols, rows):
+    """(order, cycle): номер клетки на цикле (-1 — вне цикла) и клетка по номеру;
+    None на поле в одну линию. На поле с двумя нечётными сторонами цикл обходит все клетки, кроме угла"""
+    if cols < 2 or rows < 2: return None
+    if rows % 2 and cols % 2 == 0:
+        cells = [(y, x) for x, y in cycle_cells(rows, cols)]  # строим на транспонированном поле
+    else:
+        cells = cycle_cells(cols, rows)
+    w = cols + 1
+    cycle = array('i', (y * w + x for x, y in cells))
+    order = array('i', [-1]) * (w * rows)
+    for k, c in enumerate(cycle): order[c] = k
+    return order, cycle
+
+# --- АВТОПИЛОТ ---
+class Autopilot:
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.w = cols + 1
+        self.board, self.valid, cycle = grid_tables(cols, rows)
+        self.order, self.cycle = cycle or (None, None)
+        self.n = len(self.cycle) if cycle else cols * rows  # длина цикла
+        # Угол вне цикла (две нечётные стороны) лежит между клетками цикла k и k + 2 — заход в него
+        # считается шагом k + 1 вместо пропущенной клетки цикла
+        self.spot, self.spot_rank = -1, -1
+        if cycle:
+            for c in range(len(self.valid)):
+                if self.valid[c] and self.order[c] < 0:
+                    self.spot, self.spot_rank = c, min(self.order[m] for m in self.neighbours(c)) + 1
+        self.times = deque(maxlen=1024)  # мс на решение, для замеров
+        self.reset()
+
+    def reset(self):
+        """Забыть кэш (новая партия, снимок, ход игрока)"""
+        self.path = []          # клетки впереди, следующая — последней
+        self.goal = None        # куда ведёт path: клетка еды, CHASE или CYCLE
+        self.cycle_mode = False
+        self.on_cycle = 0       # шагов подряд по циклу: >= длины — тело легло на цикл
+
+    def decide(self, body, food, free_pos):
+        """Направление (dx, dy) следующего шага или None, если ходить некуда.
+        body — клетки (x, y) от головы, food — (x, y) или None,
+        free_pos[y * cols + x] < 0 — клетка занята"""
+        t = time.perf_counter()
+        w = self.w
+        hx, hy = body[0]
+        head = hy * w + hx
+        goal = food[1] * w + food[0] if food else -1
+        cell = self.next_cell(body, head, goal, free_pos)
+        if self.cycle is not None:
+            self.on_cycle = self.on_cycle + 1 if cell == self.cycle[(self.rank(head) + 1) % self.n] else 0
+        self.times.append((time.perf_counter() - t) * 1000)
+        if cell < 0: return None
+        return (cell % w - hx, cell // w - hy)
+
+    def rank(self, cell):
+        """Номер клетки на цикле (угол вне цикла — номер пропускаемой им клетки), -1 — вне цикла"""
+        k = self.order[cell]
+        return self.spot_rank if k < 0 and cell == self.spot else k
+
+    def is_free(self, cell, free_pos):
+        return free_pos[cell - cell // self.w] >= 0
+
+    def neighbours(self, cell):
+        w, valid = self.w, self.valid
+        return [m for m in (cell - w, cell + w, cell - 1, cell + 1) if 0 <= m < len(valid) and valid[m]]
+
+    def next_cell(self, body, head, goal, free_pos):
+        if self.cycle_mode:
+            cell = self.cycle_step(body, head, goal, free_pos)
+            if self.is_free(cell, free_pos) and self.rank(head) >= 0: return cell
+            self.reset()  # тело не на цикле (например, после снимка) — планируем заново
+        elif self.goal == CYCLE and self.on_cycle >= len(body):
+            self.cycle_mode = True
+            self.path = []
+            return self.cycle_step(body, head, goal, free_pos)
+        path = self.path
+        if (path and self.goal in (goal, CHASE, CYCLE) and abs(path[-1] - head) in (1, self.w)
+                and self.is_free(path[-1], free_pos)):
+            # Еда на пути за хвостом удлинит тело — шаг в неё только если хвост и после этого достижим
+            if not (self.goal == CHASE and path[-1] == goal) or self.tail_safe(self.cells(body), [goal]):
+                return path.pop()
+        return self.plan(body, head, goal, free_pos)
+
+    # --- ПОИСК ---
+    def cells(self, body):
+        return [y * self.w + x for x, y in body]
+
+    def bits(self, cells):
+        """Битборд из списка клеток (через bytearray — без сотен операций над большим целым)"""
+        buf = bytearray((len(self.valid) + 7) // 8)
+        for c in cells: buf[c >> 3] |= 1 << (c & 7)
+        return int.from_bytes(buf, "little")
+
+    def search(self, start, goal, cells, blocked):
+        """BFS от start до goal слоями по битборду; blocked — занятые клетки, cells — тело от головы:
+        клетка cells[i] открывается на шаге len(cells) + 1 - i. Путь (goal первой, первый шаг последним) или None"""
+        w = self.w
+        unseen = self.board & ~blocked
+        front = 1 << start
+        target = 1 << goal
+        layers = [front]
+        n = len(cells)
+        depth = 0
+        while front:
+            depth += 1
+            k = n + 1 - depth
+            if 0 <= k < n: unseen |= 1 << cells[k]
+            front = ((front << 1) | (front >> 1) | (front << w) | (front >> w)) & unseen
+            if front & target:
+                path = [goal]
+                cur = goal
+                for d in range(depth - 1, 0, -1):
+                    layer = layers[d]
+                    for m in (cur - 1, cur + 1, cur - w, cur + w):
+                        if m >= 0 and layer >> m & 1:
+                            cur = m
+                            break
+                    path.append(cur)
+                return path
+            unseen ^= front
+            layers.append(front)
+        return None
+
+    def reachable(self, start, goal, cells, blocked):
+        """Дойдёт ли голова из start до goal при теле cells (от головы). Когда область вокруг
+        головы исчерпана, змейка кружит в ней, пока хвост не откроет клетку на границе, —
+        если в области хватает клеток на это ожидание (свой след при ожидании не учитывается)"""
+        w, board = self.w, self.board
+        n = len(cells)
+        free = board & ~blocked
+        reach = 1 << start
+        target = 1 << goal
+        k = n - 1  # cells[k] — следующая освобождаемая, открывается на шаге n + 1 - k
+        t = 0
+        waits = MAX_WAITS
+        while True:
+            t += 1
+            while k >= 0 and n + 1 - k <= t:
+                free |= 1 << cells[k]
+                k -= 1
+            around = (reach << 1) | (reach >> 1) | (reach << w) | (reach >> w)
+            new = around & free & ~reach
+            if new & target: return True
+            if new:
+                reach |= new
+                continue
+            # Область исчерпана: ближайшая по времени освобождения клетка тела на её границе
+            edge = (around & board & ~free).to_bytes(len(self.valid) // 8 + 1, "little")
+            j = k
+            while j >= 0 and not edge[cells[j] >> 3] >> (cells[j] & 7) & 1: j -= 1
+            if j < 0 or not waits or n + 1 - j - t > reach.bit_count(): return False
+            waits -= 1
+            free |= self.bits(cells[j:k + 1])
+            k = j - 1
+            t = n - j
+
+    def tail_safe(self, cells, path):
+        """После прохода path и еды хвост достижим из новой головы"""
+        body = list(islice(chain(path, cells), len(cells) + 1))  # змейка вырастет
+        return self.search(path[0], body[-1], body[-1:], self.bits(body)) is not None
+
+    def plan(self, body, head, goal, free_pos):
+        cells = self.cells(body)
+        blocked = self.bits(cells)
+        # Уже ложимся на цикл (еда по дороге удлинила тело) — не бросаем его ради еды, пока тело не легло
+        committed = self.goal == CYCLE
+        # Длинная змейка идёт к еде только по циклу: BFS к еде на тесном поле запирает её в собственной петле
+        if self.cycle is not None and len(cells) >= self.n * CYCLE_SHARE: committed = True
+        if committed and self.ordered(cells):
+            # Тело уже лежит по порядку цикла — срезки cycle_step безопасны, ждать полного прохода незачем
+            cell = self.cycle_step(body, head, goal, free_pos)
+            if self.is_free(cell, free_pos):
+                self.cycle_mode = True
+                self.path = []
+                return cell
+        if goal >= 0 and not committed:
+            path = self.search(head, goal, cells, blocked)
+            if path and self.tail_safe(cells, path):
+                self.path, self.goal = path, goal
+                return path.pop()
+        # Безопасного пути к еде нет: ложимся на гамильтонов цикл, если он свободен на длину тела
+        if self.cycle is not None:
+            run = self.cycle_run(head, cells, free_pos)
+            if len(run) >= len(cells):
+                self.path, self.goal = run, CYCLE
+                return run.pop()
+            if committed:
+                # От головы цикл занят телом — ближайший вход, за которым цикл свободен на длину тела
+                path = self.align(head, cells, blocked)
+                if path:
+                    self.path, self.goal = path, CYCLE
+                    return path.pop()
+        # Иначе — за хвостом (несколько шагов, потом снова к еде)
+        path = self.search(head, cells[-1], cells[-1:], blocked) if len(cells) > 1 else None
+        if path:
+            self.path, self.goal = path[-CHASE_STEPS:], CHASE
+            return self.path.pop()
+        # Хвост сейчас не догнать: шаг туда, откуда он достижим с ожиданием (по циклу — первым)
+        self.path, self.goal = [], None
+        moves = [m for m in self.neighbours(head) if self.is_free(m, free_pos)]
+        if self.cycle is not None: moves.sort(key=lambda m: m != self.cycle[(self.rank(head) + 1) % self.n])
+        for m in moves:
+            moved = [m] + cells[:-1]
+            if self.reachable(m, moved[-1], moved, (blocked | 1 << m) & ~(1 << cells[-1])): return m
+        return moves[0] if moves else -1
+
+    def ordered(self, cells):
+        """Тело от хвоста к голове идёт по циклу вперёд (с пропусками, меньше одного оборота)"""
+        n = self.n
+        base = self.rank(cells[-1])
+        if base < 0: return False
+        last = 0
+        for c in reversed(cells[:-1]):
+            k = self.rank(c)
+            if k < 0: return False
+            d = (k - base) % n
+            if d <= last: return False
+            last = d
+        return True
+
+    def align(self, head, cells, blocked):
+        """Путь до ближайшей клетки цикла, за которой len(cells) + 1 клеток цикла свободны
+        и не лежат на самом пути; дальше — по циклу. Путь и проход по циклу (первый шаг — последним) или []"""
+        order, cycle, n, w = self.order, self.cycle, self.n, self.w
+        free = self.board & ~blocked
+        prev = {head: head}
+        queue = deque([head])
+        while queue:
+            c = queue.popleft()
+            if c != head and order[c] >= 0:
+                path = [c]
+                while prev[path[-1]] != head: path.append(prev[path[-1]])
+                on_path = set(path)
+                run = [cycle[(order[c] + i) % n] for i in range(1, len(cells) + 2)]
+                if all(free >> r & 1 and r not in on_path for r in run):
+                    run.reverse()
+                    return run + path
+            for m in (c - w, c + w, c - 1, c + 1):
+                if m >= 0 and m not in prev and free >> m & 1:
+                    prev[m] = c
+                    queue.append(m)
+        return []
+
+    def cycle_run(self, head, cells, free_pos):
+        """Клетки по циклу от головы, пока каждая свободна к своему шагу (с запасом в шаг на рост)"""
+        order, cycle, n = self.order, self.cycle, self.n
+        length = len(cells)
+        gone = set()  # клетки хвоста, освободившиеся к шагу
+        k = self.rank(head)
+        run = []
+        for step in range(1, length + 1):
+            if length + 2 - step < length: gone.add(cells[length + 2 - step])
+            c = cycle[(k + step) % n]
+            if not self.is_free(c, free_pos) and c not in gone: break
+            run.append(c)
+        run.reverse()
+        return run
+
+    def cycle_step(self, body, head, goal, free_pos):
+        """Ход по циклу; срезка вперёд по циклу — если не перескакивает еду и не подходит к хвосту"""
+        rank, n = self.rank, self.n
+        base = rank(head)
+        cell = self.cycle[(base + 1) % n]
+        if goal == self.spot and (base + 1) % n == self.spot_rank: return goal  # еда в углу вне цикла
+        if len(body) * 2 >= n: return cell  # на длинной змейке срезки не окупают риск
+        tx, ty = body[-1]
+        to_tail = (rank(ty * self.w + tx) - base) % n
+        to_food = (rank(goal) - base) % n if goal >= 0 else 0
+        best = 1
+        for m in self.neighbours(head):
+            d = (rank(m) - base) % n
+            if best < d <= to_food and d < to_tail - CYCLE_MARGIN and rank(m) >= 0 and self.is_free(m, free_pos):
+                cell, best = m, d
+        return cell
+
+    def stats(self):
+        """{'n', 'p50', 'p99', 'max'} в мс по последним решениям"""
+        if not self.times: return {"n": 0}
+        vals = sorted(self.times)
+        pick = lambda p: vals[min(len(vals) - 1, int(len(vals) * p / 100))]
+        return {"n": len(vals), "p50": pick(50), "p99": pick(99), "max": vals[-1]}
+
+# --- САМОИГРА (без pygame) ---
+def simulate(cols, rows, steps, seed=0, body_len=1):
+    """Правила neon_snake.py: проверка столкновения до сдвига хвоста, еда — на случайной свободной клетке.
+    Возвращает (очки, шагов, длина, победа, Autopilot)"""
+    rng = random.Random(seed)
+    n = cols * rows
+    free = list(range(n))
+    free_pos = array('i', range(n))
+    snake = deque()
+
+    def grow(cell):
+        snake.appendleft(cell)
+        idx = cell[1] * cols + cell[0]
+        k, last = free_pos[idx], free.pop()
+        if last != idx:
+            free[k] = last
+            free_pos[last] = k
+        free_pos[idx] = -1
+
+    # Длинное стартовое тело (для замеров) укладывается «змейкой» по верхним строкам, голова — в конце
+    for i in range(body_len):
+        y = i // cols
+        grow((i % cols if y % 2 == 0 else cols - 1 - i % cols, y))
+    food = None
+    if free:
+        idx = rng.choice(free)
+        food = (idx % cols, idx // cols)
+    pilot = Autopilot(cols, rows)
+    pilot.times = deque()  # все решения партии, а не последние
+    score, step = 0, 0
+    for step in range(1, steps + 1):
+        d = pilot.decide(snake, food, free_pos)
+        if d is None: break
+        x, y = snake[0]
+        head = (x + d[0], y + d[1])
+        if not (0 <= head[0] < cols and 0 <= head[1] < rows) or free_pos[head[1] * cols + head[0]] < 0: break
+        grow(head)
+        if head == food:
+            score += 10
+            if not free: return score, step, len(snake), True, pilot
+            idx = rng.choice(free)
+            food = (idx % cols, idx // cols)
+        else:
+            tx, ty = snake.pop()
+            free_pos[ty * cols + tx] = len(free)
+            free.append(ty * cols + tx)
+    return score, step, len(snake), False, pilot
+
+CHECK_SIZES = ((4, 4), (5, 4), (5, 5), (6, 6), (8, 6), (7, 5), (10, 8), (9, 9), (12, 10), (20, 15), (32, 18))
+
+def check(seeds=4):
+    """Самоигра до конца на маленьких и средних полях. Змейка должна заполнить весь цикл
+    (на поле с двумя нечётными сторонами — все клетки, кроме одной), тратя на еду не больше оборота цикла.
+    Возвращает число провалов"""
+    failures = 0
+    for cols, rows in CHECK_SIZES:
+        n = cols * rows
+        need = n - 1 if cols % 2 and rows % 2 else n
+        for seed in range(seeds):
+            score, steps, length, won, _ = simulate(cols, rows, n * n, seed)
+            ok = won or length >= need
+            if not ok:
+                failures += 1
+                why = "stalled" if steps == n * n else "crashed"
+                print(f"FAIL {cols}x{rows} seed {seed}: {why} at length {length}/{n} after {steps} steps")
+    print(f"check: {len(CHECK_SIZES) * seeds - failures}/{len(CHECK_SIZES) * seeds} games filled the board")
+    return failures
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    ap = argparse.ArgumentParser(description="Neon Snake autopilot self-play and decision timing")
+    ap.add_argument("--cols", type=int, default=40)
+    ap.add_argument("--rows", type=int, default=24)
+    ap.add_argument("--steps", type=int, default=20000)
+    ap.add_argument("--length", type=int, default=1, help="starting body length")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--check", action="store_true", help="self-play on several board sizes, exit 1 on a failure")
+    args = ap.parse_args()
+    if args.check: sys.exit(1 if check() else 0)
+    t0 = time.perf_counter()
+    score, steps, length, won, pilot = simulate(args.cols, args.rows, args.steps, args.seed, args.length)
+    st = pilot.stats()
+    print(f"{args.cols}x{args.rows}: score {score}, length {length}, steps {steps}, won {won}, "
+          f"{time.perf_counter() - t0:.1f}s")
+    print(f"decision ms: p50 {st['p50']:.3f}  p99 {st['p99']:.3f}  max {st['max']:.3f}")